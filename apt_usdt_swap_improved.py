@@ -5,28 +5,44 @@ Enhanced with real on-chain calls, proper USDT handling, and comprehensive valid
 """
 
 import asyncio
+import json
 import logging
+import math
+import os
+import sys
 import time
-from decimal import Decimal, ROUND_DOWN
+from pathlib import Path
 from typing import Optional, Tuple, Dict, Any, List
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 from aptos_sdk.account import Account
-from aptos_sdk.client import RestClient
-from aptos_sdk.transactions import TransactionArgument, TransactionPayload
-from aptos_sdk.type_tag import TypeTag, StructTag
+from aptos_sdk.async_client import RestClient
+from aptos_sdk.transactions import TransactionPayload
+
+# Shared Aptos client components live in aptos-vault/api
+sys.path.append(str(Path(__file__).parent / "aptos-vault"))
+
+from api.confirmation_tracker import ConfirmationTracker, TransactionFailed
+from api.event_store import EventStore
+from api.logging_setup import RateLimitFilter, setup_logging
+from api.metrics import Metrics, instrument
+from api.pool_reserves import PoolReserveTracker
+from api.sdk_backend import entry_function_payload, rest_api_url
+from api.transaction_submitter import TransactionSubmitter
+from api.swap_math import BPS, get_amount_out, simulate_swap_with_fees
 
-# Configure logging with different levels
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('vault_swap.log'),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
 
+def configure_logging(log_file: str = 'vault_swap.log', json_lines: bool = False, level: int = logging.INFO):
+    """Log through a background writer thread so file I/O never blocks the event loop"""
+    return setup_logging(
+        log_file,
+        level=level,
+        json_lines=json_lines,
+        # Balance reads happen on every validation; keep at most one line per 5s
+        filters=[RateLimitFilter("Account balances:", per_second=0.2)],
+    )
+
 @dataclass
 class SwapConfig:
     """Configuration for swap operations"""
@@ -43,34 +59,156 @@ class SwapConfig:
     max_retries: int = 3
     retry_delay: float = 2.0
     
+    # Run the balance, approval, network and quote reads as one concurrent fan-out
+    concurrent_validation: bool = True
+    
+    # Price quotes locally with the adapter's fee math instead of a view call
+    local_quotes: bool = False
+    
+    # Keep APT/USDT pool reserves fresh in the background and price impact from them
+    track_reserves: bool = True
+    reserve_poll_interval: float = 0.5
+    # Price impact assumed while reserves cannot be read; 0 matches track_reserves=False
+    fallback_price_impact: float = 0.0
+    apt_coin_type: str = "0x1::aptos_coin::AptosCoin"
+    usdt_coin_type: str = "0xf22bede237a07e121b56d91a491eb7bcdfd1f5907926a9e58338f964a01b17fa::asset::USDT"
+    
     # Network configuration
-    node_url: str = "https://fullnode.mainnet.aptoslabs.com"
+    node_url: str = "https://fullnode.mainnet.aptoslabs.com/v1"
     gas_unit_price: int = 100
     max_gas_amount: int = 200000
+    
+    # Confirmation polling: start fast, back off while nothing lands
+    confirmation_initial_interval: float = 0.2
+    confirmation_max_interval: float = 2.0
+    confirmation_timeout: float = 300.0
+    
+    # Signed transactions allowed in flight at once from this account
+    max_in_flight: int = 32
+    
+    # Split execution: cap each child swap's price impact, spread children over time
+    split_max_child_impact: float = 0.005  # 0.5%
+    split_max_children: int = 20
+    split_interval: float = 2.0  # seconds between child submissions, lets arbitrage refill the pool
+
+@dataclass
+class ChildFill:
+    """One child swap of a split order"""
+    apt_amount: int
+    expected_usdt: int
+    min_usdt: int
+    price_impact: float = 0.0  # on the reserves left by the children before it
+    tx_hash: Optional[str] = None
+    status: str = "pending"
+    error: Optional[str] = None
+
+@dataclass
+class FillReport:
+    """Outcome of a split order compared with sending it in one transaction"""
+    apt_amount: int
+    single_shot_usdt: int
+    children: List[ChildFill] = field(default_factory=list)
+    filled_apt: int = 0
+    received_usdt: int = 0
+    
+    @property
+    def average_price(self) -> float:
+        """Achieved USDT per APT unit over the filled children"""
+        return self.received_usdt / self.filled_apt if self.filled_apt else 0.0
+    
+    @property
+    def single_shot_price(self) -> float:
+        return self.single_shot_usdt / self.apt_amount if self.apt_amount else 0.0
+    
+    @property
+    def improvement_bps(self) -> float:
+        """Average price versus the single-shot quote, in basis points"""
+        if not self.single_shot_price:
+            return 0.0
+        return (self.average_price / self.single_shot_price - 1) * 10000
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "apt_amount": self.apt_amount,
+            "filled_apt": self.filled_apt,
+            "received_usdt": self.received_usdt,
+            "single_shot_usdt": self.single_shot_usdt,
+            "average_price": self.average_price,
+            "single_shot_price": self.single_shot_price,
+            "improvement_bps": self.improvement_bps,
+            "children": [child.__dict__ for child in self.children],
+        }
 
 class VaultSwapClient:
     """Enhanced client for vault swap operations with real on-chain calls"""
     
-    def __init__(self, private_key: str, config: SwapConfig = None):
+    def __init__(
+        self,
+        private_key: str,
+        config: SwapConfig = None,
+        client: Optional[RestClient] = None,
+        confirmations: Optional[ConfirmationTracker] = None,
+        reserves: Optional[PoolReserveTracker] = None,
+        metrics: Optional[Metrics] = None,
+        event_store: Optional[EventStore] = None,
+    ):
+        """Shared client, tracker and reserves are left open by close(); their owner closes them"""
         self.config = config or SwapConfig()
         self.account = Account.load_key(private_key)
-        self.client = RestClient(self.config.node_url)
+        self._owns_client = client is None
+        self._owns_confirmations = confirmations is None
+        self._owns_reserves = reserves is None
+        
+        # Every fullnode call is timed; see self.metrics.snapshot() / to_prometheus()
+        self.client = instrument(client or RestClient(rest_api_url(self.config.node_url)), metrics)
+        self.metrics = self.client.metrics
+        # Our own confirmed swaps are indexed here so get_swap_events stays local
+        self.events = event_store
+        self.confirmations = confirmations or ConfirmationTracker(
+            self.client,
+            initial_interval=self.config.confirmation_initial_interval,
+            max_interval=self.config.confirmation_max_interval,
+            timeout=self.config.confirmation_timeout,
+        )
+        self.submitter = TransactionSubmitter(
+            self.client,
+            self.account,
+            self.confirmations,
+            max_in_flight=self.config.max_in_flight,
+            metrics=self.metrics,
+        )
+        self.reserves = reserves or PoolReserveTracker(
+            self.client,
+            self.config.pancakeswap_router,
+            self.config.apt_coin_type,
+            self.config.usdt_coin_type,
+            poll_interval=self.config.reserve_poll_interval,
+        )
         
         # Initialize security state
         self.last_swap_time = 0
         self.swap_count = 0
         self.total_volume = 0
         
-        logger.info(f"Initialized VaultSwapClient for account: {self.account.address()}")
+        logger.info("Initialized VaultSwapClient for account: %s", self.account.address())
+    
+    async def _view(self, function: str, arguments: List[Any]) -> List[Any]:
+        """Call a view function of the vault package and decode its JSON result"""
+        result = await self.client.view(
+            f"{self.config.vault_address}::{function}",
+            [],
+            [str(argument) for argument in arguments],
+        )
+        return json.loads(result) if isinstance(result, (bytes, str)) else result
     
     async def check_network_status(self) -> bool:
         """Check if the network is healthy"""
         try:
-            ledger_info = await self.client.ledger_info()
-            logger.info(f"Network height: {ledger_info['block_height']}")
+            ledger_info = await self.client.info()
+            logger.info("Network height: %s", ledger_info['block_height'])
             return True
         except Exception as e:
-            logger.error(f"Network check failed: {e}")
+            logger.error("Network check failed: %s", e)
             return False
     
     async def get_account_balance(self, token_address: str = None) -> Dict[str, int]:
@@ -88,94 +226,158 @@ class VaultSwapClient:
                 elif "0x1::coin::CoinStore<" in resource["type"] and token_address in resource["type"]:
                     balances["USDT"] = int(resource["data"]["coin"]["value"])
             
-            logger.info(f"Account balances: {balances}")
+            logger.info("Account balances: %s", balances)
             return balances
         except Exception as e:
-            logger.error(f"Failed to get account balance: {e}")
+            logger.error("Failed to get account balance: %s", e)
             return {}
     
+    async def _read_usdt_balance(self) -> int:
+        """USDT balance, raising when it cannot be read"""
+        # Call the smart contract function to get USDT balance
+        balance = await self._view("pancakeswap_adapter::get_usdt_balance", [self.account.address()])
+        if not balance:
+            raise ValueError("pancakeswap_adapter::get_usdt_balance returned no value")
+        return int(balance[0])
+    
     async def get_usdt_balance(self) -> int:
         """Get USDT balance using proper coin type"""
         try:
-            # Call the smart contract function to get USDT balance
-            balance = await self.client.view(
-                self.config.vault_address,
-                "vault::pancakeswap_adapter::get_usdt_balance",
-                [self.account.address()]
-            )
-            return int(balance[0]) if balance else 0
+            return await self._read_usdt_balance()
         except Exception as e:
-            logger.error(f"Failed to get USDT balance: {e}")
+            logger.error("Failed to get USDT balance: %s", e)
             return 0
     
     async def get_apt_balance(self) -> int:
         """Get APT balance"""
         try:
-            balance = await self.client.view(
-                self.config.vault_address,
-                "vault::pancakeswap_adapter::get_apt_balance",
-                [self.account.address()]
-            )
+            balance = await self._view("pancakeswap_adapter::get_apt_balance", [self.account.address()])
             return int(balance[0]) if balance else 0
         except Exception as e:
-            logger.error(f"Failed to get APT balance: {e}")
+            logger.error("Failed to get APT balance: %s", e)
             return 0
     
     async def check_token_approval(self, token_address: str, spender: str) -> bool:
         """Check if token is approved for spender"""
         try:
-            approval = await self.client.view(
-                self.config.vault_address,
-                "vault::pancakeswap_adapter::check_approval",
-                [self.account.address(), token_address, spender]
+            approval = await self._view(
+                "pancakeswap_adapter::check_approval",
+                [self.account.address(), token_address, spender],
             )
             return bool(approval[0]) if approval else False
         except Exception as e:
-            logger.error(f"Failed to check token approval: {e}")
+            logger.error("Failed to check token approval: %s", e)
             return False
     
     async def approve_token(self, token_address: str, spender: str, amount: int) -> bool:
         """Approve token for spender"""
         try:
-            payload = {
-                "function": f"{self.config.vault_address}::pancakeswap_adapter::approve_token",
-                "type_arguments": [],
-                "arguments": [token_address, spender, str(amount)]
-            }
+            payload = entry_function_payload(
+                f"{self.config.vault_address}::pancakeswap_adapter::approve_token",
+                [],
+                [f"address:{token_address}", f"address:{spender}", f"u64:{amount}"],
+            )
             
-            tx_hash = await self.client.submit_transaction(self.account, TransactionPayload(**payload))
-            await self.client.wait_for_transaction(tx_hash)
+            pending = await self.submitter.submit(payload)
+            tx_hash = pending.tx_hash
+            await pending.confirmation
             
-            logger.info(f"Token approval successful: {tx_hash}")
+            logger.info("Token approval successful: %s", tx_hash)
             return True
         except Exception as e:
-            logger.error(f"Token approval failed: {e}")
+            logger.error("Token approval failed: %s", e)
             return False
     
-    async def validate_swap_parameters(self, apt_amount: int) -> Tuple[bool, str]:
-        """Comprehensive validation of swap parameters"""
+    def cooldown_remaining(self) -> float:
+        """Seconds until the cooldown since the last swap expires"""
+        return max(0.0, self.last_swap_time + self.config.cooldown_period - time.time())
+    
+    def _check_swap_limits(self, apt_amount: int) -> Tuple[bool, str]:
+        """Check amount limits and cooldown, which need no on-chain reads"""
+        if apt_amount < self.config.min_amount:
+            return False, f"Amount too small: {apt_amount} < {self.config.min_amount}"
+        
+        if apt_amount > self.config.max_amount:
+            return False, f"Amount too large: {apt_amount} > {self.config.max_amount}"
+        
+        current_time = int(time.time())
+        if current_time - self.last_swap_time < self.config.cooldown_period:
+            remaining = self.config.cooldown_period - (current_time - self.last_swap_time)
+            return False, f"Cooldown active: {remaining}s remaining"
+        
+        return True, "Limits passed"
+    
+    def _check_validation_result(self, check: str, result: Any, apt_amount: int) -> Optional[str]:
+        """Turn the result of a single validation read into an error message, if any"""
+        if check == "balance" and result < apt_amount:
+            return f"Insufficient APT balance: {result} < {apt_amount}"
+        if check == "approval" and not result:
+            return f"APT not approved for router: {self.config.pancakeswap_router}"
+        if check == "network" and not result:
+            return "Network is unhealthy"
+        if check == "quote" and result[0] is None:
+            return "Failed to get quote"
+        return None
+    
+    async def _fan_out_validation(self, apt_amount: int, with_quote: bool) -> Tuple[bool, str, Dict[str, Any]]:
+        """Issue the independent validation reads concurrently
+        
+        Results are checked as they arrive and the first hard failure
+        cancels the reads still in flight.
+        """
+        checks = {
+            asyncio.ensure_future(self.get_apt_balance()): "balance",
+            asyncio.ensure_future(
+                self.check_token_approval(self.config.apt_address, self.config.pancakeswap_router)
+            ): "approval",
+            asyncio.ensure_future(self.check_network_status()): "network",
+        }
+        if with_quote:
+            checks[asyncio.ensure_future(self.get_swap_quote(apt_amount))] = "quote"
+        
+        results = {}
+        pending = set(checks)
         try:
-            # Check amount limits
-            if apt_amount < self.config.min_amount:
-                return False, f"Amount too small: {apt_amount} < {self.config.min_amount}"
-            
-            if apt_amount > self.config.max_amount:
-                return False, f"Amount too large: {apt_amount} > {self.config.max_amount}"
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    check = checks[task]
+                    results[check] = task.result()
+                    error_msg = self._check_validation_result(check, results[check], apt_amount)
+                    if error_msg:
+                        return False, error_msg, results
+        finally:
+            for task in pending:
+                task.cancel()
+        
+        return True, "Validation passed", results
+    
+    async def validate_swap_parameters(self, apt_amount: int, concurrent: bool = False) -> Tuple[bool, str]:
+        """Comprehensive validation of swap parameters
+        
+        With ``concurrent=True`` the balance, approval and network checks are
+        issued together instead of one after another.
+        """
+        try:
+            is_valid, error_msg = self._check_swap_limits(apt_amount)
+            if not is_valid:
+                return False, error_msg
             
-            # Check cooldown
-            current_time = int(time.time())
-            if current_time - self.last_swap_time < self.config.cooldown_period:
-                remaining = self.config.cooldown_period - (current_time - self.last_swap_time)
-                return False, f"Cooldown active: {remaining}s remaining"
+            if concurrent:
+                is_valid, error_msg, _ = await self._fan_out_validation(apt_amount, with_quote=False)
+                return is_valid, error_msg
             
             # Check APT balance
             apt_balance = await self.get_apt_balance()
-            if apt_balance < apt_amount:
-                return False, f"Insufficient APT balance: {apt_balance} < {apt_amount}"
+            error_msg = self._check_validation_result("balance", apt_balance, apt_amount)
+            if error_msg:
+                return False, error_msg
             
             # Check token approval
-            if not await self.check_token_approval(self.config.apt_address, self.config.pancakeswap_router):
-                return False, f"APT not approved for router: {self.config.pancakeswap_router}"
+            approved = await self.check_token_approval(self.config.apt_address, self.config.pancakeswap_router)
+            error_msg = self._check_validation_result("approval", approved, apt_amount)
+            if error_msg:
+                return False, error_msg
             
             # Check network status
             if not await self.check_network_status():
@@ -183,30 +385,72 @@ class VaultSwapClient:
             
             return True, "Validation passed"
         except Exception as e:
-            logger.error(f"Validation error: {e}")
+            logger.error("Validation error: %s", e)
             return False, f"Validation error: {e}"
     
+    async def validate_and_quote(self, apt_amount: int) -> Tuple[bool, str, Optional[int], float]:
+        """Validate swap parameters and fetch the quote in one concurrent fan-out
+        
+        Validation plus quoting costs a single fullnode round trip instead of four.
+        Returns (is_valid, message, expected_usdt, price_impact).
+        """
+        try:
+            is_valid, error_msg = self._check_swap_limits(apt_amount)
+            if not is_valid:
+                return False, error_msg, None, 0.0
+            
+            is_valid, error_msg, results = await self._fan_out_validation(apt_amount, with_quote=True)
+            if not is_valid:
+                return False, error_msg, None, 0.0
+            
+            expected_usdt, price_impact = results["quote"]
+            return True, error_msg, expected_usdt, price_impact
+        except Exception as e:
+            logger.error("Validation error: %s", e)
+            return False, f"Validation error: {e}", None, 0.0
+    
     async def get_swap_quote(self, apt_amount: int) -> Tuple[Optional[int], float]:
         """Get swap quote with realistic price calculation"""
         try:
-            # Call the smart contract function to get quote
-            quote = await self.client.view(
-                self.config.vault_address,
-                "vault::pancakeswap_adapter::get_quote",
-                [self.config.apt_address, self.config.usdt_address, str(apt_amount)]
-            )
-            
-            expected_usdt = int(quote[0]) if quote else 0
+            if self.config.local_quotes:
+                # pancakeswap_adapter::get_quote is simulate_swap_with_fees over the path
+                path = [self.config.apt_address, self.config.usdt_address]
+                expected_usdt = simulate_swap_with_fees(apt_amount, len(path))
+            else:
+                # Call the smart contract function to get quote
+                quote = await self._view(
+                    "pancakeswap_adapter::get_quote",
+                    [self.config.apt_address, self.config.usdt_address, apt_amount],
+                )
+                
+                expected_usdt = int(quote[0]) if quote else 0
             
-            # Calculate price impact (simplified)
-            price_impact = 0.0  # Would be calculated from actual pool reserves
+            try:
+                price_impact = await self.get_price_impact(apt_amount)
+            except Exception as e:
+                # The router quote above still stands; only the impact is unknown
+                logger.warning("Reserves unavailable, assuming %.2f%% price impact: %s", self.config.fallback_price_impact * 100, e)
+                price_impact = self.config.fallback_price_impact
             
-            logger.info(f"Quote: {apt_amount} APT -> {expected_usdt} USDT (impact: {price_impact:.2%})")
+            logger.info("Quote: %s APT -> %s USDT (impact: %.2f%%)", apt_amount, expected_usdt, price_impact * 100)
             return expected_usdt, price_impact
         except Exception as e:
-            logger.error(f"Failed to get quote: {e}")
+            logger.error("Failed to get quote: %s", e)
             return None, 0.0
     
+    async def get_price_impact(self, apt_amount: int) -> float:
+        """Price impact of swapping apt_amount, from the tracked pool reserves"""
+        if not self.config.track_reserves:
+            return 0.0
+        await self.reserves.ensure_started()
+        return self.reserves.price_impact(apt_amount)
+    
+    async def get_max_swap_amount(self, max_impact: Optional[float] = None) -> int:
+        """Largest APT amount whose price impact stays within max_impact (default: max_slippage)"""
+        await self.reserves.ensure_started()
+        max_impact = self.config.max_slippage if max_impact is None else max_impact
+        return min(self.reserves.max_amount_for_impact(max_impact), self.config.max_amount)
+    
     async def calculate_slippage(self, expected_amount: int, actual_amount: int) -> float:
         """Calculate slippage percentage (corrected)"""
         if expected_amount == 0:
@@ -216,15 +460,21 @@ class VaultSwapClient:
     async def execute_swap_with_fallback(self, apt_amount: int) -> Tuple[bool, str, Dict[str, Any]]:
         """Execute swap with comprehensive fallback strategy"""
         try:
-            # Validate parameters
-            is_valid, error_msg = await self.validate_swap_parameters(apt_amount)
-            if not is_valid:
-                return False, error_msg, {}
-            
-            # Get quote
-            expected_usdt, price_impact = await self.get_swap_quote(apt_amount)
-            if expected_usdt is None:
-                return False, "Failed to get quote", {}
+            if self.config.concurrent_validation:
+                # Validate parameters and get quote in a single round trip
+                is_valid, error_msg, expected_usdt, price_impact = await self.validate_and_quote(apt_amount)
+                if not is_valid:
+                    return False, error_msg, {}
+            else:
+                # Validate parameters
+                is_valid, error_msg = await self.validate_swap_parameters(apt_amount)
+                if not is_valid:
+                    return False, error_msg, {}
+                
+                # Get quote
+                expected_usdt, price_impact = await self.get_swap_quote(apt_amount)
+                if expected_usdt is None:
+                    return False, "Failed to get quote", {}
             
             # Check price impact
             if price_impact > self.config.max_slippage:
@@ -233,7 +483,7 @@ class VaultSwapClient:
             # Calculate minimum output with slippage protection
             min_output = int(expected_usdt * (1 - self.config.max_slippage))
             
-            logger.info(f"Executing swap: {apt_amount} APT -> min {min_output} USDT")
+            logger.info("Executing swap: %s APT -> min %s USDT", apt_amount, min_output)
             
             # Try vault swap first
             success, tx_hash, result = await self._execute_vault_swap(apt_amount, min_output)
@@ -249,31 +499,38 @@ class VaultSwapClient:
             return False, "All swap methods failed", {}
             
         except Exception as e:
-            logger.error(f"Swap execution error: {e}")
+            logger.error("Swap execution error: %s", e)
             return False, f"Swap execution error: {e}", {}
     
+    def _vault_swap_payload(self, apt_amount: int, min_usdt: int) -> TransactionPayload:
+        return entry_function_payload(
+            f"{self.config.vault_address}::pancakeswap_adapter::swap_apt_for_usdt",
+            [],
+            [f"u64:{apt_amount}", f"u64:{min_usdt}"],
+        )
+    
+    async def _record_swap(self, apt_amount: int, txn: Optional[Dict[str, Any]] = None):
+        """Update security state (and the event index) after a confirmed swap"""
+        self.last_swap_time = int(time.time())
+        self.swap_count += 1
+        self.total_volume += apt_amount
+        if self.events is not None and txn:
+            await asyncio.to_thread(self.events.ingest_transaction, txn)
+    
     async def _execute_vault_swap(self, apt_amount: int, min_usdt: int) -> Tuple[bool, Optional[str], Dict[str, Any]]:
         """Execute swap through vault contract with real on-chain calls"""
         try:
-            payload = {
-                "function": f"{self.config.vault_address}::pancakeswap_adapter::swap_apt_for_usdt",
-                "type_arguments": [],
-                "arguments": [str(apt_amount), str(min_usdt)]
-            }
-            
-            tx_hash = await self.client.submit_transaction(self.account, TransactionPayload(**payload))
-            await self.client.wait_for_transaction(tx_hash)
+            pending = await self.submitter.submit(self._vault_swap_payload(apt_amount, min_usdt))
+            tx_hash = pending.tx_hash
+            txn = await pending.confirmation
             
-            # Update security state
-            self.last_swap_time = int(time.time())
-            self.swap_count += 1
-            self.total_volume += apt_amount
+            await self._record_swap(apt_amount, txn)
             
-            logger.info(f"Vault swap successful: {tx_hash}")
+            logger.info("Vault swap successful: %s", tx_hash)
             return True, tx_hash, {"input_amount": apt_amount, "min_output": min_usdt}
             
         except Exception as e:
-            logger.error(f"Vault swap failed: {e}")
+            logger.error("Vault swap failed: %s", e)
             return False, None, {"error": str(e)}
     
     async def _execute_direct_swap(self, apt_amount: int, min_usdt: int) -> Tuple[bool, Optional[str], Dict[str, Any]]:
@@ -282,69 +539,186 @@ class VaultSwapClient:
             # Create swap path
             path = [self.config.apt_address, self.config.usdt_address]
             
-            payload = {
-                "function": f"{self.config.pancakeswap_router}::router::swap_exact_input",
-                "type_arguments": [],
-                "arguments": [
-                    str(apt_amount),
-                    str(min_usdt),
-                    path,
-                    self.account.address(),
-                    str(int(time.time()) + 3600)  # 1 hour deadline
-                ]
-            }
+            payload = entry_function_payload(
+                f"{self.config.pancakeswap_router}::router::swap_exact_input",
+                [],
+                [
+                    f"u64:{apt_amount}",
+                    f"u64:{min_usdt}",
+                    f"vector<address>:[{','.join(path)}]",
+                    f"address:{self.account.address()}",
+                    f"u64:{int(time.time()) + 3600}",  # 1 hour deadline
+                ],
+            )
             
-            tx_hash = await self.client.submit_transaction(self.account, TransactionPayload(**payload))
-            await self.client.wait_for_transaction(tx_hash)
+            pending = await self.submitter.submit(payload)
+            tx_hash = pending.tx_hash
+            txn = await pending.confirmation
             
-            # Update security state
-            self.last_swap_time = int(time.time())
-            self.swap_count += 1
-            self.total_volume += apt_amount
+            await self._record_swap(apt_amount, txn)
             
-            logger.info(f"Direct swap successful: {tx_hash}")
+            logger.info("Direct swap successful: %s", tx_hash)
             return True, tx_hash, {"input_amount": apt_amount, "min_output": min_usdt}
             
         except Exception as e:
-            logger.error(f"Direct swap failed: {e}")
+            logger.error("Direct swap failed: %s", e)
             return False, None, {"error": str(e)}
     
+    async def plan_split(self, apt_amount: int, max_child_impact: Optional[float] = None) -> List[ChildFill]:
+        """
+        Split apt_amount into child swaps whose price impact stays under max_child_impact
+        
+        Children are priced one after another on the tracked reserves, as if
+        each lands before the next, so later children get their own min output.
+        
+        Raises ValueError when staying under max_child_impact would take more
+        than split_max_children children.
+        """
+        max_child_impact = self.config.split_max_child_impact if max_child_impact is None else max_child_impact
+        child_cap = max(await self.get_max_swap_amount(max_child_impact), self.config.min_amount)
+        needed = math.ceil(apt_amount / child_cap)
+        count = min(needed, self.config.split_max_children)
+        
+        base, remainder = divmod(apt_amount, count)
+        reserve_in, reserve_out = self.reserves.reserves
+        after_fee = (BPS - self.reserves.fee_bps) / BPS
+        children = []
+        for i in range(count):
+            child_amount = base + (1 if i < remainder else 0)
+            expected = get_amount_out(child_amount, reserve_in, reserve_out, self.reserves.fee_bps)
+            children.append(ChildFill(
+                apt_amount=child_amount,
+                expected_usdt=expected,
+                min_usdt=int(expected * (1 - self.config.max_slippage)),
+                price_impact=child_amount * after_fee / (reserve_in + child_amount * after_fee),
+            ))
+            reserve_in += child_amount
+            reserve_out -= expected
+        
+        if needed > count:
+            worst = max(child.price_impact for child in children)
+            raise ValueError(
+                f"Split needs {needed} children to stay within {max_child_impact:.2%} impact, "
+                f"split_max_children is {count}; {count} children would move the price "
+                f"by up to {worst:.2%} each"
+            )
+        return children
+    
+    def _check_child(self, child: ChildFill, max_child_impact: float) -> Optional[str]:
+        """Amount limits and impact bound for one child of a split order"""
+        if child.apt_amount < self.config.min_amount:
+            return f"Amount too small: {child.apt_amount} < {self.config.min_amount}"
+        if child.apt_amount > self.config.max_amount:
+            return f"Amount too large: {child.apt_amount} > {self.config.max_amount}"
+        if child.price_impact > max_child_impact:
+            return f"Price impact too high: {child.price_impact:.2%} > {max_child_impact:.2%}"
+        return None
+    
+    async def execute_split_swap(
+        self,
+        apt_amount: int,
+        max_child_impact: Optional[float] = None,
+        interval: Optional[float] = None,
+    ) -> FillReport:
+        """
+        Execute a large swap as pipelined child swaps through the vault
+        
+        Children are submitted back to back with consecutive sequence numbers
+        (optionally ``interval`` seconds apart) and confirmed together. The
+        report compares the achieved average price, measured from the USDT
+        balance change, with the single-shot quote at the starting reserves.
+        The balance reads raise rather than read as 0, so a failed read never
+        shows up as a bad (or impossibly good) fill.
+        
+        Against a pool nobody else touches, splitting saves nothing; the gain
+        comes from arbitrage restoring the price between children, which is
+        what ``interval`` leaves room for.
+        """
+        interval = self.config.split_interval if interval is None else interval
+        max_child_impact = self.config.split_max_child_impact if max_child_impact is None else max_child_impact
+        
+        # Split orders can exceed max_amount in total; the children are checked against it below
+        is_valid, error_msg = await self.validate_swap_parameters(min(apt_amount, self.config.max_amount))
+        if not is_valid:
+            raise ValueError(error_msg)
+        error_msg = self._check_validation_result("balance", await self.get_apt_balance(), apt_amount)
+        if error_msg:
+            raise ValueError(error_msg)
+        
+        await self.reserves.refresh()
+        children = await self.plan_split(apt_amount, max_child_impact)
+        for i, child in enumerate(children):
+            error_msg = self._check_child(child, max_child_impact)
+            if error_msg:
+                raise ValueError(f"Child swap {i}: {error_msg}")
+        report = FillReport(apt_amount=apt_amount, single_shot_usdt=self.reserves.quote(apt_amount), children=children)
+        logger.info("Split swap: %s APT in %s children (single-shot quote %s USDT)", apt_amount, len(children), report.single_shot_usdt)
+        
+        usdt_before = await self._read_usdt_balance()
+        
+        pending = []
+        for i, child in enumerate(children):
+            if i and interval > 0:
+                await asyncio.sleep(interval)
+            try:
+                submitted = await self.submitter.submit(self._vault_swap_payload(child.apt_amount, child.min_usdt))
+            except Exception as e:
+                child.status, child.error = "failed", str(e)
+                logger.error("Child swap %s submission failed: %s", i, e)
+                break
+            child.tx_hash = submitted.tx_hash
+            pending.append((child, submitted))
+        
+        results = await asyncio.gather(*(submitted.confirmation for _, submitted in pending), return_exceptions=True)
+        for (child, _), result in zip(pending, results):
+            if isinstance(result, Exception):
+                child.status, child.error = "failed", str(result)
+                logger.error("Child swap %s failed: %s", child.tx_hash, result)
+            else:
+                child.status = "success"
+                report.filled_apt += child.apt_amount
+                await self._record_swap(child.apt_amount, result)
+        
+        attempts = max(1, self.config.max_retries)
+        for attempt in range(attempts):
+            try:
+                report.received_usdt = await self._read_usdt_balance() - usdt_before
+                break
+            except Exception as e:
+                if attempt == attempts - 1:
+                    raise RuntimeError(
+                        f"Split swap filled {report.filled_apt} APT but the USDT received could not be read: {e}"
+                    ) from e
+                logger.warning("USDT balance read after split swap failed, retrying: %s", e)
+                await asyncio.sleep(self.config.retry_delay)
+        logger.info(
+            "Split swap filled %s/%s APT for %s USDT (%+.1f bps vs single shot)",
+            report.filled_apt, apt_amount, report.received_usdt, report.improvement_bps,
+        )
+        return report
+    
     async def get_swap_events(self) -> List[Dict[str, Any]]:
         """Get swap events for the user"""
+        if self.events is not None:
+            return self.events.query(kind="swap", user=str(self.account.address()))
         try:
-            events = await self.client.view(
-                self.config.vault_address,
-                "vault::pancakeswap_adapter::get_swap_events",
-                [self.account.address()]
-            )
+            events = await self._view("pancakeswap_adapter::get_swap_events", [self.account.address()])
             return events if events else []
         except Exception as e:
-            logger.error(f"Failed to get swap events: {e}")
+            logger.error("Failed to get swap events: %s", e)
             return []
     
     async def get_vault_status(self) -> Dict[str, Any]:
         """Get comprehensive vault status"""
         try:
             # Get vault info
-            vault_info = await self.client.view(
-                self.config.vault_address,
-                "vault::vault::get_vault_status",
-                []
-            )
+            vault_info = await self._view("vault::get_vault_status", [])
             
             # Get integration status
-            integration_info = await self.client.view(
-                self.config.vault_address,
-                "vault::vault_integration::get_integration_status",
-                [self.config.vault_address]
-            )
+            integration_info = await self._view("vault_integration::get_integration_status", [self.config.vault_address])
             
             # Get router stats
-            router_stats = await self.client.view(
-                self.config.vault_address,
-                "vault::pancakeswap_adapter::get_router_stats",
-                [self.account.address()]
-            )
+            router_stats = await self._view("pancakeswap_adapter::get_router_stats", [self.account.address()])
             
             return {
                 "vault_info": vault_info,
@@ -357,45 +731,46 @@ class VaultSwapClient:
                 }
             }
         except Exception as e:
-            logger.error(f"Failed to get vault status: {e}")
+            logger.error("Failed to get vault status: %s", e)
             return {}
     
     async def monitor_swap(self, tx_hash: str, timeout: int = 300) -> Dict[str, Any]:
         """Monitor swap transaction with detailed status"""
         try:
-            start_time = time.time()
-            while time.time() - start_time < timeout:
-                try:
-                    tx_info = await self.client.transaction_by_hash(tx_hash)
-                    
-                    if tx_info["success"]:
-                        logger.info(f"Transaction successful: {tx_hash}")
-                        return {
-                            "status": "success",
-                            "tx_hash": tx_hash,
-                            "gas_used": tx_info.get("gas_used", 0),
-                            "timestamp": tx_info.get("timestamp", 0)
-                        }
-                    else:
-                        logger.error(f"Transaction failed: {tx_hash}")
-                        return {
-                            "status": "failed",
-                            "tx_hash": tx_hash,
-                            "error": tx_info.get("vm_status", "Unknown error")
-                        }
-                        
-                except Exception as e:
-                    logger.debug(f"Transaction not yet confirmed: {e}")
-                    await asyncio.sleep(2)
-            
+            tx_info = await self.confirmations.wait(tx_hash, timeout=timeout)
+            logger.info("Transaction successful: %s", tx_hash)
+            return {
+                "status": "success",
+                "tx_hash": tx_hash,
+                "gas_used": tx_info.get("gas_used", 0),
+                "timestamp": tx_info.get("timestamp", 0)
+            }
+        except TransactionFailed as e:
+            logger.error("Transaction failed: %s", tx_hash)
+            return {
+                "status": "failed",
+                "tx_hash": tx_hash,
+                "error": e.vm_status
+            }
+        except asyncio.TimeoutError:
             return {"status": "timeout", "tx_hash": tx_hash}
-            
         except Exception as e:
-            logger.error(f"Monitor error: {e}")
+            logger.error("Monitor error: %s", e)
             return {"status": "error", "error": str(e)}
+    
+    async def close(self):
+        """Stop background tracking and release the HTTP session"""
+        if self._owns_reserves:
+            await self.reserves.stop()
+        if self._owns_confirmations:
+            await self.confirmations.close()
+        if self._owns_client:
+            await self.client.close()
 
 async def main():
     """Main function with comprehensive error handling and logging"""
+    configure_logging(json_lines=os.environ.get("VAULT_SWAP_LOG_FORMAT") == "json")
+    
     # Configuration
     PRIVATE_KEY = "your_private_key_here"  # Replace with actual private key
     APT_AMOUNT = 100000  # 0.1 APT
@@ -406,45 +781,45 @@ async def main():
     
     try:
         logger.info("=== Dexonic Asset Vault Swap Client ===")
-        logger.info(f"Target amount: {APT_AMOUNT} APT")
+        logger.info("Target amount: %s APT", APT_AMOUNT)
         
         # Check initial balances
         apt_balance = await client.get_apt_balance()
         usdt_balance = await client.get_usdt_balance()
-        logger.info(f"Initial balances: APT={apt_balance}, USDT={usdt_balance}")
+        logger.info("Initial balances: APT=%s, USDT=%s", apt_balance, usdt_balance)
         
         # Check token approval
         apt_approved = await client.check_token_approval(client.config.apt_address, client.config.pancakeswap_router)
-        logger.info(f"APT approved for router: {apt_approved}")
+        logger.info("APT approved for router: %s", apt_approved)
         
         # Get vault status
         vault_status = await client.get_vault_status()
-        logger.info(f"Vault status: {vault_status}")
+        logger.info("Vault status: %s", vault_status)
         
         # Execute swap with retries
         for attempt in range(config.max_retries):
-            logger.info(f"Swap attempt {attempt + 1}/{config.max_retries}")
+            logger.info("Swap attempt %s/%s", attempt + 1, config.max_retries)
             
             success, message, result = await client.execute_swap_with_fallback(APT_AMOUNT)
             
             if success:
-                logger.info(f"Swap successful: {message}")
-                logger.info(f"Result: {result}")
+                logger.info("Swap successful: %s", message)
+                logger.info("Result: %s", result)
                 
                 # Monitor transaction
                 if "tx_hash" in result:
                     monitor_result = await client.monitor_swap(result["tx_hash"])
-                    logger.info(f"Transaction monitoring: {monitor_result}")
+                    logger.info("Transaction monitoring: %s", monitor_result)
                 
                 # Get swap events
                 events = await client.get_swap_events()
-                logger.info(f"Swap events: {events}")
+                logger.info("Swap events: %s", events)
                 
                 break
             else:
-                logger.warning(f"Swap failed (attempt {attempt + 1}): {message}")
+                logger.warning("Swap failed (attempt %s): %s", attempt + 1, message)
                 if attempt < config.max_retries - 1:
-                    logger.info(f"Retrying in {config.retry_delay} seconds...")
+                    logger.info("Retrying in %s seconds...", config.retry_delay)
                     await asyncio.sleep(config.retry_delay)
                 else:
                     logger.error("All swap attempts failed")
@@ -452,11 +827,14 @@ async def main():
         # Final balance check
         final_apt_balance = await client.get_apt_balance()
         final_usdt_balance = await client.get_usdt_balance()
-        logger.info(f"Final balances: APT={final_apt_balance}, USDT={final_usdt_balance}")
+        logger.info("Final balances: APT=%s, USDT=%s", final_apt_balance, final_usdt_balance)
+        logger.info("Call latency: %s", client.metrics.snapshot())
         
     except Exception as e:
-        logger.error(f"Main execution error: {e}")
+        logger.error("Main execution error: %s", e)
         raise
+    finally:
+        await client.close()
 
 if __name__ == "__main__":
     asyncio.run(main()) 
\ No newline at end of file
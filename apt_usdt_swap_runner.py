@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Multi-Account Swap Runner for Dexonic Asset Vault
+Runs APT to USDT swaps for many sub-accounts from one process, over one
+shared HTTP connection pool, confirmation tracker and pool reserve tracker
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Sequence
+
+from aptos_sdk.async_client import RestClient
+
+from apt_usdt_swap_improved import SwapConfig, VaultSwapClient, configure_logging
+from api.confirmation_tracker import ConfirmationTracker
+from api.metrics import Metrics, instrument
+from api.pool_reserves import PoolReserveTracker
+from api.sdk_backend import rest_api_url
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class SwapJob:
+    """One swap for one sub-account"""
+    account: str  # account address
+    apt_amount: int
+
+@dataclass
+class SwapOutcome:
+    job: SwapJob
+    success: bool
+    message: str
+    result: Dict[str, Any] = field(default_factory=dict)
+    started_at: float = 0.0
+    finished_at: float = 0.0
+
+@dataclass
+class RunReport:
+    """Aggregate throughput over a run"""
+    outcomes: List[SwapOutcome] = field(default_factory=list)
+    started_at: float = 0.0
+    finished_at: float = 0.0
+
+    @property
+    def elapsed(self) -> float:
+        return self.finished_at - self.started_at
+
+    @property
+    def succeeded(self) -> int:
+        return sum(1 for outcome in self.outcomes if outcome.success)
+
+    @property
+    def failed(self) -> int:
+        return len(self.outcomes) - self.succeeded
+
+    @property
+    def volume(self) -> int:
+        return sum(outcome.job.apt_amount for outcome in self.outcomes if outcome.success)
+
+    def summary(self) -> Dict[str, Any]:
+        elapsed = self.elapsed or 1e-9
+        return {
+            "swaps": len(self.outcomes),
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "accounts": len({outcome.job.account for outcome in self.outcomes}),
+            "apt_volume": self.volume,
+            "elapsed_seconds": round(self.elapsed, 3),
+            "swaps_per_second": self.succeeded / elapsed,
+            "apt_per_second": self.volume / elapsed,
+        }
+
+class SwapRunner:
+    """
+    Schedules swaps across a pool of sub-accounts concurrently
+
+    Each account runs its own jobs in order and waits out its own cooldown;
+    accounts run in parallel, up to max_concurrent_swaps at once. All
+    VaultSwapClients share one RestClient, so the whole fleet uses a single
+    connection pool and reports into one Metrics registry.
+    """
+
+    def __init__(self, private_keys: Sequence[str], config: SwapConfig = None, max_concurrent_swaps: int = 16):
+        self.config = config or SwapConfig()
+        self.metrics = Metrics()
+        self.client = instrument(RestClient(rest_api_url(self.config.node_url)), self.metrics)
+        self.confirmations = ConfirmationTracker(
+            self.client,
+            initial_interval=self.config.confirmation_initial_interval,
+            max_interval=self.config.confirmation_max_interval,
+            timeout=self.config.confirmation_timeout,
+        )
+        self.reserves = PoolReserveTracker(
+            self.client,
+            self.config.pancakeswap_router,
+            self.config.apt_coin_type,
+            self.config.usdt_coin_type,
+            poll_interval=self.config.reserve_poll_interval,
+        )
+
+        self.accounts: Dict[str, VaultSwapClient] = {}
+        for private_key in private_keys:
+            swap_client = VaultSwapClient(
+                private_key,
+                self.config,
+                client=self.client,
+                confirmations=self.confirmations,
+                reserves=self.reserves,
+                metrics=self.metrics,
+            )
+            self.accounts[str(swap_client.account.address())] = swap_client
+
+        self._slots = asyncio.Semaphore(max_concurrent_swaps)
+        logger.info("Initialized SwapRunner with %s accounts", len(self.accounts))
+
+    def round_robin(self, apt_amount: int, count: int) -> List[SwapJob]:
+        """count equal swaps spread evenly over the accounts"""
+        addresses = list(self.accounts)
+        return [SwapJob(addresses[i % len(addresses)], apt_amount) for i in range(count)]
+
+    async def _run_job(self, swap_client: VaultSwapClient, job: SwapJob) -> SwapOutcome:
+        outcome = SwapOutcome(job=job, success=False, message="")
+        for attempt in range(self.config.max_retries):
+            cooldown = swap_client.cooldown_remaining()
+            if cooldown > 0:
+                await asyncio.sleep(cooldown)
+
+            async with self._slots:
+                outcome.started_at = outcome.started_at or time.time()
+                success, message, result = await swap_client.execute_swap_with_fallback(job.apt_amount)
+            outcome.success, outcome.message, outcome.result = success, message, result
+            if success:
+                break
+            logger.warning("Swap for %s failed (attempt %s): %s", job.account, attempt + 1, message)
+            if attempt < self.config.max_retries - 1:
+                await asyncio.sleep(self.config.retry_delay)
+        outcome.finished_at = time.time()
+        return outcome
+
+    async def _run_account(self, address: str, jobs: List[SwapJob]) -> List[SwapOutcome]:
+        swap_client = self.accounts[address]
+        return [await self._run_job(swap_client, job) for job in jobs]
+
+    async def run(self, jobs: Sequence[SwapJob]) -> RunReport:
+        """Execute jobs, sequentially per account and concurrently across accounts"""
+        by_account: Dict[str, List[SwapJob]] = defaultdict(list)
+        for job in jobs:
+            if job.account not in self.accounts:
+                raise ValueError(f"Unknown account: {job.account}")
+            by_account[job.account].append(job)
+
+        report = RunReport(started_at=time.time())
+        results = await asyncio.gather(
+            *(self._run_account(address, account_jobs) for address, account_jobs in by_account.items())
+        )
+        report.finished_at = time.time()
+        report.outcomes = [outcome for account_outcomes in results for outcome in account_outcomes]
+
+        logger.info("Run summary: %s", report.summary())
+        return report
+
+    async def close(self):
+        """Stop the shared trackers and release the shared HTTP session"""
+        await self.reserves.stop()
+        await self.confirmations.close()
+        await self.client.close()
+
+async def main():
+    """Run one small swap per sub-account"""
+    configure_logging(json_lines=os.environ.get("VAULT_SWAP_LOG_FORMAT") == "json")
+    
+    PRIVATE_KEYS = ["your_private_key_here"]  # Replace with actual sub-account private keys
+    APT_AMOUNT = 100000  # 0.1 APT
+
+    runner = SwapRunner(PRIVATE_KEYS)
+    try:
+        report = await runner.run(runner.round_robin(APT_AMOUNT, len(PRIVATE_KEYS)))
+        for outcome in report.outcomes:
+            logger.info("%s: %s", outcome.job.account, outcome.message)
+        logger.info("Call latency: %s", runner.metrics.snapshot())
+    finally:
+        await runner.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -4,13 +4,17 @@ Aptos Vault API Layer
 
 Chuẩn hóa API endpoints để kết nối Aptos vault với UI và Trading Bot hiện tại.
 Tương thích với cấu trúc dự án EVM hiện tại.
+
+Legacy: this layer is written against the synchronous ``aptos_sdk.client``,
+which aptos-sdk 0.11 no longer ships. It is kept for the existing scripts;
+new code and new features go into ``AsyncAptosVaultAPI``
+(``AptosVaultConfig.get_async_api()``).
 """
 
 import os
 import json
 import logging
 from typing import Dict, List, Optional, Tuple, Any
-from dataclasses import dataclass
 from decimal import Decimal
 
 from aptos_sdk.client import RestClient
@@ -18,41 +22,12 @@ from aptos_sdk.account import Account
 from aptos_sdk.transactions import TransactionArgument, TransactionPayload
 from aptos_sdk.type_tag import TypeTag, StructTag
 
-logger = logging.getLogger(__name__)
-
-
-@dataclass
-class VaultInfo:
-    """Thông tin vault tương thích với EVM version"""
-    vault_id: int
-    total_shares: int
-    total_assets: int
-    denomination_asset: str
-    fund_manager: str
-    fee_rate: int
-    is_active: bool
-    vault_address: str
-
+from api.creation_resolver import CreationResolver
+from api.metrics import Metrics, instrument
+from api.models import VaultInfo, UserPosition, convert_to_assets
+from api.view_cache import ViewCache
 
-@dataclass
-class UserPosition:
-    """Thông tin position của user"""
-    user_address: str
-    vault_id: int
-    shares: int
-    assets: int
-    share_price: Decimal
-
-
-@dataclass
-class TradeInfo:
-    """Thông tin trade"""
-    token_in: str
-    token_out: str
-    amount_in: int
-    amount_out: int
-    path: List[str]
-    timestamp: int
+logger = logging.getLogger(__name__)
 
 
 class AptosVaultAPI:
@@ -61,28 +36,54 @@ class AptosVaultAPI:
     Tương thích với cấu trúc dự án EVM hiện tại
     """
     
-    def __init__(self, node_url: str = "https://fullnode.mainnet.aptoslabs.com"):
-        self.client = RestClient(node_url)
+    def __init__(
+        self,
+        node_url: str = "https://fullnode.mainnet.aptoslabs.com",
+        cache: Optional[ViewCache] = None,
+        metrics: Optional[Metrics] = None,
+    ):
+        self.client = instrument(RestClient(node_url), metrics)
+        self.metrics = self.client.metrics
         self.module_address = None
         self.vault_registry_address = None
+        self.cache = cache or ViewCache()
+        # Creation snapshots are served no longer than a cached view would be
+        self.creations = CreationResolver(max_age=self.cache.ttl)
         
     def set_module_address(self, address: str):
         """Set module address sau khi deploy"""
         self.module_address = address
         self.vault_registry_address = address
+        self.cache.invalidate()
+        
+    def _view(self, module: str, function: str, args: list):
+        """Gọi view function qua cache"""
+        result = self.cache.get(module, function, [self.module_address, args])
+        if result is ViewCache.MISSING:
+            result = self.client.view(self.module_address, module, function, args)
+            self.cache.put(module, function, [self.module_address, args], result)
+        return result
+        
+    def _wait_for_transaction(self, tx_hash: str):
+        """Chờ transaction confirm rồi invalidate cached vault state"""
+        self.client.wait_for_transaction(tx_hash)
+        self.cache.invalidate()
+        self.creations.supersede()
         
     def get_vault_info(self, vault_id: int) -> VaultInfo:
         """
         Lấy thông tin vault (tương thích với EVM version)
         """
         try:
-            # Gọi view function từ vault_core
-            result = self.client.view(
-                self.module_address,
-                "vault_core",
-                "get_vault_info",
-                [vault_id]
-            )
+            # Vault vừa tạo: dùng snapshot từ transaction tạo, không cần gọi view
+            result = self.creations.snapshot("vault", vault_id)
+            if result is None:
+                # Gọi view function từ vault_core
+                result = self._view(
+                    "vault_core",
+                    "get_vault_info",
+                    [vault_id]
+                )
             
             # Parse result
             total_shares, total_assets, vault_id, denomination_asset, fund_manager, fee_rate, is_active = result
@@ -114,29 +115,21 @@ class AptosVaultAPI:
                 [user_address, vault_id]
             )
             
-            # Tính assets từ shares
-            assets = self.client.view(
-                self.module_address,
-                "vault_core",
-                "convert_to_assets", 
-                [vault_id, shares]
-            )
-            
             # Tính share price
-            total_shares = self.client.view(
-                self.module_address,
+            total_shares = self._view(
                 "vault_core",
                 "total_shares",
                 [vault_id]
             )
             
-            total_assets = self.client.view(
-                self.module_address,
-                "vault_core", 
+            total_assets = self._view(
+                "vault_core",
                 "total_assets",
                 [vault_id]
             )
             
+            # Tính assets từ shares locally, same rounding as convert_to_assets
+            assets = convert_to_assets(shares, total_shares, total_assets)
             share_price = Decimal(total_assets) / Decimal(total_shares) if total_shares > 0 else Decimal(0)
             
             return UserPosition(
@@ -167,7 +160,7 @@ class AptosVaultAPI:
             
             # Submit transaction
             tx_hash = self.client.submit_transaction(user_account, payload)
-            self.client.wait_for_transaction(tx_hash)
+            self._wait_for_transaction(tx_hash)
             
             logger.info(f"Deposit successful: {tx_hash}")
             return tx_hash
@@ -193,7 +186,7 @@ class AptosVaultAPI:
             
             # Submit transaction
             tx_hash = self.client.submit_transaction(user_account, payload)
-            self.client.wait_for_transaction(tx_hash)
+            self._wait_for_transaction(tx_hash)
             
             logger.info(f"Withdraw successful: {tx_hash}")
             return tx_hash
@@ -208,8 +201,7 @@ class AptosVaultAPI:
         """
         try:
             # Lấy USDT address
-            usdt_address = self.client.view(
-                self.module_address,
+            usdt_address = self._view(
                 "vault_core",
                 "get_usdt_address",
                 []
@@ -228,17 +220,10 @@ class AptosVaultAPI:
             
             # Submit transaction
             tx_hash = self.client.submit_transaction(vault_manager, payload)
-            self.client.wait_for_transaction(tx_hash)
-            
-            # Lấy vault ID mới
-            registry = self.client.view(
-                self.module_address,
-                "vault_core",
-                "get_vault_info",
-                [0]  # Vault đầu tiên
-            )
+            self._wait_for_transaction(tx_hash)
             
-            vault_id = registry[2]  # vault_id là index 2
+            # Lấy vault ID mới từ chính transaction vừa confirm
+            vault_id = self._record_creation(self.client.get_transaction(tx_hash), "vault")
             
             logger.info(f"Vault created successfully: {vault_id}")
             return vault_id
@@ -264,7 +249,7 @@ class AptosVaultAPI:
             
             # Submit transaction
             tx_hash = self.client.submit_transaction(fund_manager, payload)
-            self.client.wait_for_transaction(tx_hash)
+            self._wait_for_transaction(tx_hash)
             
             logger.info(f"Rebalance successful: {tx_hash}")
             return tx_hash
@@ -282,8 +267,7 @@ class AptosVaultAPI:
             path = [token_in, token_out]
             
             # Tạo router
-            router_address = self.client.view(
-                self.module_address,
+            router_address = self._view(
                 "pancakeswap_adapter",
                 "get_pancakeswap_router_address",
                 []
@@ -323,7 +307,7 @@ class AptosVaultAPI:
             
             # Submit transaction
             tx_hash = self.client.submit_transaction(user_account, payload)
-            self.client.wait_for_transaction(tx_hash)
+            self._wait_for_transaction(tx_hash)
             
             logger.info(f"Vault swap successful: {tx_hash}")
             return tx_hash
@@ -347,7 +331,7 @@ class AptosVaultAPI:
             )
             
             txn_hash = self.client.submit_transaction(vault_owner, payload)
-            self.client.wait_for_transaction(txn_hash)
+            self._wait_for_transaction(txn_hash)
             
             # Get comptroller ID from events
             comptroller_id = self._get_comptroller_id_from_events(txn_hash)
@@ -370,7 +354,7 @@ class AptosVaultAPI:
             )
             
             txn_hash = self.client.submit_transaction(fund_manager, payload)
-            self.client.wait_for_transaction(txn_hash)
+            self._wait_for_transaction(txn_hash)
             return True
             
         except Exception as e:
@@ -390,7 +374,7 @@ class AptosVaultAPI:
             )
             
             txn_hash = self.client.submit_transaction(fund_manager, payload)
-            self.client.wait_for_transaction(txn_hash)
+            self._wait_for_transaction(txn_hash)
             return True
             
         except Exception as e:
@@ -411,7 +395,7 @@ class AptosVaultAPI:
             )
             
             txn_hash = self.client.submit_transaction(user, payload)
-            self.client.wait_for_transaction(txn_hash)
+            self._wait_for_transaction(txn_hash)
             return True
             
         except Exception as e:
@@ -432,7 +416,7 @@ class AptosVaultAPI:
             )
             
             txn_hash = self.client.submit_transaction(user, payload)
-            self.client.wait_for_transaction(txn_hash)
+            self._wait_for_transaction(txn_hash)
             return True
             
         except Exception as e:
@@ -442,12 +426,13 @@ class AptosVaultAPI:
     def get_comptroller_info(self, comptroller_id: int) -> dict:
         """Get comptroller information"""
         try:
-            result = self.client.view(
-                self.module_address,
-                "vault_comptroller",
-                "get_comptroller_info",
-                [str(comptroller_id)]
-            )
+            result = self.creations.snapshot("comptroller", comptroller_id)
+            if result is None:
+                result = self._view(
+                    "vault_comptroller",
+                    "get_comptroller_info",
+                    [str(comptroller_id)]
+                )
             
             return {
                 "id": result[0],
@@ -465,14 +450,11 @@ class AptosVaultAPI:
     
     def _get_comptroller_id_from_events(self, txn_hash: str) -> int:
         """Extract comptroller ID from transaction events"""
-        try:
-            txn = self.client.get_transaction(txn_hash)
-            # Parse events to find comptroller creation
-            # This is a simplified implementation
-            return 0  # Default to first comptroller
-        except Exception as e:
-            logger.error(f"Error parsing comptroller events: {e}")
-            return 0
+        return self._record_creation(self.client.get_transaction(txn_hash), "comptroller")
+    
+    def _record_creation(self, txn: dict, kind: str) -> int:
+        """Lấy ID từ transaction; view info tương ứng được trả lời từ snapshot"""
+        return self.creations.resolve(txn, kind)
 
 
 # ===== COMPATIBILITY LAYER =====
@@ -495,8 +477,7 @@ class AptosVaultCompatibility:
         
     def get_usdt_address(self) -> str:
         """Tương thích với EVM USDC address"""
-        return self.api.client.view(
-            self.api.module_address,
+        return self.api._view(
             "vault_core",
             "get_usdt_address",
             []
@@ -532,6 +513,15 @@ class AptosVaultConfig:
             api.set_module_address(self.module_address)
         return api
         
+    def get_async_api(self, pool_config=None):
+        """Tạo async API instance trên shared connection pool"""
+        from api.async_aptos_vault_api import AsyncAptosVaultAPI
+        
+        api = AsyncAptosVaultAPI(self.node_url, pool_config=pool_config)
+        if self.module_address:
+            api.set_module_address(self.module_address)
+        return api
+        
     def get_account(self) -> Account:
         """Tạo account từ private key"""
         if not self.private_key:
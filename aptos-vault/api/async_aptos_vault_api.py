@@ -0,0 +1,670 @@
+"""
+Async Aptos Vault API Layer
+===========================
+
+Async counterpart of ``AptosVaultAPI`` with the same methods and dataclasses.
+
+Every instance pointed at the same fullnode shares one keep-alive HTTP
+connection pool, so hundreds of concurrent view calls reuse warm TCP/TLS
+connections. Writes go through a ``TransactionSubmitter`` per signing account,
+so one account can keep many transactions in flight.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+import httpx
+from aptos_sdk.account import Account
+from aptos_sdk.account_address import AccountAddress
+from aptos_sdk.async_client import ClientConfig, RestClient
+from aptos_sdk.bcs import Serializer
+from aptos_sdk.transactions import EntryFunction, TransactionArgument, TransactionPayload
+
+from api.models import VaultInfo, UserBalanceInfo, UserPosition, convert_to_assets
+from api.confirmation_tracker import ConfirmationTracker
+from api.creation_resolver import CreationResolver
+from api.event_store import EventStore
+from api.metrics import Metrics, instrument
+from api.quote_service import QuoteService
+from api.sdk_backend import entry_function_payload, rest_api_url
+from api.transaction_submitter import TransactionSubmitter
+from api.view_cache import ViewCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_NODE_URL = "https://fullnode.mainnet.aptoslabs.com/v1"
+
+
+@dataclass(frozen=True)
+class PoolConfig:
+    """HTTP connection pool limits and per-request timeouts"""
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    request_timeout: float = 10.0
+    connect_timeout: float = 5.0
+    http2: bool = False
+
+
+_shared_clients: Dict[Tuple[str, PoolConfig], RestClient] = {}
+
+
+def get_shared_client(node_url: str = DEFAULT_NODE_URL, pool_config: Optional[PoolConfig] = None) -> RestClient:
+    """
+    Return the process-wide RestClient for a fullnode and pool configuration
+
+    The underlying httpx pool is bound to the event loop that first uses it,
+    so share clients within one loop.
+    """
+    pool_config = pool_config or PoolConfig()
+    node_url = rest_api_url(node_url)
+    key = (node_url, pool_config)
+    client = _shared_clients.get(key)
+    if client is None:
+        client = RestClient(node_url, ClientConfig(http2=pool_config.http2))
+        # Replace the SDK default pool with our limits and timeouts, keeping its headers
+        client.client = httpx.AsyncClient(
+            http2=pool_config.http2,
+            headers=client.client.headers,
+            limits=httpx.Limits(
+                max_connections=pool_config.max_connections,
+                max_keepalive_connections=pool_config.max_keepalive_connections,
+                keepalive_expiry=pool_config.keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(pool_config.request_timeout, connect=pool_config.connect_timeout),
+        )
+        _shared_clients[key] = client
+    return client
+
+
+async def close_shared_clients():
+    """Close every shared connection pool, e.g. on server shutdown"""
+    clients = list(_shared_clients.values())
+    _shared_clients.clear()
+    for client in clients:
+        await client.close()
+
+
+def _encode_view_argument(value: Any) -> Any:
+    """Encode a Python value as a JSON view function argument"""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, (list, tuple)):
+        return [_encode_view_argument(v) for v in value]
+    return str(value)
+
+
+_ADDRESSES = Serializer.sequence_serializer(Serializer.struct)
+_U64S = Serializer.sequence_serializer(Serializer.u64)
+
+
+def _address(value: Any) -> AccountAddress:
+    return AccountAddress.from_str_relaxed(str(value))
+
+
+def _trade_arguments(trade: Dict[str, Any]) -> List[TransactionArgument]:
+    """BCS arguments token_in, token_out, amount_in, amount_out (the minimum) and path of one trade"""
+    return [
+        TransactionArgument(_address(trade["token_in"]), Serializer.struct),
+        TransactionArgument(_address(trade["token_out"]), Serializer.struct),
+        TransactionArgument(int(trade["amount_in"]), Serializer.u64),
+        TransactionArgument(int(trade.get("amount_out", 0)), Serializer.u64),
+        TransactionArgument([_address(hop) for hop in trade.get("path", [])], _ADDRESSES),
+    ]
+
+
+def _trades_arguments(trades: List[Dict[str, Any]]) -> List[TransactionArgument]:
+    """The same fields for many trades, as parallel vectors; entry functions cannot take structs"""
+    return [
+        TransactionArgument([_address(trade["token_in"]) for trade in trades], _ADDRESSES),
+        TransactionArgument([_address(trade["token_out"]) for trade in trades], _ADDRESSES),
+        TransactionArgument([int(trade["amount_in"]) for trade in trades], _U64S),
+        TransactionArgument([int(trade.get("amount_out", 0)) for trade in trades], _U64S),
+        TransactionArgument(
+            [[_address(hop) for hop in trade.get("path", [])] for trade in trades],
+            Serializer.sequence_serializer(_ADDRESSES),
+        ),
+    ]
+
+
+class AsyncAptosVaultAPI:
+    """
+    Async API Layer cho Aptos Vault
+    Same methods as AptosVaultAPI, awaitable and backed by a shared pool
+    """
+
+    def __init__(
+        self,
+        node_url: str = DEFAULT_NODE_URL,
+        pool_config: Optional[PoolConfig] = None,
+        client: Optional[RestClient] = None,
+        cache: Optional[ViewCache] = None,
+        metrics: Optional[Metrics] = None,
+        event_store: Optional[EventStore] = None,
+    ):
+        self.client = instrument(client or get_shared_client(node_url, pool_config), metrics)
+        self.metrics = self.client.metrics
+        self.events = event_store
+        self.module_address = None
+        self.vault_registry_address = None
+        self.cache = cache or ViewCache()
+        # Creation snapshots are served no longer than a cached view would be
+        self.creations = CreationResolver(max_age=self.cache.ttl)
+        self.quotes = QuoteService(self)
+        self.confirmations = ConfirmationTracker(self.client)
+        self._submitters: Dict[str, TransactionSubmitter] = {}
+        self._ingests: Set[asyncio.Task] = set()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        """Stop background confirmation; the shared pool stays open"""
+        await self.confirmations.close()
+        if self._ingests:
+            await asyncio.gather(*self._ingests, return_exceptions=True)
+
+    def set_module_address(self, address: str):
+        """Set module address sau khi deploy"""
+        self.module_address = address
+        self.vault_registry_address = address
+        self.cache.invalidate()
+
+    async def _view(
+        self, module: str, function: str, args: List[Any], ledger_version: Optional[int] = None, cached: bool = True
+    ) -> List[Any]:
+        """Call a view function through the cache and decode its JSON result"""
+        cache_args = [self.module_address, args]
+        if cached:
+            result = self.cache.get(module, function, cache_args, ledger_version)
+            if result is not ViewCache.MISSING:
+                return result
+
+        result = await self.client.view(
+            f"{self.module_address}::{module}::{function}",
+            [],
+            [_encode_view_argument(a) for a in args],
+            ledger_version,
+        )
+        if isinstance(result, (bytes, str)):
+            result = json.loads(result)
+        if cached:
+            self.cache.put(module, function, cache_args, result, ledger_version)
+        return result
+
+    def _submitter_for(self, account: Account) -> TransactionSubmitter:
+        address = str(account.address())
+        submitter = self._submitters.get(address)
+        if submitter is None:
+            submitter = TransactionSubmitter(self.client, account, self.confirmations, metrics=self.metrics)
+            self._submitters[address] = submitter
+        return submitter
+
+    async def _submit(self, account: Account, payload: TransactionPayload, wait: bool) -> str:
+        """Submit a payload; with wait=False return as soon as it is accepted"""
+        pending = await self._submitter_for(account).submit(payload)
+        # Our own write changes vault state, so drop cached reads once it lands
+        pending.confirmation.add_done_callback(self._on_confirmed)
+        if wait:
+            await pending.confirmation
+        return pending.tx_hash
+
+    async def _submit_and_wait(self, account: Account, payload: TransactionPayload) -> Dict[str, Any]:
+        """Submit a payload and return the committed transaction"""
+        pending = await self._submitter_for(account).submit(payload)
+        pending.confirmation.add_done_callback(self._on_confirmed)
+        return await pending.confirmation
+
+    def _record_creation(self, txn: Dict[str, Any], kind: str) -> int:
+        """Resolve a created id from its transaction; its info view is answered from the snapshot"""
+        return self.creations.resolve(txn, kind)
+
+    def _on_confirmed(self, confirmation: asyncio.Future):
+        self.cache.invalidate()
+        self.creations.supersede()
+        if self.events is not None and not confirmation.cancelled() and confirmation.exception() is None:
+            # SQLite writes block, so index the transaction off the event loop
+            ingest = asyncio.ensure_future(asyncio.to_thread(self.events.ingest_transaction, confirmation.result()))
+            self._ingests.add(ingest)
+            ingest.add_done_callback(self._on_ingested)
+
+    def _on_ingested(self, ingest: asyncio.Task):
+        self._ingests.discard(ingest)
+        if not ingest.cancelled() and ingest.exception() is not None:
+            logger.error("Indexing confirmed transaction failed: %r", ingest.exception())
+
+    async def get_vault_info(self, vault_id: int) -> VaultInfo:
+        """
+        Lấy thông tin vault (tương thích với EVM version)
+        """
+        try:
+            result = self.creations.snapshot("vault", vault_id)
+            if result is None:
+                result = await self._view("vault_core", "get_vault_info", [vault_id])
+
+            total_shares, total_assets, vault_id, denomination_asset, fund_manager, fee_rate, is_active = result
+
+            return VaultInfo(
+                vault_id=int(vault_id),
+                total_shares=int(total_shares),
+                total_assets=int(total_assets),
+                denomination_asset=denomination_asset,
+                fund_manager=fund_manager,
+                fee_rate=int(fee_rate),
+                is_active=is_active,
+                vault_address=self.module_address  # Aptos không có vault address riêng
+            )
+        except Exception as e:
+            logger.error("Error getting vault info: %s", e)
+            raise
+
+    async def get_ledger_version(self) -> int:
+        """Current ledger version, used to pin related reads to one snapshot"""
+        ledger_info = await self.client.info()
+        return int(ledger_info["ledger_version"])
+
+    async def _get_vault_totals(self, vault_id: int, ledger_version: int) -> Tuple[int, int]:
+        total_shares, total_assets = await asyncio.gather(
+            self._view("vault_core", "total_shares", [vault_id], ledger_version),
+            self._view("vault_core", "total_assets", [vault_id], ledger_version),
+        )
+        return int(total_shares[0]), int(total_assets[0])
+
+    def _build_position(
+        self, user_address: str, vault_id: int, shares: int, total_shares: int, total_assets: int
+    ) -> UserPosition:
+        share_price = Decimal(total_assets) / Decimal(total_shares) if total_shares > 0 else Decimal(0)
+        return UserPosition(
+            user_address=user_address,
+            vault_id=vault_id,
+            shares=shares,
+            assets=convert_to_assets(shares, total_shares, total_assets),
+            share_price=share_price
+        )
+
+    async def get_user_position(
+        self, user_address: str, vault_id: int, ledger_version: Optional[int] = None
+    ) -> UserPosition:
+        """
+        Lấy thông tin position của user
+
+        balance_of, total_shares and total_assets are read concurrently at one
+        ledger version; assets are derived locally instead of calling
+        convert_to_assets.
+        """
+        try:
+            if ledger_version is None:
+                ledger_version = await self.get_ledger_version()
+
+            shares, (total_shares, total_assets) = await asyncio.gather(
+                self._view("vault_core", "balance_of", [user_address, vault_id], ledger_version),
+                self._get_vault_totals(vault_id, ledger_version),
+            )
+
+            return self._build_position(user_address, vault_id, int(shares[0]), total_shares, total_assets)
+        except Exception as e:
+            logger.error("Error getting user position: %s", e)
+            raise
+
+    async def get_user_positions(
+        self,
+        user_addresses: List[str],
+        vault_id: int,
+        ledger_version: Optional[int] = None,
+        max_concurrency: int = 64,
+    ) -> List[UserPosition]:
+        """
+        Lấy positions cho nhiều users tại cùng một ledger version
+
+        Vault totals are read once and shared; balance_of calls run with at
+        most max_concurrency in flight and skip the view cache, so one bulk
+        read does not evict everything else from its LRU tier.
+        """
+        try:
+            if ledger_version is None:
+                ledger_version = await self.get_ledger_version()
+
+            limit = asyncio.Semaphore(max_concurrency)
+
+            async def read_shares(user_address: str) -> int:
+                async with limit:
+                    result = await self._view(
+                        "vault_core", "balance_of", [user_address, vault_id], ledger_version, cached=False
+                    )
+                return int(result[0])
+
+            (total_shares, total_assets), *shares = await asyncio.gather(
+                self._get_vault_totals(vault_id, ledger_version),
+                *(read_shares(user_address) for user_address in user_addresses),
+            )
+
+            return [
+                self._build_position(user_address, vault_id, user_shares, total_shares, total_assets)
+                for user_address, user_shares in zip(user_addresses, shares)
+            ]
+        except Exception as e:
+            logger.error("Error getting user positions: %s", e)
+            raise
+
+    async def _get_user_balance_info(self, user_address: str, ledger_version: int) -> UserBalanceInfo:
+        # Straight to the client: thousands of one-off pinned reads would flush the view cache
+        result = await self.client.view(
+            f"{self.module_address}::vault_core_simple::get_user_balance_info",
+            [],
+            [user_address],
+            ledger_version,
+        )
+        if isinstance(result, (bytes, str)):
+            result = json.loads(result)
+        shares, total_deposited, total_withdrawn, last_deposit = (int(value) for value in result)
+        return UserBalanceInfo(user_address, shares, total_deposited, total_withdrawn, last_deposit)
+
+    async def iter_user_balances(
+        self,
+        user_addresses: Iterable[str],
+        ledger_version: Optional[int] = None,
+        max_concurrency: int = 64,
+    ) -> AsyncIterator[Tuple[str, Union[UserBalanceInfo, Exception]]]:
+        """
+        Lấy balance info cho nhiều users tại cùng một ledger version
+
+        Yields (user_address, info) in completion order; info is the exception
+        instead when that user's read failed. At most max_concurrency workers
+        pull addresses from user_addresses as they go, so a generator of
+        addresses is consumed lazily and memory stays flat. An exception raised
+        by user_addresses itself ends the iteration and is re-raised here.
+        """
+        if ledger_version is None:
+            ledger_version = await self.get_ledger_version()
+
+        addresses = iter(user_addresses)
+        results: asyncio.Queue = asyncio.Queue(max_concurrency)
+
+        async def worker():
+            # Workers share one iterator; next() never runs concurrently on one loop
+            try:
+                for user_address in addresses:
+                    try:
+                        info = await self._get_user_balance_info(user_address, ledger_version)
+                    except Exception as e:
+                        info = e
+                    await results.put((user_address, info))
+            except Exception:
+                # user_addresses itself raised: still signal the consumer, which re-raises it.
+                # Not on cancellation, when nobody is left to read a full queue.
+                await results.put(None)
+                raise
+            await results.put(None)
+
+        workers = [asyncio.ensure_future(worker()) for _ in range(max_concurrency)]
+        try:
+            running = len(workers)
+            while running:
+                item = await results.get()
+                if item is None:
+                    running -= 1
+                else:
+                    yield item
+            # Surface an error raised by the user_addresses iterator
+            for task in workers:
+                task.result()
+        finally:
+            for task in workers:
+                task.cancel()
+
+    async def deposit(self, user_account: Account, vault_id: int, amount: int, wait: bool = True) -> str:
+        """
+        Deposit vào vault (tương thích với EVM version)
+        """
+        try:
+            payload = entry_function_payload(
+                f"{self.module_address}::vault_core::deposit",
+                [f"{self.module_address}::coin::USDT"],
+                [f"u64:{vault_id}", f"u64:{amount}"],
+            )
+
+            tx_hash = await self._submit(user_account, payload, wait)
+
+            logger.info("Deposit successful: %s", tx_hash)
+            return tx_hash
+
+        except Exception as e:
+            logger.error("Error depositing: %s", e)
+            raise
+
+    async def withdraw(self, user_account: Account, vault_id: int, shares: int, wait: bool = True) -> str:
+        """
+        Withdraw từ vault (tương thích với EVM version)
+        """
+        try:
+            payload = entry_function_payload(
+                f"{self.module_address}::vault_core::withdraw",
+                [f"{self.module_address}::coin::USDT"],
+                [f"u64:{vault_id}", f"u64:{shares}"],
+            )
+
+            tx_hash = await self._submit(user_account, payload, wait)
+
+            logger.info("Withdraw successful: %s", tx_hash)
+            return tx_hash
+
+        except Exception as e:
+            logger.error("Error withdrawing: %s", e)
+            raise
+
+    async def create_vault(self, vault_manager: Account, fund_manager: str, fee_rate: int = 100) -> int:
+        """
+        Tạo vault mới (tương thích với EVM version)
+        """
+        try:
+            usdt_address = (await self._view("vault_core", "get_usdt_address", []))[0]
+
+            payload = entry_function_payload(
+                f"{self.module_address}::vault_core::create_vault",
+                [],
+                [f"address:{usdt_address}", f"address:{fund_manager}", f"u64:{fee_rate}"],
+            )
+
+            txn = await self._submit_and_wait(vault_manager, payload)
+
+            # Lấy vault ID mới từ chính transaction vừa confirm
+            vault_id = self._record_creation(txn, "vault")
+
+            logger.info("Vault created successfully: %s", vault_id)
+            return vault_id
+
+        except Exception as e:
+            logger.error("Error creating vault: %s", e)
+            raise
+
+    async def rebalance(self, fund_manager: Account, vault_id: int, trades: List[int], wait: bool = True) -> str:
+        """
+        Rebalance vault (tương thích với EVM version)
+        """
+        try:
+            payload = entry_function_payload(
+                f"{self.module_address}::vault_core::rebalance",
+                [],
+                [f"u64:{vault_id}", f"vector<u64>:[{','.join(str(int(trade)) for trade in trades)}]"],
+            )
+
+            tx_hash = await self._submit(fund_manager, payload, wait)
+
+            logger.info("Rebalance successful: %s", tx_hash)
+            return tx_hash
+
+        except Exception as e:
+            logger.error("Error rebalancing: %s", e)
+            raise
+
+    async def get_quote(self, token_in: str, token_out: str, amount_in: int) -> int:
+        """
+        Lấy quote cho swap (tương thích với PancakeSwap)
+        """
+        try:
+            return await self.quotes.get_quote(token_in, token_out, amount_in)
+        except Exception as e:
+            logger.error("Error getting quote: %s", e)
+            raise
+
+    async def get_quotes(self, requests: List[Tuple[str, str, int]]) -> List[Optional[int]]:
+        """
+        Lấy nhiều quotes cùng lúc từ list (token_in, token_out, amount_in)
+        """
+        return await self.quotes.get_quotes(requests)
+
+    async def vault_swap(
+        self,
+        user_account: Account,
+        vault_id: int,
+        amount_in: int,
+        amount_out_min: int,
+        path: List[str],
+        wait: bool = True,
+    ) -> str:
+        """
+        Swap trong vault (tương thích với EVM version)
+        """
+        try:
+            payload = entry_function_payload(
+                f"{self.module_address}::pancakeswap_adapter::vault_swap",
+                [f"{self.module_address}::coin::USDT", f"{self.module_address}::coin::AptosCoin"],
+                [
+                    f"u64:{vault_id}",
+                    f"u64:{amount_in}",
+                    f"u64:{amount_out_min}",
+                    f"vector<address>:[{','.join(path)}]",
+                    f"u64:{int(time.time()) + 3600}",  # 1 hour deadline
+                ],
+            )
+
+            tx_hash = await self._submit(user_account, payload, wait)
+
+            logger.info("Vault swap successful: %s", tx_hash)
+            return tx_hash
+
+        except Exception as e:
+            logger.error("Error vault swap: %s", e)
+            raise
+
+    # ===== COMPTROLLER FUNCTIONS =====
+
+    async def create_comptroller(self, vault_owner: Account, vault_id: int, fund_manager: str) -> int:
+        """Create comptroller for a vault"""
+        try:
+            payload = entry_function_payload(
+                f"{self.module_address}::vault_comptroller::create_comptroller",
+                [],
+                [f"u64:{vault_id}", f"address:{fund_manager}"],
+            )
+
+            txn = await self._submit_and_wait(vault_owner, payload)
+
+            # Get comptroller ID from the confirmed transaction
+            return self._record_creation(txn, "comptroller")
+
+        except Exception as e:
+            logger.error("Error creating comptroller: %s", e)
+            raise
+
+    async def execute_trade(self, fund_manager: Account, comptroller_id: int, trade_data: dict, wait: bool = True) -> bool:
+        """Execute trade through comptroller"""
+        try:
+            payload = TransactionPayload(EntryFunction.natural(
+                f"{self.module_address}::vault_comptroller",
+                "execute_trade",
+                [],
+                [TransactionArgument(comptroller_id, Serializer.u64), *_trade_arguments(trade_data)],
+            ))
+
+            await self._submit(fund_manager, payload, wait)
+            return True
+
+        except Exception as e:
+            logger.error("Error executing trade: %s", e)
+            raise
+
+    async def execute_rebalance(self, fund_manager: Account, comptroller_id: int, trades: list, wait: bool = True) -> bool:
+        """Execute rebalance through comptroller"""
+        try:
+            payload = TransactionPayload(EntryFunction.natural(
+                f"{self.module_address}::vault_comptroller",
+                "execute_rebalance",
+                [],
+                [TransactionArgument(comptroller_id, Serializer.u64), *_trades_arguments(trades)],
+            ))
+
+            await self._submit(fund_manager, payload, wait)
+            return True
+
+        except Exception as e:
+            logger.error("Error executing rebalance: %s", e)
+            raise
+
+    async def buy_shares(self, user: Account, comptroller_id: int, amount: int, min_shares: int, wait: bool = True) -> bool:
+        """Buy shares through comptroller"""
+        try:
+            payload = entry_function_payload(
+                f"{self.module_address}::vault_comptroller::buy_shares",
+                [],
+                [f"u64:{comptroller_id}", f"u64:{amount}", f"u64:{min_shares}"],
+            )
+
+            await self._submit(user, payload, wait)
+            return True
+
+        except Exception as e:
+            logger.error("Error buying shares: %s", e)
+            raise
+
+    async def sell_shares(self, user: Account, comptroller_id: int, shares: int, min_amount: int, wait: bool = True) -> bool:
+        """Sell shares through comptroller"""
+        try:
+            payload = entry_function_payload(
+                f"{self.module_address}::vault_comptroller::sell_shares",
+                [],
+                [f"u64:{comptroller_id}", f"u64:{shares}", f"u64:{min_amount}"],
+            )
+
+            await self._submit(user, payload, wait)
+            return True
+
+        except Exception as e:
+            logger.error("Error selling shares: %s", e)
+            raise
+
+    async def get_comptroller_info(self, comptroller_id: int) -> dict:
+        """Get comptroller information"""
+        try:
+            result = self.creations.snapshot("comptroller", comptroller_id)
+            if result is None:
+                result = await self._view("vault_comptroller", "get_comptroller_info", [comptroller_id])
+
+            return {
+                "id": result[0],
+                "vault_id": result[1],
+                "fund_manager": result[2],
+                "vault_owner": result[3],
+                "is_active": result[4],
+                "total_trades": result[5],
+                "total_volume": result[6]
+            }
+
+        except Exception as e:
+            logger.error("Error getting comptroller info: %s", e)
+            raise
+
+    async def _get_comptroller_id_from_events(self, txn_hash: str) -> int:
+        """Extract comptroller ID from transaction events"""
+        txn = await self.client.transaction_by_hash(txn_hash)
+        return self._record_creation(txn, "comptroller")
@@ -0,0 +1,181 @@
+"""
+Transaction Confirmation Tracker
+================================
+
+Watches many pending transaction hashes with one shared polling loop.
+
+Each round costs a single ledger info call; pending hashes are only looked
+up again when the ledger version has advanced. The poll interval starts short
+and backs off while nothing lands, so fresh transactions confirm quickly and
+idle trackers stay cheap.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from aptos_sdk.async_client import ApiError, RestClient
+
+logger = logging.getLogger(__name__)
+
+
+class TransactionFailed(Exception):
+    """Transaction was committed but its execution failed"""
+
+    def __init__(self, tx_hash: str, transaction: Dict[str, Any]):
+        self.tx_hash = tx_hash
+        self.transaction = transaction
+        self.vm_status = transaction.get("vm_status", "Unknown error")
+        super().__init__(f"Transaction {tx_hash} failed: {self.vm_status}")
+
+
+class ConfirmationTracker:
+    """
+    Shared confirmation tracker for in-flight transactions
+
+    ``track()`` hands back a future that resolves with the committed
+    transaction, or fails with ``TransactionFailed`` / ``asyncio.TimeoutError``.
+    """
+
+    def __init__(
+        self,
+        client: RestClient,
+        initial_interval: float = 0.2,
+        max_interval: float = 2.0,
+        backoff: float = 1.5,
+        timeout: float = 300.0,
+        max_concurrent_lookups: int = 16,
+    ):
+        self.client = client
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.timeout = timeout
+
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._deadlines: Dict[str, float] = {}
+        self._lookup_limit = asyncio.Semaphore(max_concurrent_lookups)
+        self._interval = initial_interval
+        self._last_ledger_version = -1
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def track(self, tx_hash: str, timeout: Optional[float] = None) -> asyncio.Future:
+        """Start watching a transaction hash and return its confirmation future"""
+        future = self._pending.get(tx_hash)
+        if future is not None:
+            return future
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending[tx_hash] = future
+        self._deadlines[tx_hash] = time.monotonic() + (timeout or self.timeout)
+
+        # A new transaction resets the backoff and forces a lookup next round
+        self._interval = self.initial_interval
+        self._last_ledger_version = -1
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        self._wakeup.set()
+
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._run())
+        return future
+
+    async def wait(self, tx_hash: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Wait until the transaction is committed and return it"""
+        return await asyncio.shield(self.track(tx_hash, timeout))
+
+    async def close(self):
+        """Stop the polling loop and cancel all outstanding futures"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for future in self._pending.values():
+            if not future.done():
+                future.cancel()
+        self._pending.clear()
+        self._deadlines.clear()
+
+    async def _run(self):
+        while self._pending:
+            try:
+                landed = await self._poll_once()
+            except Exception as e:
+                logger.warning("Confirmation poll failed: %s", e)
+                landed = 0
+
+            self._expire()
+            if not self._pending:
+                break
+
+            if landed:
+                self._interval = self.initial_interval
+            else:
+                self._interval = min(self._interval * self.backoff, self.max_interval)
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self._interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _poll_once(self) -> int:
+        """Run one batched round and return how many transactions resolved"""
+        ledger_info = await self.client.info()
+        ledger_version = int(ledger_info["ledger_version"])
+        if ledger_version <= self._last_ledger_version:
+            return 0
+
+        hashes = list(self._pending)
+        results = await asyncio.gather(*(self._lookup(tx_hash) for tx_hash in hashes))
+        self._last_ledger_version = ledger_version
+
+        landed = 0
+        for tx_hash, transaction in zip(hashes, results):
+            if transaction is None:
+                continue
+            future = self._pending.pop(tx_hash)
+            self._deadlines.pop(tx_hash, None)
+            landed += 1
+            if future.done():
+                continue
+            if transaction.get("success", False):
+                future.set_result(transaction)
+            else:
+                future.set_exception(TransactionFailed(tx_hash, transaction))
+        return landed
+
+    async def _lookup(self, tx_hash: str) -> Optional[Dict[str, Any]]:
+        """Fetch a transaction, returning None while it is still pending"""
+        async with self._lookup_limit:
+            try:
+                transaction = await self.client.transaction_by_hash(tx_hash)
+            except ApiError as e:
+                if e.status_code == 404:
+                    return None
+                raise
+        if transaction.get("type") == "pending_transaction":
+            return None
+        return transaction
+
+    def _expire(self):
+        now = time.monotonic()
+        for tx_hash, deadline in list(self._deadlines.items()):
+            if deadline > now:
+                continue
+            del self._deadlines[tx_hash]
+            future = self._pending.pop(tx_hash)
+            if not future.done():
+                future.set_exception(
+                    asyncio.TimeoutError(f"Transaction {tx_hash} not confirmed in time")
+                )
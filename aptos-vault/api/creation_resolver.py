@@ -0,0 +1,121 @@
+"""
+Creation Resolver
+=================
+
+Reads the id of a newly created vault or comptroller straight from its
+committed transaction, instead of guessing it with a follow-up view call.
+
+The id comes from the creation event when the module emits one, otherwise
+from the ``VaultResource`` / ``ComptrollerResource`` in the transaction's write
+set. Either way the data arrives with the confirmation itself, and concurrent
+creations each resolve to their own id. The resource data is kept as
+metadata, so ``get_vault_info`` / ``get_comptroller_info`` can answer from the
+creation snapshot, with no view call, for ``max_age`` seconds after creation
+(as long as an unpinned cached view would be served) and only until a later
+write of ours confirms. Other accounts can change the object at any time, so
+the snapshot is never served for longer than that.
+"""
+
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+# kind -> (module, created resource, creation event, id field in that event)
+CREATIONS = {
+    "vault": ("vault_core", "VaultResource", "VaultCreatedEvent", "vault_id"),
+    "comptroller": ("vault_comptroller", "ComptrollerResource", "ComptrollerCreatedEvent", "comptroller_id"),
+}
+
+# kind -> (view function, resource fields in the order the view returns them)
+VIEW_RESULTS = {
+    "vault": (
+        "get_vault_info",
+        ("total_shares", "total_assets", "id", "denomination_asset", "fund_manager", "fee_rate", "is_active"),
+    ),
+    "comptroller": (
+        "get_comptroller_info",
+        ("id", "vault_id", "fund_manager", "vault_owner", "is_active", "total_trades", "total_volume"),
+    ),
+}
+
+
+def _struct_parts(type_name: str) -> Tuple[str, str]:
+    """('module', 'Struct') from 'addr::module::Struct<...>'"""
+    parts = type_name.split("<", 1)[0].split("::")
+    if len(parts) != 3:
+        return "", ""
+    return parts[1], parts[2]
+
+
+class CreationResolver:
+    """Thread-safe id -> metadata map of objects created by our transactions"""
+
+    def __init__(self, max_age: float = 1.0):
+        self.max_age = max_age
+        self._metadata: Dict[Tuple[str, int], Dict[str, Any]] = {}
+        # Objects whose creation snapshot no later write of ours has superseded -> resolved at
+        self._current: Dict[Tuple[str, int], float] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, txn: Dict[str, Any], kind: str) -> int:
+        """Id of the ``kind`` object created by a committed transaction"""
+        if not txn.get("success", True):
+            raise ValueError(f"Transaction {txn.get('hash')} failed: {txn.get('vm_status')}")
+        module, resource, event_name, id_field = CREATIONS[kind]
+
+        metadata: Optional[Dict[str, Any]] = None
+        for change in txn.get("changes") or []:
+            if change.get("type") != "write_resource":
+                continue
+            data = change.get("data") or {}
+            if _struct_parts(data.get("type", "")) == (module, resource):
+                metadata = dict(data.get("data") or {})
+                break
+
+        object_id = None
+        for event in txn.get("events") or []:
+            if _struct_parts(event.get("type", "")) == (module, event_name):
+                object_id = int(event["data"][id_field])
+                break
+        if object_id is None and metadata is not None and "id" in metadata:
+            object_id = int(metadata["id"])
+        if object_id is None:
+            raise ValueError(f"No {kind} created in transaction {txn.get('hash')}")
+
+        if metadata is not None:
+            metadata["id"] = str(object_id)
+            with self._lock:
+                self._metadata[(kind, object_id)] = metadata
+                self._current[(kind, object_id)] = time.monotonic()
+        return object_id
+
+    def get(self, kind: str, object_id: int) -> Optional[Dict[str, Any]]:
+        """Metadata recorded when the object was created, if we created it"""
+        with self._lock:
+            metadata = self._metadata.get((kind, object_id))
+        return dict(metadata) if metadata is not None else None
+
+    def view_result(self, kind: str, object_id: int) -> Optional[Tuple[str, str, List[Any]]]:
+        """(module, function, result) matching the info view at creation time"""
+        metadata = self.get(kind, object_id)
+        function, fields = VIEW_RESULTS[kind]
+        if metadata is None or any(field not in metadata for field in fields):
+            return None
+        return CREATIONS[kind][0], function, [metadata[field] for field in fields]
+
+    def snapshot(self, kind: str, object_id: int) -> Optional[List[Any]]:
+        """The info view result as of creation, while it is recent and not superseded"""
+        with self._lock:
+            resolved_at = self._current.get((kind, object_id))
+            if resolved_at is None:
+                return None
+            if time.monotonic() - resolved_at >= self.max_age:
+                del self._current[(kind, object_id)]
+                return None
+        view = self.view_result(kind, object_id)
+        return view[2] if view is not None else None
+
+    def supersede(self):
+        """One of our transactions confirmed; creation snapshots may no longer match the chain"""
+        with self._lock:
+            self._current.clear()
@@ -0,0 +1,345 @@
+"""
+Vault Event Store
+=================
+
+Local SQLite index of vault deposit, withdraw, rebalance and swap events.
+
+``EventIndexer`` pages event handles forward from the last stored sequence
+number, so each sync only downloads new events. Confirmed transactions seen
+by our own clients can be ingested directly with ``EventStore.ingest_transaction``.
+Queries such as "all deposits by user X" or "swap volume in the last 24h"
+are then answered from the local indexes.
+"""
+
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+from aptos_sdk.async_client import RestClient
+
+logger = logging.getLogger(__name__)
+
+# Move struct name -> event kind
+EVENT_KINDS = {
+    "DepositEvent": "deposit",
+    "WithdrawEvent": "withdraw",
+    "RebalanceEvent": "rebalance",
+    "SwapEvent": "swap",
+    "VaultEvent": "vault",
+}
+
+# Modules whose events are indexed; 0x1::coin also has a WithdrawEvent
+VAULT_MODULES = frozenset({"vault_core", "vault_core_simple", "vault_comptroller", "pancakeswap_adapter"})
+
+# Entry functions whose first argument is the vault id
+_VAULT_ID_FUNCTIONS = ("::deposit", "::withdraw", "::rebalance", "::vault_swap")
+
+_ZERO_ADDRESS = "0x0"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    event_key TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    type TEXT NOT NULL,
+    version INTEGER,
+    sequence_number INTEGER,
+    user TEXT,
+    vault TEXT,
+    token_in TEXT,
+    token_out TEXT,
+    amount INTEGER,
+    amount_out INTEGER,
+    shares INTEGER,
+    timestamp INTEGER,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_by_user ON events (kind, user, timestamp);
+CREATE INDEX IF NOT EXISTS events_by_vault ON events (kind, vault, timestamp);
+CREATE INDEX IF NOT EXISTS events_by_time ON events (kind, timestamp);
+CREATE TABLE IF NOT EXISTS sync_state (
+    source TEXT PRIMARY KEY,
+    next_sequence_number INTEGER NOT NULL
+);
+"""
+
+_COLUMNS = (
+    "event_key", "kind", "type", "version", "sequence_number", "user", "vault",
+    "token_in", "token_out", "amount", "amount_out", "shares", "timestamp", "data",
+)
+
+
+@dataclass(frozen=True)
+class EventSource:
+    """An event handle to sync, e.g. ``pancakeswap_adapter::SwapEvents.events``"""
+    name: str
+    address: str
+    handle: str       # struct holding the EventHandle
+    field_name: str   # EventHandle field in that struct
+
+
+def _int_or_none(value: Any) -> Optional[int]:
+    return int(value) if value is not None else None
+
+
+def _event_key(event: Dict[str, Any], version: Optional[int], index: Optional[int]) -> str:
+    guid = event.get("guid") or {}
+    account = guid.get("account_address", _ZERO_ADDRESS)
+    if account not in (_ZERO_ADDRESS, "0x" + "0" * 64):
+        # Handle events are unique by (handle, sequence number) however they were fetched
+        return f"{account}/{guid.get('creation_number')}/{event.get('sequence_number')}"
+    # Module events have no handle; identify them by position in the transaction
+    return f"v{version}/{index}"
+
+
+def _vault_from_payload(payload: Dict[str, Any]) -> Optional[str]:
+    function = payload.get("function", "")
+    arguments = payload.get("arguments") or []
+    if arguments and function.endswith(_VAULT_ID_FUNCTIONS):
+        return str(arguments[0])
+    return None
+
+
+def parse_event(
+    event: Dict[str, Any],
+    version: Optional[int] = None,
+    index: Optional[int] = None,
+    sender: Optional[str] = None,
+    vault: Optional[str] = None,
+    timestamp: Optional[int] = None,
+) -> Optional[Dict[str, Any]]:
+    """Turn a REST event into a store row, or None if it is not a vault event
+
+    ``timestamp`` (seconds) is used when the event data carries none, e.g.
+    the enclosing transaction's time.
+    """
+    event_type = event.get("type", "")
+    parts = event_type.split("<", 1)[0].split("::")
+    if len(parts) != 3 or parts[1] not in VAULT_MODULES:
+        return None
+    kind = EVENT_KINDS.get(parts[2])
+    if kind is None:
+        return None
+
+    data = event.get("data") or {}
+    version = _int_or_none(event.get("version", version))
+    vault_id = data.get("vault_id", vault)
+    return {
+        "event_key": _event_key(event, version, index),
+        "kind": kind,
+        "type": event_type,
+        "version": version,
+        "sequence_number": _int_or_none(event.get("sequence_number")),
+        "user": data.get("user", sender),
+        "vault": str(vault_id) if vault_id is not None else None,
+        "token_in": data.get("token_in"),
+        "token_out": data.get("token_out"),
+        "amount": _int_or_none(data.get("amount", data.get("amount_in", data.get("usdt_amount")))),
+        "amount_out": _int_or_none(data.get("amount_out")),
+        "shares": _int_or_none(data.get("shares_minted", data.get("shares_burned", data.get("shares")))),
+        "timestamp": _int_or_none(data.get("timestamp", timestamp)),
+        "data": json.dumps(data),
+    }
+
+
+class EventStore:
+    """
+    SQLite-backed event index
+
+    Safe to share between threads; every write runs in its own transaction,
+    together with the sync cursor it advances.
+    """
+
+    def __init__(self, path: str = "vault_events.db"):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # ===== WRITES =====
+
+    def add_events(self, rows: Sequence[Dict[str, Any]], source: Optional[str] = None, next_sequence_number: Optional[int] = None) -> int:
+        """Insert rows (duplicates are ignored) and optionally advance a source cursor"""
+        placeholders = ", ".join("?" for _ in _COLUMNS)
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                f"INSERT OR IGNORE INTO events ({', '.join(_COLUMNS)}) VALUES ({placeholders})",
+                [tuple(row[column] for column in _COLUMNS) for row in rows],
+            )
+            inserted = self._conn.total_changes - before
+            if source is not None and next_sequence_number is not None:
+                self._conn.execute(
+                    "INSERT INTO sync_state (source, next_sequence_number) VALUES (?, ?) "
+                    "ON CONFLICT(source) DO UPDATE SET next_sequence_number = excluded.next_sequence_number",
+                    (source, next_sequence_number),
+                )
+        return inserted
+
+    def ingest_transaction(self, txn: Dict[str, Any]) -> int:
+        """Index the vault events of a committed transaction"""
+        if not txn or not txn.get("success", True):
+            return 0
+        version = _int_or_none(txn.get("version"))
+        vault = _vault_from_payload(txn.get("payload") or {})
+        # Transaction timestamps are in microseconds, event timestamps in seconds
+        txn_timestamp = _int_or_none(txn.get("timestamp"))
+        timestamp = txn_timestamp // 1_000_000 if txn_timestamp is not None else None
+        rows = []
+        for index, event in enumerate(txn.get("events") or []):
+            row = parse_event(event, version, index, txn.get("sender"), vault, timestamp)
+            if row is not None:
+                rows.append(row)
+        return self.add_events(rows) if rows else 0
+
+    def get_cursor(self, source: str) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT next_sequence_number FROM sync_state WHERE source = ?", (source,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    # ===== QUERIES =====
+
+    def query(
+        self,
+        kind: Optional[str] = None,
+        user: Optional[str] = None,
+        vault: Optional[Any] = None,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Events matching every given filter, newest first"""
+        clauses, params = [], []
+        for column, value in (("kind", kind), ("user", user), ("vault", vault)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(str(value))
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("timestamp < ?")
+            params.append(until)
+
+        sql = "SELECT * FROM events"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY timestamp DESC, version DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        results = []
+        for row in rows:
+            result = dict(row)
+            result["data"] = json.loads(result["data"])
+            results.append(result)
+        return results
+
+    def deposits_by_user(self, user: str, vault: Optional[Any] = None) -> List[Dict[str, Any]]:
+        return self.query(kind="deposit", user=user, vault=vault)
+
+    def withdrawals_by_user(self, user: str, vault: Optional[Any] = None) -> List[Dict[str, Any]]:
+        return self.query(kind="withdraw", user=user, vault=vault)
+
+    def swap_volume(self, since: Optional[int] = None, until: Optional[int] = None, token_in: Optional[str] = None) -> Dict[str, int]:
+        """Swap count and summed amounts in [since, until); since defaults to 24h ago"""
+        since = int(time.time()) - 86400 if since is None else since
+        sql = "SELECT COUNT(*), COALESCE(SUM(amount), 0), COALESCE(SUM(amount_out), 0) FROM events WHERE kind = 'swap' AND timestamp >= ?"
+        params: List[Any] = [since]
+        if until is not None:
+            sql += " AND timestamp < ?"
+            params.append(until)
+        if token_in is not None:
+            sql += " AND token_in = ?"
+            params.append(token_in)
+        with self._lock:
+            count, amount_in, amount_out = self._conn.execute(sql, params).fetchone()
+        return {"count": count, "amount_in": amount_in, "amount_out": amount_out}
+
+
+class EventIndexer:
+    """Incremental event-handle sync into an EventStore"""
+
+    def __init__(self, client: RestClient, store: EventStore, sources: Sequence[EventSource], page_size: int = 100):
+        self.client = client
+        self.store = store
+        self.sources = list(sources)
+        self.page_size = page_size
+        self._task: Optional[asyncio.Task] = None
+
+    async def sync_source(self, source: EventSource) -> int:
+        """Fetch everything after the stored cursor; returns the number of new events"""
+        start = await asyncio.to_thread(self.store.get_cursor, source.name)
+        inserted = 0
+        while True:
+            events = await self.client.events_by_event_handle(
+                source.address, source.handle, source.field_name, self.page_size, start
+            )
+            if not events:
+                break
+            rows = [row for row in (parse_event(event) for event in events) if row is not None]
+            await self._date_by_transaction(rows)
+            start = int(events[-1]["sequence_number"]) + 1
+            inserted += await asyncio.to_thread(self.store.add_events, rows, source.name, start)
+            if len(events) < self.page_size:
+                break
+        return inserted
+
+    async def _date_by_transaction(self, rows: List[Dict[str, Any]]):
+        """Fill in the timestamp of rows whose event data has none from their transaction"""
+        versions = {row["version"] for row in rows if row["timestamp"] is None and row["version"] is not None}
+        if not versions:
+            return
+        versions = list(versions)
+        txns = await asyncio.gather(*(self.client.transaction_by_version(version) for version in versions))
+        # Transaction timestamps are in microseconds, event timestamps in seconds
+        timestamps = {version: int(txn["timestamp"]) // 1_000_000 for version, txn in zip(versions, txns)}
+        for row in rows:
+            if row["timestamp"] is None and row["version"] is not None:
+                row["timestamp"] = timestamps[row["version"]]
+
+    async def sync(self) -> Dict[str, int]:
+        """Sync every source concurrently; a failing source is logged and skipped"""
+        results = await asyncio.gather(*(self.sync_source(source) for source in self.sources), return_exceptions=True)
+        synced = {}
+        for source, result in zip(self.sources, results):
+            if isinstance(result, Exception):
+                logger.error("Event sync failed for %s: %s", source.name, result)
+                result = 0
+            synced[source.name] = result
+        return synced
+
+    def start(self, interval: float = 5.0):
+        """Keep syncing in the background every interval seconds"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run(interval))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self, interval: float):
+        while True:
+            await self.sync()
+            await asyncio.sleep(interval)
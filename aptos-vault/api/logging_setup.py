@@ -0,0 +1,151 @@
+"""
+Non-Blocking Logging
+====================
+
+Routes log records through a queue to a background writer thread, so a slow
+disk never stalls the asyncio event loop.
+
+Records are enqueued unformatted: the %-style message is rendered on the
+writer thread, so callers should log with ``logger.info("... %s", value)``
+rather than f-strings. Chatty messages can be rate limited or sampled by
+their message template before they are ever queued.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+from typing import Iterable, Optional
+
+DEFAULT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per record"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            entry["suppressed"] = suppressed
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Token bucket over records whose message template starts with prefix
+
+    The next record let through carries ``suppressed``, the number of records
+    dropped since the previous one.
+    """
+
+    def __init__(self, prefix: str, per_second: float = 1.0, burst: int = 1):
+        super().__init__()
+        self.prefix = prefix
+        self.per_second = per_second
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._suppressed = 0
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not str(record.msg).startswith(self.prefix):
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.per_second)
+            self._last = now
+            if self._tokens < 1:
+                self._suppressed += 1
+                return False
+            self._tokens -= 1
+            record.suppressed, self._suppressed = self._suppressed, 0
+            return True
+
+
+class SampleFilter(logging.Filter):
+    """Keep one in every ``every`` records whose message template starts with prefix"""
+
+    def __init__(self, prefix: str, every: int = 10):
+        super().__init__()
+        self.prefix = prefix
+        self.every = every
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not str(record.msg).startswith(self.prefix):
+            return True
+        with self._lock:
+            self._count += 1
+            return (self._count - 1) % self.every == 0
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves formatting to the listener thread
+
+    The stock handler renders the message in the caller's thread so records
+    can cross process boundaries. The listener here runs in-process, so the
+    record is passed through as is; arguments must not be mutated after the
+    call that logs them.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def setup_logging(
+    log_file: Optional[str] = None,
+    level: int = logging.INFO,
+    json_lines: bool = False,
+    filters: Iterable[logging.Filter] = (),
+    console: bool = True,
+) -> logging.handlers.QueueListener:
+    """
+    Install a queue-backed root handler and start its writer thread
+
+    Returns the listener; it is stopped (and the queue flushed) at exit, or
+    earlier by calling ``listener.stop()``.
+    """
+    formatter = JsonLinesFormatter() if json_lines else logging.Formatter(DEFAULT_FORMAT)
+    handlers = []
+    if log_file:
+        handlers.append(logging.FileHandler(log_file))
+    if console:
+        handlers.append(logging.StreamHandler())
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(log_queue)
+    for record_filter in filters:
+        queue_handler.addFilter(record_filter)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(_stop_listener, listener)
+    return listener
+
+
+def _stop_listener(listener: logging.handlers.QueueListener):
+    # stop() is not idempotent on older Pythons
+    if listener._thread is not None:
+        listener.stop()
@@ -0,0 +1,262 @@
+"""
+Fullnode Call Metrics
+=====================
+
+Latency histograms, error counters and in-flight gauges for every fullnode
+call, keyed by call (``view``, ``submit_bcs_transaction``, ...) and Move
+function or resource type.
+
+``InstrumentedClient`` wraps a ``RestClient`` (sync or async) so existing call
+sites are measured without changes. ``Metrics.timer()`` measures higher-level
+phases such as quote, submit and confirm. Export with ``to_prometheus()`` or
+``snapshot()``.
+"""
+
+import asyncio
+import bisect
+import functools
+import inspect
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Seconds; tuned for fullnode round trips and confirmation waits
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# RestClient methods that hit the fullnode, across SDK generations
+INSTRUMENTED_CALLS = frozenset({
+    "info",
+    "view",
+    "view_bcs_payload",
+    "account",
+    "account_balance",
+    "account_sequence_number",
+    "account_resource",
+    "account_resources",
+    "account_module",
+    "account_modules",
+    "get_table_item",
+    "events_by_event_handle",
+    "event_by_creation_number",
+    "transaction_by_hash",
+    "transaction_by_version",
+    "transaction_pending",
+    "get_transaction",
+    "transactions",
+    "wait_for_transaction",
+    "submit_transaction",
+    "submit_bcs_transaction",
+    "submit_bcs_txn",
+    "submit_and_wait_for_bcs_transaction",
+    "simulate_transaction",
+    "simulate_bcs_transaction",
+    "estimate_gas_price",
+    "chain_id",
+})
+
+MetricKey = Tuple[str, str]
+
+
+class _Series:
+    """One (call, function) series: bucket counts plus a window of recent samples"""
+
+    __slots__ = ("bucket_counts", "count", "sum", "errors", "in_flight", "recent")
+
+    def __init__(self, bucket_count: int, window: int):
+        self.bucket_counts = [0] * (bucket_count + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.errors = 0
+        self.in_flight = 0
+        self.recent: Deque[float] = deque(maxlen=window)
+
+
+def _percentile(sorted_samples: List[float], q: float) -> float:
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, int(q * len(sorted_samples)))
+    return sorted_samples[index]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+class Metrics:
+    """
+    Thread-safe registry of call latencies
+
+    Percentiles come from a sliding window of the last ``window`` samples per
+    series; the Prometheus histogram buckets are cumulative since start.
+    """
+
+    def __init__(self, namespace: str = "aptos", buckets: Sequence[float] = DEFAULT_BUCKETS, window: int = 2048):
+        self.namespace = namespace
+        self.buckets = tuple(sorted(buckets))
+        self.window = window
+        self._series: Dict[MetricKey, _Series] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, key: MetricKey) -> _Series:
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = _Series(len(self.buckets), self.window)
+        return series
+
+    def begin(self, call: str, function: str = ""):
+        with self._lock:
+            self._get((call, function)).in_flight += 1
+
+    def end(self, call: str, function: str, seconds: float, error: bool = False):
+        with self._lock:
+            series = self._get((call, function))
+            series.in_flight -= 1
+            series.count += 1
+            series.sum += seconds
+            series.bucket_counts[bisect.bisect_left(self.buckets, seconds)] += 1
+            series.recent.append(seconds)
+            if error:
+                series.errors += 1
+
+    @contextmanager
+    def timer(self, call: str, function: str = "") -> Iterator[None]:
+        """Time a block; an exception counts as an error and propagates"""
+        self.begin(call, function)
+        start = time.perf_counter()
+        error = False
+        try:
+            yield
+        except BaseException as e:
+            # Cancellation is not a failure of the call being measured
+            error = not isinstance(e, (asyncio.CancelledError, GeneratorExit))
+            raise
+        finally:
+            self.end(call, function, time.perf_counter() - start, error)
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    # ===== EXPORT =====
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON-friendly view: per series count, errors, in flight and p50/p95/p99"""
+        with self._lock:
+            items = [(key, series, sorted(series.recent)) for key, series in self._series.items()]
+
+        calls = []
+        for (call, function), series, samples in sorted(items, key=lambda item: item[0]):
+            calls.append({
+                "call": call,
+                "function": function,
+                "count": series.count,
+                "errors": series.errors,
+                "in_flight": series.in_flight,
+                "mean": series.sum / series.count if series.count else 0.0,
+                "p50": _percentile(samples, 0.50),
+                "p95": _percentile(samples, 0.95),
+                "p99": _percentile(samples, 0.99),
+            })
+        return {"namespace": self.namespace, "calls": calls}
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition format"""
+        name = f"{self.namespace}_call"
+        lines = [
+            f"# HELP {name}_duration_seconds Fullnode call latency",
+            f"# TYPE {name}_duration_seconds histogram",
+        ]
+        errors = [f"# HELP {name}_errors_total Failed fullnode calls", f"# TYPE {name}_errors_total counter"]
+        in_flight = [f"# HELP {name}_in_flight Fullnode calls in progress", f"# TYPE {name}_in_flight gauge"]
+
+        with self._lock:
+            items = sorted(
+                (key, list(series.bucket_counts), series.count, series.sum, series.errors, series.in_flight)
+                for key, series in self._series.items()
+            )
+
+        for (call, function), bucket_counts, count, total, error_count, active in items:
+            labels = f'call="{_escape(call)}",function="{_escape(function)}"'
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                cumulative += bucket_count
+                lines.append(f'{name}_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_duration_seconds_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f"{name}_duration_seconds_sum{{{labels}}} {total}")
+            lines.append(f"{name}_duration_seconds_count{{{labels}}} {count}")
+            errors.append(f"{name}_errors_total{{{labels}}} {error_count}")
+            in_flight.append(f"{name}_in_flight{{{labels}}} {active}")
+
+        return "\n".join(lines + errors + in_flight) + "\n"
+
+
+def _function_label(call: str, args: tuple, kwargs: dict) -> str:
+    """Best-effort Move function / resource name for a call"""
+    if call in ("view", "view_bcs_payload"):
+        strings = [a for a in args if isinstance(a, str)]
+        for value in strings:
+            if "::" in value:
+                return value
+        # Legacy view(address, module, function, args)
+        if len(strings) >= 3:
+            return f"{strings[1]}::{strings[2]}"
+        return str(kwargs.get("function", ""))
+    if call == "account_resource":
+        resource_type = args[1] if len(args) > 1 else kwargs.get("resource_type", "")
+        # Drop the generic arguments to keep label cardinality bounded
+        return str(resource_type).split("<", 1)[0]
+    for value in args:
+        if isinstance(value, dict) and "function" in value:
+            return str(value["function"])
+    return ""
+
+
+class InstrumentedClient:
+    """
+    Transparent RestClient proxy that times every fullnode call
+
+    Attributes and non-RPC methods pass straight through to the wrapped
+    client, so it can be handed to anything that expects a RestClient.
+    """
+
+    def __init__(self, client: Any, metrics: Optional[Metrics] = None):
+        self._client = client
+        self.metrics = metrics or Metrics()
+
+    @property
+    def wrapped(self) -> Any:
+        return self._client
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._client, name)
+        if name not in INSTRUMENTED_CALLS or not callable(attr):
+            return attr
+
+        metrics = self.metrics
+        if inspect.iscoroutinefunction(attr):
+            @functools.wraps(attr)
+            async def timed_async(*args, **kwargs):
+                with metrics.timer(name, _function_label(name, args, kwargs)):
+                    return await attr(*args, **kwargs)
+            return timed_async
+
+        @functools.wraps(attr)
+        def timed(*args, **kwargs):
+            with metrics.timer(name, _function_label(name, args, kwargs)):
+                return attr(*args, **kwargs)
+        return timed
+
+    def __setattr__(self, name: str, value: Any):
+        if name in ("_client", "metrics"):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._client, name, value)
+
+
+def instrument(client: Any, metrics: Optional[Metrics] = None) -> InstrumentedClient:
+    """Wrap client unless it is already instrumented"""
+    if isinstance(client, InstrumentedClient):
+        return client
+    return InstrumentedClient(client, metrics)
@@ -0,0 +1,72 @@
+"""
+Aptos Vault Models
+==================
+
+Dataclasses và helpers dùng chung cho sync và async API layers.
+Không phụ thuộc vào aptos_sdk.
+"""
+
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import List
+
+U64_MAX = 2**64 - 1
+
+
+def convert_to_assets(shares: int, total_shares: int, total_assets: int) -> int:
+    """
+    Local mirror của vault_core::convert_to_assets
+
+    Same floor rounding as the Move view; raises where the u64 multiplication
+    would abort on-chain.
+    """
+    if total_shares == 0:
+        return 0
+    product = shares * total_assets
+    if product > U64_MAX:
+        raise OverflowError(f"convert_to_assets overflows u64: {shares} * {total_assets}")
+    return product // total_shares
+
+
+@dataclass
+class VaultInfo:
+    """Thông tin vault tương thích với EVM version"""
+    vault_id: int
+    total_shares: int
+    total_assets: int
+    denomination_asset: str
+    fund_manager: str
+    fee_rate: int
+    is_active: bool
+    vault_address: str
+
+
+@dataclass
+class UserPosition:
+    """Thông tin position của user"""
+    user_address: str
+    vault_id: int
+    shares: int
+    assets: int
+    share_price: Decimal
+
+
+@dataclass
+class UserBalanceInfo:
+    """Kết quả của vault_core_simple::get_user_balance_info"""
+    user_address: str
+    shares: int
+    total_deposited: int
+    total_withdrawn: int
+    last_deposit: int
+
+
+@dataclass
+class TradeInfo:
+    """Thông tin trade"""
+    token_in: str
+    token_out: str
+    amount_in: int
+    amount_out: int
+    path: List[str]
+    timestamp: int
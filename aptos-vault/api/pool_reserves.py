@@ -0,0 +1,163 @@
+"""
+Pool Reserve Tracker
+====================
+
+Keeps PancakeSwap pool reserves fresh in the background so price impact can be
+computed locally, with no extra round trip on the quote path.
+
+The tracker polls the pool's ``swap::TokenPairReserve<X, Y>`` resource once per
+new ledger version. Price impact and the largest input under an impact bound
+are then pure functions of the cached reserves (see ``api.swap_math``).
+"""
+
+import asyncio
+import logging
+import time
+from typing import Optional, Tuple
+
+from aptos_sdk.async_client import ResourceNotFound, RestClient
+
+from api.swap_math import BPS, PANCAKESWAP_FEE_BPS, get_amount_out
+
+logger = logging.getLogger(__name__)
+
+
+class PoolReserveTracker:
+    """
+    Cached reserves for one PancakeSwap pair, oriented as (coin_in, coin_out)
+
+    PancakeSwap stores each pair once under a sorted type order, so the
+    orientation is discovered on the first fetch.
+    """
+
+    def __init__(
+        self,
+        client: RestClient,
+        swap_address: str,
+        coin_in: str,
+        coin_out: str,
+        fee_bps: int = PANCAKESWAP_FEE_BPS,
+        poll_interval: float = 0.5,
+        max_backoff: float = 10.0,
+    ):
+        self.client = client
+        self.swap_address = swap_address
+        self.coin_in = coin_in
+        self.coin_out = coin_out
+        self.fee_bps = fee_bps
+        self.poll_interval = poll_interval
+        self.max_backoff = max_backoff
+
+        self.reserve_in: Optional[int] = None
+        self.reserve_out: Optional[int] = None
+        self.ledger_version = -1
+        self.updated_at = 0.0
+
+        self._resource_type: Optional[str] = None
+        self._reversed = False
+        self._refresh_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def reserves(self) -> Optional[Tuple[int, int]]:
+        if self.reserve_in is None:
+            return None
+        return self.reserve_in, self.reserve_out
+
+    def _reserve_type(self, x: str, y: str) -> str:
+        return f"{self.swap_address}::swap::TokenPairReserve<{x}, {y}>"
+
+    async def _fetch_resource(self, ledger_version: int) -> dict:
+        if self._resource_type is not None:
+            return await self.client.account_resource(self.swap_address, self._resource_type, ledger_version)
+
+        for reversed_order, (x, y) in ((False, (self.coin_in, self.coin_out)), (True, (self.coin_out, self.coin_in))):
+            resource_type = self._reserve_type(x, y)
+            try:
+                resource = await self.client.account_resource(self.swap_address, resource_type, ledger_version)
+            except ResourceNotFound:
+                continue
+            self._resource_type = resource_type
+            self._reversed = reversed_order
+            return resource
+        raise ValueError(f"No PancakeSwap pool for {self.coin_in} / {self.coin_out}")
+
+    async def refresh(self) -> Tuple[int, int]:
+        """Re-read reserves if the ledger has advanced since the last read"""
+        async with self._refresh_lock:
+            ledger_info = await self.client.info()
+            ledger_version = int(ledger_info["ledger_version"])
+            if ledger_version > self.ledger_version:
+                resource = await self._fetch_resource(ledger_version)
+                reserve_x = int(resource["data"]["reserve_x"])
+                reserve_y = int(resource["data"]["reserve_y"])
+                if self._reversed:
+                    reserve_x, reserve_y = reserve_y, reserve_x
+                self.reserve_in, self.reserve_out = reserve_x, reserve_y
+                self.ledger_version = ledger_version
+                self.updated_at = time.time()
+            return self.reserve_in, self.reserve_out
+
+    async def ensure_started(self):
+        """Load reserves once and keep them fresh in the background"""
+        if self.reserve_in is None:
+            await self.refresh()
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        # Any failure (node errors, dropped connections, bad responses) must not
+        # end the polling loop; back off while the node keeps failing
+        delay = self.poll_interval
+        while True:
+            try:
+                await self.refresh()
+                delay = self.poll_interval
+            except Exception as e:
+                logger.warning("Reserve refresh failed, retrying in %.2fs: %r", delay, e)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_backoff)
+                continue
+            await asyncio.sleep(delay)
+
+    # ===== LOCAL PRICING =====
+
+    def _require_reserves(self) -> Tuple[int, int]:
+        if self.reserve_in is None:
+            raise RuntimeError("Reserves not loaded yet, call refresh() or ensure_started() first")
+        return self.reserve_in, self.reserve_out
+
+    def quote(self, amount_in: int) -> int:
+        """Expected output for amount_in at the cached reserves"""
+        reserve_in, reserve_out = self._require_reserves()
+        return get_amount_out(amount_in, reserve_in, reserve_out, self.fee_bps)
+
+    def price_impact(self, amount_in: int) -> float:
+        """
+        Fraction of the mid-price lost to moving along the curve, excluding fees
+
+        For x*y=k this is a' / (reserve_in + a'), with a' the input after fee.
+        """
+        reserve_in, _ = self._require_reserves()
+        amount_after_fee = amount_in * (BPS - self.fee_bps) / BPS
+        return amount_after_fee / (reserve_in + amount_after_fee)
+
+    def max_amount_for_impact(self, max_impact: float) -> int:
+        """Largest amount_in whose price impact stays within max_impact"""
+        if not 0 < max_impact < 1:
+            raise ValueError(f"max_impact must be in (0, 1), got {max_impact}")
+        reserve_in, _ = self._require_reserves()
+        amount = int(max_impact * reserve_in / (1 - max_impact) * BPS / (BPS - self.fee_bps))
+        # Float rounding can overshoot the bound by a unit or two
+        while amount > 0 and self.price_impact(amount) > max_impact:
+            amount -= 1
+        return amount
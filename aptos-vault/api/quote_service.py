@@ -0,0 +1,93 @@
+"""
+PancakeSwap Quote Service
+=========================
+
+Serves many quotes concurrently from one resolved router address.
+
+The router address is a constant in ``pancakeswap_adapter.move``, so it is
+resolved once (or passed in, e.g. from ``aptos_conf.PANCAKESWAP_ROUTER_ADDRESS``)
+and each quote then costs a single ``get_quote`` view call.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from api.async_aptos_vault_api import AsyncAptosVaultAPI
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class QuoteRequest:
+    """One quote in a batch"""
+    token_in: str
+    token_out: str
+    amount_in: int
+
+
+class QuoteService:
+    """
+    Concurrent quoting on top of AsyncAptosVaultAPI
+
+    ``get_quotes()`` takes a list of (token_in, token_out, amount_in) requests,
+    collapses duplicates and issues the distinct ones concurrently.
+    """
+
+    def __init__(self, api: "AsyncAptosVaultAPI", router_address: Optional[str] = None, max_concurrency: int = 32):
+        self.api = api
+        self._router_address = router_address
+        self._router_lock = asyncio.Lock()
+        self._limit = asyncio.Semaphore(max_concurrency)
+
+    async def get_router_address(self) -> str:
+        """Resolve the PancakeSwap router address once"""
+        if self._router_address is None:
+            async with self._router_lock:
+                if self._router_address is None:
+                    result = await self.api._view("pancakeswap_adapter", "get_pancakeswap_router_address", [])
+                    self._router_address = result[0]
+        return self._router_address
+
+    async def get_quote(self, token_in: str, token_out: str, amount_in: int, ledger_version: Optional[int] = None) -> int:
+        """Quote amount_in of token_in for token_out"""
+        router_address = await self.get_router_address()
+        async with self._limit:
+            quote = await self.api._view(
+                "pancakeswap_adapter",
+                "get_quote",
+                [router_address, amount_in, [token_in, token_out]],
+                ledger_version,
+            )
+        return int(quote[0])
+
+    async def get_quotes(
+        self,
+        requests: Sequence[Tuple[str, str, int]],
+        ledger_version: Optional[int] = None,
+    ) -> List[Optional[int]]:
+        """
+        Quote a batch of requests in one call
+
+        Results come back in request order; a request whose quote failed
+        yields None instead of failing the whole batch.
+        """
+        batch = [QuoteRequest(*request) for request in requests]
+        distinct = list(dict.fromkeys(batch))
+
+        # Resolve the router before fanning out so it is fetched only once
+        await self.get_router_address()
+        results = await asyncio.gather(
+            *(self.get_quote(r.token_in, r.token_out, r.amount_in, ledger_version) for r in distinct),
+            return_exceptions=True,
+        )
+
+        quotes = {}
+        for request, result in zip(distinct, results):
+            if isinstance(result, Exception):
+                logger.error("Error getting quote for %s: %s", request, result)
+                result = None
+            quotes[request] = result
+        return [quotes[request] for request in batch]
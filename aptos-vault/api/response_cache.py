@@ -0,0 +1,275 @@
+"""
+HTTP Response Cache
+===================
+
+Per-endpoint cache for polled read endpoints such as ``/api/vault/status``.
+
+- Coalescing: concurrent requests for the same key share one backend fetch.
+- Ledger versions: each fetch is pinned to the current ledger version. When
+  the ledger has not advanced since the cached read, the entry is renewed
+  without fetching again.
+- Short TTL with stale-while-revalidate: within ``stale_ttl`` after expiry
+  the old body is served at once while one background refresh runs. If a
+  refresh fails, the stale body is served until the stale window closes.
+- ETags: derived from the body, so clients polling with If-None-Match get a
+  304 for as long as the data is unchanged, even across ledger versions.
+
+``ResponseCache`` serves threaded servers. ``AsyncResponseCache`` applies the
+same policy on an event loop, where waiting on a thread event would block
+every other request.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    """A response body with the ledger version it was read at"""
+    body: Any
+    etag: str
+    ledger_version: Optional[int]
+    stored_at: float
+    stale: bool = False
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.stored_at
+
+
+class _Flight:
+    """A fetch in progress that followers wait on"""
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[CachedResponse] = None
+        self.error: Optional[BaseException] = None
+
+
+def compute_etag(body: Any) -> str:
+    encoded = json.dumps(body, sort_keys=True, separators=(",", ":"), default=str).encode()
+    return hashlib.sha1(encoded).hexdigest()[:20]
+
+
+class ResponseCache:
+    """
+    Thread-safe cache with request coalescing for one endpoint
+
+    ``fetch(ledger_version)`` produces the body. ``version_source()`` returns
+    the current ledger version; without one, entries are renewed by TTL alone.
+    Bodies rejected by ``cacheable`` are handed to every waiting request but
+    never stored.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 1.0,
+        stale_ttl: float = 5.0,
+        max_entries: int = 4096,
+        version_source: Optional[Callable[[], Optional[int]]] = None,
+        cacheable: Callable[[Any], bool] = lambda body: True,
+    ):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.version_source = version_source
+        self.cacheable = cacheable
+
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+        # Bumped by invalidate(), so fetches started before it are not stored
+        self._generation = 0
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.coalesced = 0
+        self.fetches = 0
+        self.renewals = 0
+
+    def get(self, key: Hashable, fetch: Callable[[Optional[int]], Any]) -> CachedResponse:
+        """The cached response for key, fetching (or joining a fetch) when needed"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = entry.age
+                if age < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry
+                if age < self.ttl + self.stale_ttl:
+                    self.stale_hits += 1
+                    if key not in self._flights:
+                        flight = self._flights[key] = _Flight()
+                        threading.Thread(
+                            target=self._refresh, args=(key, fetch, flight), name="response-cache", daemon=True
+                        ).start()
+                    return CachedResponse(entry.body, entry.etag, entry.ledger_version, entry.stored_at, stale=True)
+
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.coalesced += 1
+
+        if leader:
+            self._refresh(key, fetch, flight)
+        else:
+            flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    def _refresh(self, key: Hashable, fetch: Callable[[Optional[int]], Any], flight: _Flight):
+        """Fetch key once and publish the result to the flight's followers"""
+        try:
+            flight.result = self._load(key, fetch)
+        except Exception as e:
+            flight.error = e
+            logger.warning("Refreshing %r failed: %s", key, e)
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def _load(self, key: Hashable, fetch: Callable[[Optional[int]], Any]) -> CachedResponse:
+        with self._lock:
+            generation = self._generation
+            entry = self._entries.get(key)
+        ledger_version = self.version_source() if self.version_source is not None else None
+        if entry is not None and ledger_version is not None and entry.ledger_version == ledger_version:
+            # The ledger has not moved, so neither has the data
+            renewed = CachedResponse(entry.body, entry.etag, ledger_version, time.monotonic())
+            self._store(key, renewed, generation, renewal=True)
+            return renewed
+
+        body = fetch(ledger_version)
+        response = CachedResponse(body, compute_etag(body), ledger_version, time.monotonic())
+        with self._lock:
+            self.fetches += 1
+        if self.cacheable(body):
+            self._store(key, response, generation)
+        return response
+
+    def _store(self, key: Hashable, response: CachedResponse, generation: int, renewal: bool = False):
+        with self._lock:
+            if generation != self._generation:
+                return
+            if renewal:
+                self.renewals += 1
+            self._entries[key] = response
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Drop one entry, or all of them, e.g. after our own transaction confirms"""
+        with self._lock:
+            self._generation += 1
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "coalesced": self.coalesced,
+                "fetches": self.fetches,
+                "renewals": self.renewals,
+                "entries": len(self._entries),
+                "in_flight": len(self._flights),
+            }
+
+
+class AsyncResponseCache(ResponseCache):
+    """
+    ResponseCache for asyncio servers
+
+    ``fetch(ledger_version)`` and ``version_source()`` are coroutine
+    functions. Each fetch runs as a task that concurrent requests await, so a
+    request that is cancelled (client gone, timeout) never cancels the fetch
+    the others share. Use one instance per event loop.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 1.0,
+        stale_ttl: float = 5.0,
+        max_entries: int = 4096,
+        version_source: Optional[Callable[[], Awaitable[Optional[int]]]] = None,
+        cacheable: Callable[[Any], bool] = lambda body: True,
+    ):
+        super().__init__(ttl, stale_ttl, max_entries, version_source, cacheable)
+        self._flights: Dict[Hashable, asyncio.Task] = {}
+
+    async def get(self, key: Hashable, fetch: Callable[[Optional[int]], Awaitable[Any]]) -> CachedResponse:
+        """The cached response for key, fetching (or joining a fetch) when needed"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = entry.age
+                if age < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry
+                if age < self.ttl + self.stale_ttl:
+                    self.stale_hits += 1
+                    if key not in self._flights:
+                        self._start(key, fetch)
+                    return CachedResponse(entry.body, entry.etag, entry.ledger_version, entry.stored_at, stale=True)
+
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._start(key, fetch)
+            else:
+                self.coalesced += 1
+
+        return await asyncio.shield(flight)
+
+    def _start(self, key: Hashable, fetch: Callable[[Optional[int]], Awaitable[Any]]) -> asyncio.Task:
+        flight = asyncio.ensure_future(self._load(key, fetch))
+        self._flights[key] = flight
+        flight.add_done_callback(lambda task: self._finish(key, task))
+        return flight
+
+    def _finish(self, key: Hashable, flight: asyncio.Task):
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        # Retrieve the error here too, or a background refresh nobody awaits leaks it
+        if not flight.cancelled() and flight.exception() is not None:
+            logger.warning("Refreshing %r failed: %s", key, flight.exception())
+
+    async def _load(self, key: Hashable, fetch: Callable[[Optional[int]], Awaitable[Any]]) -> CachedResponse:
+        with self._lock:
+            generation = self._generation
+            entry = self._entries.get(key)
+        ledger_version = await self.version_source() if self.version_source is not None else None
+        if entry is not None and ledger_version is not None and entry.ledger_version == ledger_version:
+            # The ledger has not moved, so neither has the data
+            renewed = CachedResponse(entry.body, entry.etag, ledger_version, time.monotonic())
+            self._store(key, renewed, generation, renewal=True)
+            return renewed
+
+        body = await fetch(ledger_version)
+        response = CachedResponse(body, compute_etag(body), ledger_version, time.monotonic())
+        with self._lock:
+            self.fetches += 1
+        if self.cacheable(body):
+            self._store(key, response, generation)
+        return response
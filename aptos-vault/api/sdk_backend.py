@@ -0,0 +1,374 @@
+"""
+In-Process Aptos Backend
+========================
+
+Runs the ``aptos move run`` / ``move view`` / ``move publish`` commands
+through the SDK, without spawning the CLI.
+
+Arguments keep the CLI encoding (``u64:100``, ``address:0x1``,
+``vector<address>:[0x1,0x2]``, ...), so call sites written for the CLI move
+over unchanged. Entry functions are signed locally and submitted as BCS with
+one HTTP call. Simulation before submit is opt-in, since it costs a second
+round trip. Results use the same shape as the CLI's JSON ``Result``.
+
+Compiling Move packages still needs the CLI (``aptos move compile
+--save-metadata``); only the publish step runs here.
+"""
+
+import asyncio
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from aptos_sdk.account import Account
+from aptos_sdk.account_address import AccountAddress
+from aptos_sdk.async_client import RestClient
+from aptos_sdk.bcs import Serializer
+from aptos_sdk.package_publisher import PackagePublisher
+from aptos_sdk.transactions import EntryFunction, TransactionArgument, TransactionPayload
+from aptos_sdk.type_tag import StructTag, TypeTag
+
+from api.confirmation_tracker import ConfirmationTracker
+from api.metrics import Metrics, instrument
+from api.transaction_submitter import TransactionSubmitter
+
+PRIVATE_KEY_ENV = "APTOS_PRIVATE_KEY"
+DEFAULT_PROFILE = "mainnet"
+DEFAULT_NODE_URL = "https://fullnode.mainnet.aptoslabs.com/v1"
+
+_UINT_SERIALIZERS = {
+    "u8": Serializer.u8,
+    "u16": Serializer.u16,
+    "u32": Serializer.u32,
+    "u64": Serializer.u64,
+    "u128": Serializer.u128,
+    "u256": Serializer.u256,
+}
+
+# The view API takes 64-bit and wider integers as strings
+_STRING_UINTS = frozenset({"u64", "u128", "u256"})
+
+_SCALAR_TYPES = frozenset(_UINT_SERIALIZERS) | {"bool", "address", "string", "hex", "raw"}
+
+# Fields of the CLI's `move run` result
+_RESULT_FIELDS = ("gas_used", "gas_unit_price", "sender", "sequence_number", "success", "timestamp", "version", "vm_status")
+
+
+class CommandError(Exception):
+    """A command was rejected, failed in simulation, or failed on chain"""
+
+
+# ===== CLI ARGUMENT ENCODING =====
+
+def _split_arg(arg: str):
+    """('u64', '100') from 'u64:100'"""
+    arg_type, sep, value = arg.partition(":")
+    if not sep:
+        raise ValueError(f"Argument {arg!r} is not in type:value form")
+    return arg_type.strip(), value.strip()
+
+
+def _vector_items(value: str) -> List[str]:
+    value = value.strip()
+    if value.startswith("[") and value.endswith("]"):
+        value = value[1:-1]
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def _scalar_encoder(arg_type: str) -> Tuple[Callable[[str], Any], Callable[[Serializer, Any], None]]:
+    """(parser, BCS encoder) for a scalar CLI type"""
+    if arg_type in _UINT_SERIALIZERS:
+        return lambda value: int(value, 0), _UINT_SERIALIZERS[arg_type]
+    if arg_type == "bool":
+        return lambda value: value.lower() == "true", Serializer.bool
+    if arg_type == "address":
+        return AccountAddress.from_str_relaxed, Serializer.struct
+    if arg_type == "string":
+        return lambda value: value, Serializer.str
+    if arg_type in ("hex", "raw"):
+        return lambda value: bytes.fromhex(value[2:] if value.startswith("0x") else value), Serializer.to_bytes
+    raise ValueError(f"Unsupported argument type {arg_type!r}")
+
+
+def parse_cli_arg(arg: str) -> TransactionArgument:
+    """BCS transaction argument from a CLI-style ``type:value`` string"""
+    arg_type, value = _split_arg(arg)
+    if arg_type.startswith("vector<") and arg_type.endswith(">"):
+        inner = arg_type[len("vector<"):-1]
+        if inner == "u8" and not value.lstrip().startswith("["):
+            # vector<u8>:0x... is raw bytes, as in the CLI
+            return parse_cli_arg(f"hex:{value}")
+        parse, encoder = _scalar_encoder(inner)
+        return TransactionArgument(
+            [parse(item) for item in _vector_items(value)],
+            Serializer.sequence_serializer(encoder),
+        )
+    parse, encoder = _scalar_encoder(arg_type)
+    return TransactionArgument(parse(value), encoder)
+
+
+def parse_view_arg(arg: Any) -> Any:
+    """JSON view argument from a CLI-style ``type:value`` string; other values pass through"""
+    if not isinstance(arg, str) or ":" not in arg:
+        return arg
+    arg_type, value = _split_arg(arg)
+    if arg_type.split("<", 1)[0] not in _SCALAR_TYPES | {"vector"}:
+        return arg
+    if arg_type.startswith("vector<") and arg_type.endswith(">"):
+        inner = arg_type[len("vector<"):-1]
+        if inner == "u8" and not value.lstrip().startswith("["):
+            return value
+        return [parse_view_arg(f"{inner}:{item}") for item in _vector_items(value)]
+    if arg_type in _STRING_UINTS:
+        return str(int(value, 0))
+    if arg_type in _UINT_SERIALIZERS:
+        return int(value, 0)
+    if arg_type == "bool":
+        return value.lower() == "true"
+    if arg_type in ("hex", "raw"):
+        return value if value.startswith("0x") else f"0x{value}"
+    return value
+
+
+def parse_type_arg(type_arg: str) -> TypeTag:
+    return TypeTag(StructTag.from_str(type_arg))
+
+
+def entry_function_payload(function_id: str, type_args: Optional[Sequence[str]] = None, args: Optional[Sequence[str]] = None) -> TransactionPayload:
+    """Payload for ``--function-id addr::module::function --type-args ... --args ...``"""
+    address, module, function = function_id.split("::")
+    return TransactionPayload(EntryFunction.natural(
+        f"{address}::{module}",
+        function,
+        [parse_type_arg(type_arg) for type_arg in type_args or []],
+        [parse_cli_arg(arg) for arg in args or []],
+    ))
+
+
+def command_result(txn: Dict[str, Any]) -> Dict[str, Any]:
+    """The CLI's ``move run`` result fields from a REST transaction"""
+    result = {"transaction_hash": txn.get("hash")}
+    for field in _RESULT_FIELDS:
+        if field in txn:
+            result[field] = txn[field]
+    return result
+
+
+# ===== PROFILES =====
+
+def load_profile(name: str = DEFAULT_PROFILE, config_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    A profile from the CLI's ``.aptos/config.yaml``
+
+    Looks in the working directory first, then the home directory, like the
+    CLI does. Returns an empty dict when no config file exists.
+    """
+    candidates = [Path(config_path)] if config_path else [
+        Path.cwd() / ".aptos" / "config.yaml",
+        Path.home() / ".aptos" / "config.yaml",
+    ]
+    for path in candidates:
+        if not path.exists():
+            continue
+        import yaml  # only needed when a CLI config is present
+
+        with open(path) as f:
+            profiles = (yaml.safe_load(f) or {}).get("profiles") or {}
+        if name not in profiles:
+            raise KeyError(f"Profile {name!r} not found in {path}")
+        return profiles[name] or {}
+    return {}
+
+
+def load_account(profile: Optional[Dict[str, Any]] = None) -> Optional[Account]:
+    """Signer from $APTOS_PRIVATE_KEY, else from the profile; None if neither is set"""
+    private_key = os.environ.get(PRIVATE_KEY_ENV) or (profile or {}).get("private_key")
+    if not private_key:
+        return None
+    return Account.load_key(private_key.replace("ed25519-priv-", ""))
+
+
+def rest_api_url(node_url: str) -> str:
+    """The SDK's RestClient expects the REST API base, ending in ``/v1``"""
+    node_url = node_url.rstrip("/")
+    return node_url if node_url.endswith("/v1") else node_url + "/v1"
+
+
+# ===== BACKEND =====
+
+class SdkBackend:
+    """
+    ``move run`` / ``move view`` / ``move publish`` on a shared async client
+
+    Transactions go through a ``TransactionSubmitter``, so concurrent commands
+    from the same account pipeline on locally tracked sequence numbers.
+    """
+
+    def __init__(
+        self,
+        client: RestClient,
+        account: Optional[Account] = None,
+        tracker: Optional[ConfirmationTracker] = None,
+        metrics: Optional[Metrics] = None,
+        simulate: bool = False,
+    ):
+        self.client = instrument(client, metrics)
+        self.metrics = self.client.metrics
+        self.account = account
+        self.simulate_first = simulate
+        self._owns_client = False
+        self._owns_tracker = tracker is None
+        self.tracker = tracker or ConfirmationTracker(self.client)
+        self.submitter = (
+            TransactionSubmitter(self.client, account, self.tracker, metrics=self.metrics)
+            if account is not None else None
+        )
+
+    @classmethod
+    def from_profile(cls, profile: str = DEFAULT_PROFILE, node_url: Optional[str] = None, **kwargs) -> "SdkBackend":
+        """Backend with the node and signer of a CLI profile (``--profile mainnet``)"""
+        config = load_profile(profile)
+        node_url = rest_api_url(node_url or os.environ.get("APTOS_NODE_URL") or config.get("rest_url") or DEFAULT_NODE_URL)
+        kwargs.setdefault("account", load_account(config))
+        backend = cls(RestClient(node_url), **kwargs)
+        backend._owns_client = True
+        return backend
+
+    def _require_account(self) -> Account:
+        if self.account is None:
+            raise CommandError(f"No signing account configured; set ${PRIVATE_KEY_ENV} or an Aptos CLI profile")
+        return self.account
+
+    async def ledger_version(self) -> int:
+        """Current ledger version of the node"""
+        info = await self.client.info()
+        return int(info["ledger_version"])
+
+    async def view(
+        self,
+        function_id: str,
+        type_args: Optional[Sequence[str]] = None,
+        args: Optional[Sequence[Any]] = None,
+        ledger_version: Optional[int] = None,
+    ) -> List[Any]:
+        """``aptos move view``: the decoded return values"""
+        result = await self.client.view(
+            function_id,
+            list(type_args or []),
+            [parse_view_arg(arg) for arg in args or []],
+            ledger_version,
+        )
+        return json.loads(result) if isinstance(result, (bytes, str)) else result
+
+    async def simulate(self, function_id: str, type_args: Optional[Sequence[str]] = None, args: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        """Simulated ``move run``; raises CommandError if it would abort"""
+        account = self._require_account()
+        payload = entry_function_payload(function_id, type_args, args)
+        raw_transaction = await self.client.create_bcs_transaction(account, payload)
+        simulated = (await self.client.simulate_transaction(raw_transaction, account, True))[0]
+        if not simulated.get("success", False):
+            raise CommandError(f"Simulation of {function_id} failed: {simulated.get('vm_status')}")
+        return command_result(simulated)
+
+    async def run(
+        self,
+        function_id: str,
+        type_args: Optional[Sequence[str]] = None,
+        args: Optional[Sequence[str]] = None,
+        wait: bool = True,
+        simulate: Optional[bool] = None,
+    ) -> Dict[str, Any]:
+        """
+        ``aptos move run``
+
+        With wait (the CLI default) returns the committed transaction's result
+        and raises ``TransactionFailed`` if it aborted; otherwise returns as
+        soon as the fullnode accepts it.
+        """
+        self._require_account()
+        if self.simulate_first if simulate is None else simulate:
+            await self.simulate(function_id, type_args, args)
+        pending = await self.submitter.submit(entry_function_payload(function_id, type_args, args))
+        if not wait:
+            return {"transaction_hash": pending.tx_hash, "sequence_number": str(pending.sequence_number)}
+        return command_result(await pending.confirmation)
+
+    async def run_transaction(self, function_id: str, type_args: Optional[Sequence[str]] = None, args: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        """Like ``run`` but returns the full committed transaction, events and changes included"""
+        self._require_account()
+        return await self.submitter.submit_and_wait(entry_function_payload(function_id, type_args, args))
+
+    async def publish_package(self, package_dir: str, wait: bool = True) -> List[str]:
+        """``aptos move publish`` of an already compiled package; returns the transaction hashes"""
+        account = self._require_account()
+        # The submitter resyncs if this moves the sequence number under it
+        tx_hashes = await PackagePublisher(self.client).publish_package_in_path(account, package_dir)
+        if wait:
+            await asyncio.gather(*(self.tracker.wait(tx_hash) for tx_hash in tx_hashes))
+        return tx_hashes
+
+    async def close(self):
+        if self._owns_tracker:
+            await self.tracker.close()
+        if self._owns_client:
+            await self.client.close()
+
+
+class BlockingSdkBackend:
+    """
+    ``SdkBackend`` for synchronous callers such as Flask handlers and scripts
+
+    The async backend lives on a private event loop thread, so its client,
+    connection pool and sequence-number tracking persist across calls.
+    """
+
+    def __init__(self, factory: Callable[[], SdkBackend], timeout: Optional[float] = 120.0):
+        self.timeout = timeout
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="sdk-backend", daemon=True)
+        self._thread.start()
+        self.backend: SdkBackend = self._call(self._build(factory))
+
+    @classmethod
+    def from_profile(cls, profile: str = DEFAULT_PROFILE, node_url: Optional[str] = None, timeout: Optional[float] = 120.0, **kwargs) -> "BlockingSdkBackend":
+        return cls(lambda: SdkBackend.from_profile(profile, node_url, **kwargs), timeout)
+
+    @staticmethod
+    async def _build(factory: Callable[[], SdkBackend]) -> SdkBackend:
+        # Asyncio primitives in the tracker and submitter belong to this loop
+        return factory()
+
+    def _call(self, coroutine: Awaitable[Any]) -> Any:
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result(self.timeout)
+
+    @property
+    def account(self) -> Optional[Account]:
+        return self.backend.account
+
+    def ledger_version(self) -> int:
+        return self._call(self.backend.ledger_version())
+
+    def view(self, function_id: str, type_args=None, args=None, ledger_version: Optional[int] = None) -> List[Any]:
+        return self._call(self.backend.view(function_id, type_args, args, ledger_version))
+
+    def simulate(self, function_id: str, type_args=None, args=None) -> Dict[str, Any]:
+        return self._call(self.backend.simulate(function_id, type_args, args))
+
+    def run(self, function_id: str, type_args=None, args=None, wait: bool = True, simulate: Optional[bool] = None) -> Dict[str, Any]:
+        return self._call(self.backend.run(function_id, type_args, args, wait, simulate))
+
+    def run_transaction(self, function_id: str, type_args=None, args=None) -> Dict[str, Any]:
+        return self._call(self.backend.run_transaction(function_id, type_args, args))
+
+    def publish_package(self, package_dir: str, wait: bool = True) -> List[str]:
+        return self._call(self.backend.publish_package(package_dir, wait))
+
+    def close(self):
+        if not self._loop.is_running():
+            return
+        self._call(self.backend.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
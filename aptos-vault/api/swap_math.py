@@ -0,0 +1,172 @@
+"""
+Offline Swap Math
+=================
+
+Pure Python / NumPy mirror of the quote math in ``pancakeswap_adapter.move``
+and of the PancakeSwap constant-product pricing, in u64 integer semantics.
+
+Every function floors exactly like Move integer division and raises
+``OverflowError`` wherever the Move code would abort on u64 overflow or
+underflow, so local quotes match on-chain quotes bit for bit. The vectorised
+``*_many`` variants evaluate many input amounts at once.
+"""
+
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from api.models import U64_MAX
+
+U128_MAX = 2**128 - 1
+
+# pancakeswap_adapter::simulate_swap_with_fees_loop
+ADAPTER_FEE_RATE = 9995          # / 10000
+ADAPTER_SLIPPAGE = 999           # / 1000
+# pancakeswap_adapter::calculate_input_amount_loop
+ADAPTER_INPUT_SLIPPAGE = 1001    # / 1000
+ADAPTER_INPUT_FEE_RATE = 10005   # / 10000
+
+# PancakeSwap AMM on Aptos charges 0.25% per hop
+PANCAKESWAP_FEE_BPS = 25
+BPS = 10000
+
+
+def _check_u64(value: int, what: str) -> int:
+    if value < 0 or value > U64_MAX:
+        raise OverflowError(f"{what} out of u64 range: {value}")
+    return value
+
+
+def _hop_count(path_length: int) -> int:
+    # Move computes `len - 1` on a u64, which aborts for an empty path
+    if path_length == 0:
+        raise OverflowError("path length 0 underflows `len - 1`")
+    return path_length - 1
+
+
+# ===== ADAPTER SIMULATION =====
+
+def simulate_swap_with_fees(amount_in: int, path_length: int) -> int:
+    """Mirror of ``simulate_swap_with_fees(amount_in, path)``"""
+    amount = _check_u64(amount_in, "amount_in")
+    for _ in range(_hop_count(path_length)):
+        after_fee = _check_u64(amount * ADAPTER_FEE_RATE, "amount * fee_rate") // 10000
+        amount = _check_u64(after_fee * ADAPTER_SLIPPAGE, "after_fee * slippage") // 1000
+    return amount
+
+
+def calculate_input_amount(amount_out: int, path_length: int) -> int:
+    """Mirror of ``calculate_input_amount(router, amount_out, path)``"""
+    amount = _check_u64(amount_out, "amount_out")
+    for _ in range(_hop_count(path_length)):
+        after_slippage = _check_u64(amount * ADAPTER_INPUT_SLIPPAGE, "amount * slippage") // 1000
+        amount = _check_u64(after_slippage * ADAPTER_INPUT_FEE_RATE, "after_slippage * fee_rate") // 10000
+    return amount
+
+
+def get_amounts_out(amount_in: int, path_length: int) -> List[int]:
+    """
+    Mirror of ``get_amounts_out(router, amount_in, path)``
+
+    The Move function prices each hop with ``simulate_swap_with_fees`` on an
+    empty path, which underflows ``len - 1``, so any path with a hop aborts.
+    This mirror raises in the same cases to stay faithful.
+    """
+    amounts = [_check_u64(amount_in, "amount_in")]
+    for i in range(_hop_count(path_length)):
+        amounts.append(simulate_swap_with_fees(amounts[i], 0))
+    return amounts
+
+
+def simulate_swap_with_fees_many(amounts_in: Sequence[int], path_length: int) -> np.ndarray:
+    """Vectorised ``simulate_swap_with_fees`` over many input amounts"""
+    amounts = np.asarray(amounts_in, dtype=np.uint64)
+    for _ in range(_hop_count(path_length)):
+        if amounts.size and int(amounts.max()) * ADAPTER_FEE_RATE > U64_MAX:
+            raise OverflowError("amount * fee_rate overflows u64")
+        amounts = amounts * np.uint64(ADAPTER_FEE_RATE) // np.uint64(10000)
+        amounts = amounts * np.uint64(ADAPTER_SLIPPAGE) // np.uint64(1000)
+    return amounts
+
+
+# ===== CONSTANT PRODUCT =====
+
+def get_amount_out(amount_in: int, reserve_in: int, reserve_out: int, fee_bps: int = PANCAKESWAP_FEE_BPS) -> int:
+    """PancakeSwap ``get_amount_out`` with u128 intermediates, floored to u64"""
+    _check_u64(amount_in, "amount_in")
+    if reserve_in == 0 or reserve_out == 0:
+        raise ValueError("Insufficient liquidity")
+    amount_in_with_fee = amount_in * (BPS - fee_bps)
+    numerator = amount_in_with_fee * reserve_out
+    denominator = reserve_in * BPS + amount_in_with_fee
+    if numerator > U128_MAX or denominator > U128_MAX:
+        raise OverflowError("constant product intermediate overflows u128")
+    return numerator // denominator
+
+
+def get_amount_in(amount_out: int, reserve_in: int, reserve_out: int, fee_bps: int = PANCAKESWAP_FEE_BPS) -> int:
+    """PancakeSwap ``get_amount_in``: smallest input that yields amount_out"""
+    _check_u64(amount_out, "amount_out")
+    if reserve_in == 0 or amount_out >= reserve_out:
+        raise ValueError("Insufficient liquidity")
+    numerator = reserve_in * amount_out * BPS
+    denominator = (reserve_out - amount_out) * (BPS - fee_bps)
+    if numerator > U128_MAX:
+        raise OverflowError("constant product intermediate overflows u128")
+    return _check_u64(numerator // denominator + 1, "amount_in")
+
+
+def get_amounts_out_with_reserves(
+    amount_in: int,
+    reserves: Sequence[Tuple[int, int]],
+    fee_bps: int = PANCAKESWAP_FEE_BPS,
+) -> List[int]:
+    """Price a multi-hop path from (reserve_in, reserve_out) per hop"""
+    amounts = [_check_u64(amount_in, "amount_in")]
+    for reserve_in, reserve_out in reserves:
+        amounts.append(get_amount_out(amounts[-1], reserve_in, reserve_out, fee_bps))
+    return amounts
+
+
+def get_amount_out_many(
+    amounts_in: Sequence[int],
+    reserve_in: int,
+    reserve_out: int,
+    fee_bps: int = PANCAKESWAP_FEE_BPS,
+) -> np.ndarray:
+    """
+    Vectorised ``get_amount_out`` for one pool
+
+    Runs in uint64 when the largest intermediate fits, otherwise falls back to
+    exact Python integers in an object array.
+    """
+    amounts = np.asarray(amounts_in, dtype=np.uint64)
+    if reserve_in == 0 or reserve_out == 0:
+        raise ValueError("Insufficient liquidity")
+    if not amounts.size:
+        return amounts
+
+    largest_with_fee = int(amounts.max()) * (BPS - fee_bps)
+    if largest_with_fee * reserve_out <= U64_MAX and reserve_in * BPS + largest_with_fee <= U64_MAX:
+        amount_in_with_fee = amounts * np.uint64(BPS - fee_bps)
+        numerator = amount_in_with_fee * np.uint64(reserve_out)
+        denominator = np.uint64(reserve_in * BPS) + amount_in_with_fee
+        return numerator // denominator
+
+    if largest_with_fee * reserve_out > U128_MAX:
+        raise OverflowError("constant product intermediate overflows u128")
+    amount_in_with_fee = amounts.astype(object) * (BPS - fee_bps)
+    out = (amount_in_with_fee * reserve_out) // (reserve_in * BPS + amount_in_with_fee)
+    return out.astype(np.uint64)
+
+
+def get_amounts_out_with_reserves_many(
+    amounts_in: Sequence[int],
+    reserves: Sequence[Tuple[int, int]],
+    fee_bps: int = PANCAKESWAP_FEE_BPS,
+) -> np.ndarray:
+    """Vectorised multi-hop pricing; returns final output per input amount"""
+    amounts = np.asarray(amounts_in, dtype=np.uint64)
+    for reserve_in, reserve_out in reserves:
+        amounts = get_amount_out_many(amounts, reserve_in, reserve_out, fee_bps)
+    return amounts
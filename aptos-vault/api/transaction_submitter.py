@@ -0,0 +1,291 @@
+"""
+Pipelined Transaction Submitter
+===============================
+
+Keeps many signed transactions from one account in flight at once.
+
+The account sequence number is tracked locally, so a transaction is signed and
+submitted as soon as the previous one is accepted by the mempool, not when it
+is committed. Confirmations run in the background through the shared
+``ConfirmationTracker``.
+
+If a transaction expires without landing, every later transaction is stuck
+behind the gap. The submitter then re-signs the expired payload with the same
+sequence number; the later transactions are still valid and land behind it.
+When it gives up on a gap, new submissions wait until every transaction behind
+it has expired too, so none of those can land once the sequence number is reused.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set
+
+from aptos_sdk.account import Account
+from aptos_sdk.async_client import ApiError, RestClient
+from aptos_sdk.transactions import TransactionPayload
+
+from api.confirmation_tracker import ConfirmationTracker
+from api.metrics import Metrics
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PendingTransaction:
+    """A submitted transaction whose confirmation resolves in the background"""
+    sequence_number: int
+    tx_hash: str
+    payload: TransactionPayload
+    confirmation: asyncio.Future = field(repr=False)
+    attempts: int = 1
+    submitted_at: float = field(default_factory=time.perf_counter, repr=False)
+
+
+def _payload_label(payload: TransactionPayload) -> str:
+    entry_function = getattr(payload, "value", None)
+    module = getattr(entry_function, "module", None)
+    function = getattr(entry_function, "function", None)
+    if module is None or function is None:
+        return ""
+    return f"{getattr(module, 'name', module)}::{function}"
+
+
+class TransactionSubmitter:
+    """
+    Submission engine for a single account
+
+    ``submit()`` returns once the transaction is accepted by the fullnode;
+    await ``PendingTransaction.confirmation`` for the committed transaction.
+    """
+
+    def __init__(
+        self,
+        client: RestClient,
+        account: Account,
+        tracker: Optional[ConfirmationTracker] = None,
+        max_in_flight: int = 32,
+        max_resubmits: int = 2,
+        metrics: Optional[Metrics] = None,
+    ):
+        self.client = client
+        self.account = account
+        self.tracker = tracker or ConfirmationTracker(client)
+        self.max_resubmits = max_resubmits
+        # Times submit-to-commit per entry function as the "confirm" call
+        self.metrics = metrics
+
+        # A transaction can only land after its ledger expiration has passed,
+        # so waiting past it makes re-signing the same sequence number safe
+        self.confirmation_timeout = client.client_config.expiration_ttl + 30
+
+        self._next_sequence_number: Optional[int] = None
+        self._lock = asyncio.Lock()
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._in_flight: Dict[int, PendingTransaction] = {}
+        # Lowest sequence number given up on; submissions wait until nothing is
+        # in flight behind it, then resync from the chain
+        self._abandoned_from: Optional[int] = None
+        self._resynced = asyncio.Event()
+        self._resynced.set()
+        # Running gap recoveries; the event loop only keeps weak references to tasks
+        self._recoveries: Set[asyncio.Task] = set()
+
+    @property
+    def in_flight_count(self) -> int:
+        return len(self._in_flight)
+
+    async def submit(self, payload: TransactionPayload) -> PendingTransaction:
+        """Sign and submit a payload with the next local sequence number"""
+        await self._slots.acquire()
+        try:
+            await self._acquire_lock()
+            try:
+                if self._next_sequence_number is None:
+                    await self._sync_sequence_number()
+                try:
+                    tx_hash = await self._sign_and_submit(payload, self._next_sequence_number)
+                except ApiError as e:
+                    if "SEQUENCE_NUMBER" not in str(e):
+                        raise
+                    # Another submitter used this account, or our view is stale
+                    logger.warning("Sequence number %s rejected, resyncing: %s", self._next_sequence_number, e)
+                    await self._sync_sequence_number()
+                    tx_hash = await self._sign_and_submit(payload, self._next_sequence_number)
+                sequence_number = self._next_sequence_number
+                self._next_sequence_number += 1
+            finally:
+                self._lock.release()
+        except Exception:
+            self._slots.release()
+            raise
+
+        pending = PendingTransaction(
+            sequence_number=sequence_number,
+            tx_hash=tx_hash,
+            payload=payload,
+            confirmation=asyncio.get_running_loop().create_future(),
+        )
+        self._in_flight[sequence_number] = pending
+        if self.metrics is not None:
+            self.metrics.begin("confirm", _payload_label(payload))
+        self._watch(pending)
+        logger.info("Submitted seq %s: %s (%s in flight)", sequence_number, tx_hash, self.in_flight_count)
+        return pending
+
+    async def submit_and_wait(self, payload: TransactionPayload) -> Dict[str, Any]:
+        """Submit a payload and wait for the committed transaction"""
+        pending = await self.submit(payload)
+        return await pending.confirmation
+
+    async def submit_many(self, payloads: List[TransactionPayload]) -> List[PendingTransaction]:
+        """Submit payloads back to back in the given sequence order"""
+        return [await self.submit(payload) for payload in payloads]
+
+    async def drain(self):
+        """Wait until every in-flight transaction is resolved"""
+        confirmations = [pending.confirmation for pending in self._in_flight.values()]
+        if confirmations:
+            await asyncio.gather(*confirmations, return_exceptions=True)
+
+    async def _acquire_lock(self):
+        """Take the submission lock once no abandoned gap is waiting to clear"""
+        while True:
+            await self._resynced.wait()
+            await self._lock.acquire()
+            if self._resynced.is_set():
+                return
+            self._lock.release()
+
+    def _behind_abandoned_gap(self, pending: PendingTransaction) -> bool:
+        return self._abandoned_from is not None and pending.sequence_number > self._abandoned_from
+
+    async def _sync_sequence_number(self):
+        self._next_sequence_number = await self.client.account_sequence_number(self.account.address())
+        logger.info("Synced sequence number for %s: %s", self.account.address(), self._next_sequence_number)
+
+    async def _sign_and_submit(self, payload: TransactionPayload, sequence_number: int) -> str:
+        signed_transaction = await self.client.create_bcs_signed_transaction(
+            self.account, payload, sequence_number=sequence_number
+        )
+        return await self.client.submit_bcs_transaction(signed_transaction)
+
+    def _watch(self, pending: PendingTransaction):
+        tx_hash = pending.tx_hash
+        future = self.tracker.track(tx_hash, timeout=self.confirmation_timeout)
+        future.add_done_callback(lambda f: self._on_confirmation(pending, tx_hash, f))
+
+    def _on_confirmation(self, pending: PendingTransaction, tx_hash: str, future: asyncio.Future):
+        if future.cancelled():
+            self._resolve(pending, error=asyncio.CancelledError())
+            return
+
+        error = future.exception()
+        if isinstance(error, asyncio.TimeoutError):
+            if tx_hash == pending.tx_hash and self._behind_abandoned_gap(pending):
+                # Past its own expiration with the gap before it still open: it can never land
+                self._resolve(pending, error=asyncio.TimeoutError(f"Transaction {tx_hash} stuck behind an abandoned gap"))
+            elif tx_hash == pending.tx_hash:
+                # Expired without landing: everything behind it is stuck on the gap
+                recovery = asyncio.ensure_future(self._recover_gap(pending))
+                self._recoveries.add(recovery)
+                recovery.add_done_callback(lambda task: self._on_recovery_done(pending, task))
+            # An older signature of a resubmitted payload expiring is expected
+            return
+
+        # Any signature of the payload landing settles it; a failed
+        # transaction still consumes its sequence number
+        self._resolve(pending, result=future.result() if error is None else None, error=error)
+
+    def _on_recovery_done(self, pending: PendingTransaction, recovery: asyncio.Task):
+        self._recoveries.discard(recovery)
+        if recovery.cancelled():
+            self._resolve(pending, error=asyncio.CancelledError())
+            return
+        error = recovery.exception()
+        if error is not None:
+            # Don't leave the caller waiting on a transaction nobody is watching
+            logger.error("Recovering seq %d failed: %r", pending.sequence_number, error)
+            self._resolve(pending, error=error)
+
+    def _resolve(self, pending: PendingTransaction, result: Any = None, error: Optional[BaseException] = None):
+        """Settle a pending transaction and free its in-flight slot exactly once"""
+        if pending.confirmation.done():
+            return
+        if self._in_flight.get(pending.sequence_number) is pending:
+            del self._in_flight[pending.sequence_number]
+        self._slots.release()
+        if self._abandoned_from is not None and not any(
+            p.sequence_number > self._abandoned_from for p in self._in_flight.values()
+        ):
+            # Nothing behind the gap can land any more; the next submission resyncs
+            logger.info("Transactions behind seq %d settled, resyncing the sequence number", self._abandoned_from)
+            self._abandoned_from = None
+            self._next_sequence_number = None
+            self._resynced.set()
+        if self.metrics is not None:
+            elapsed = time.perf_counter() - pending.submitted_at
+            self.metrics.end("confirm", _payload_label(pending.payload), elapsed, error is not None)
+        if error is not None:
+            pending.confirmation.set_exception(error)
+        else:
+            pending.confirmation.set_result(result)
+
+    async def _recover_gap(self, expired: PendingTransaction):
+        """Re-sign an expired transaction so the transactions queued behind it can land"""
+        async with self._lock:
+            if expired.confirmation.done():
+                return
+
+            if self._behind_abandoned_gap(expired):
+                self._resolve(expired, error=asyncio.TimeoutError(f"Transaction {expired.tx_hash} stuck behind an abandoned gap"))
+                return
+
+            try:
+                on_chain = await self.client.account_sequence_number(self.account.address())
+            except Exception as e:
+                self._resolve(expired, error=e)
+                return
+
+            if expired.sequence_number < on_chain:
+                # The sequence number was consumed, so there is no gap to fill
+                self._resolve(
+                    expired,
+                    error=asyncio.TimeoutError(f"Transaction {expired.tx_hash} not confirmed in time"),
+                )
+                return
+
+            if expired.attempts > self.max_resubmits:
+                self._abandon_from(expired, on_chain)
+                return
+
+            logger.warning("Transaction seq %s expired, resubmitting", expired.sequence_number)
+            try:
+                expired.tx_hash = await self._sign_and_submit(expired.payload, expired.sequence_number)
+            except Exception as e:
+                logger.error("Resubmitting seq %s failed: %s", expired.sequence_number, e)
+                self._abandon_from(expired, on_chain)
+                return
+            expired.attempts += 1
+            self._watch(expired)
+
+    def _abandon_from(self, expired: PendingTransaction, on_chain: int):
+        """
+        Give up on a gap: fail the expired transaction and hold new submissions
+
+        The transactions queued behind it stay in the mempool, valid until
+        their own expiration. Rewinding to ``on_chain`` now would let them land
+        behind whatever reuses the gap's sequence number, after their callers
+        were told they failed. Each one is failed when its confirmation times
+        out instead, and the last one to settle reopens submission.
+        """
+        behind = sum(1 for p in self._in_flight.values() if p.sequence_number > expired.sequence_number)
+        logger.error(
+            "Abandoned seq %d (on chain: %d), holding submissions until %d later transactions expire",
+            expired.sequence_number, on_chain, behind,
+        )
+        if self._abandoned_from is None or expired.sequence_number < self._abandoned_from:
+            self._abandoned_from = expired.sequence_number
+        self._resynced.clear()
+        self._resolve(expired, error=asyncio.TimeoutError(f"Transaction seq {expired.sequence_number} could not be landed"))
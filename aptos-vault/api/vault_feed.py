@@ -0,0 +1,242 @@
+"""
+Vault Change Feed
+=================
+
+Pushes vault state changes to subscribers instead of having every client poll.
+
+One follower task per process watches the ledger. When the ledger advances it
+re-reads the vault totals at that version and diffs them against the last
+snapshot. Deposits, withdrawals and rebalances all move the totals, so the
+balances of subscribed users are only re-read, at the same version, when the
+totals changed. Per-user diffs go only to that user's subscribers.
+
+Each message is encoded once and shared across subscribers. A subscriber that
+falls ``max_queue`` messages behind is disconnected, so it reconnects and
+starts again from a fresh snapshot; a slow reader never stalls the fan-out.
+"""
+
+import asyncio
+import json
+import logging
+from functools import cached_property
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Queued to a subscriber that fell behind; the stream ends after it
+_LAGGED = object()
+
+
+class FeedMessage:
+    """An event and its payload, encoded lazily and at most once per format"""
+
+    def __init__(self, event: str, data: Dict[str, Any]):
+        self.event = event
+        self.data = data
+
+    @cached_property
+    def json(self) -> str:
+        return json.dumps({"event": self.event, **self.data}, separators=(",", ":"))
+
+    @cached_property
+    def sse(self) -> bytes:
+        payload = json.dumps(self.data, separators=(",", ":"))
+        version = self.data.get("ledger_version")
+        event_id = f"id: {version}\n" if version is not None else ""
+        return f"{event_id}event: {self.event}\ndata: {payload}\n\n".encode()
+
+
+def diff(old: Optional[Dict[str, Any]], new: Dict[str, Any]) -> Dict[str, Any]:
+    """Fields of new that are missing from or differ in old"""
+    if old is None:
+        return dict(new)
+    return {key: value for key, value in new.items() if old.get(key) != value}
+
+
+class Subscription:
+    """One connected client: the users it follows and its outgoing queue"""
+
+    def __init__(self, feed: "VaultFeed", users: Iterable[str], max_queue: int):
+        self.feed = feed
+        self.users: Set[str] = {user.lower() for user in users}
+        self.queue: "asyncio.Queue[Any]" = asyncio.Queue(max_queue)
+        self.lagged = False
+
+    def push(self, message: FeedMessage):
+        if self.lagged:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.lagged = True
+            # Make room for the marker so the reader wakes up and leaves
+            self.queue.get_nowait()
+            self.queue.put_nowait(_LAGGED)
+
+    async def next(self, timeout: Optional[float] = None) -> Optional[FeedMessage]:
+        """The next message; None on timeout; raises ConnectionResetError once lagged"""
+        try:
+            item = await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        if item is _LAGGED:
+            raise ConnectionResetError("Subscriber fell behind the vault feed")
+        return item
+
+    def close(self):
+        self.feed.unsubscribe(self)
+
+
+class VaultFeed:
+    """
+    Ledger follower and fan-out hub
+
+    ``ledger_version()``, ``read_status(version)`` and
+    ``read_balance(user, version)`` are the only chain reads; each tick costs
+    one ledger info call plus one status view, however many clients listen.
+    """
+
+    def __init__(
+        self,
+        ledger_version: Callable[[], Awaitable[int]],
+        read_status: Callable[[int], Awaitable[Dict[str, Any]]],
+        read_balance: Callable[[str, int], Awaitable[Dict[str, Any]]],
+        poll_interval: float = 0.5,
+        max_queue: int = 64,
+        max_concurrent_reads: int = 32,
+    ):
+        self.ledger_version = ledger_version
+        self.read_status = read_status
+        self.read_balance = read_balance
+        self.poll_interval = poll_interval
+        self.max_queue = max_queue
+
+        self.version = -1
+        self.status: Optional[Dict[str, Any]] = None
+        self.balances: Dict[str, Dict[str, Any]] = {}
+
+        self._subscribers: Set[Subscription] = set()
+        self._by_user: Dict[str, Set[Subscription]] = {}
+        self._read_limit = asyncio.Semaphore(max_concurrent_reads)
+        self._tick_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    # ===== SUBSCRIPTIONS =====
+
+    async def subscribe(self, users: Iterable[str] = ()) -> Subscription:
+        """
+        Register a client
+
+        Its queue starts with the full current status and balances as the
+        first ``changes``, so clients handle every message the same way: merge
+        the changes into their local copy.
+        """
+        subscription = Subscription(self, users, self.max_queue)
+        self._subscribers.add(subscription)
+        for user in subscription.users:
+            self._by_user.setdefault(user, set()).add(subscription)
+        try:
+            await self._ensure_started()
+            await self._load_users(subscription.users)
+        except Exception:
+            self.unsubscribe(subscription)
+            raise
+
+        subscription.push(FeedMessage("status", {"ledger_version": self.version, "changes": self.status}))
+        for user in subscription.users:
+            if user in self.balances:
+                subscription.push(FeedMessage(
+                    "balance", {"ledger_version": self.version, "user": user, "changes": self.balances[user]}
+                ))
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self._subscribers.discard(subscription)
+        for user in subscription.users:
+            followers = self._by_user.get(user)
+            if followers is None:
+                continue
+            followers.discard(subscription)
+            if not followers:
+                del self._by_user[user]
+                self.balances.pop(user, None)
+
+    # ===== FOLLOWER =====
+
+    async def _ensure_started(self):
+        if self.status is None:
+            await self.tick()
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        # Runs while anyone listens; the next subscriber restarts it
+        while self._subscribers:
+            try:
+                await self.tick()
+            except Exception as e:
+                logger.warning("Vault feed tick failed: %s", e)
+            await asyncio.sleep(self.poll_interval)
+
+    async def _read_balance(self, user: str, version: int) -> Dict[str, Any]:
+        async with self._read_limit:
+            return await self.read_balance(user, version)
+
+    async def _load_users(self, users: Iterable[str]):
+        """Read users not seen yet at the current version, without announcing them"""
+        async with self._tick_lock:
+            missing = [user for user in users if user not in self.balances]
+            results = await asyncio.gather(*(self._read_balance(user, self.version) for user in missing))
+            for user, balance in zip(missing, results):
+                if user in self._by_user:
+                    self.balances[user] = balance
+
+    async def tick(self) -> List[FeedMessage]:
+        """Follow the ledger one step and publish what changed"""
+        async with self._tick_lock:
+            version = await self.ledger_version()
+            if version <= self.version:
+                return []
+
+            status = await self.read_status(version)
+            status_changes = diff(self.status, status)
+            messages = []
+            # The first read is only a snapshot; subscribe() hands it out
+            if status_changes and self.status is not None:
+                messages.append(FeedMessage("status", {"ledger_version": version, "changes": status_changes}))
+                messages.extend(await self._balance_messages(version))
+            self.status = status
+            self.version = version
+
+        for message in messages:
+            if message.event == "status":
+                recipients: Iterable[Subscription] = self._subscribers
+            else:
+                recipients = self._by_user.get(message.data["user"], ())
+            for subscription in list(recipients):
+                subscription.push(message)
+        return messages
+
+    async def _balance_messages(self, version: int) -> List[FeedMessage]:
+        users = list(self._by_user)
+        results = await asyncio.gather(*(self._read_balance(user, version) for user in users))
+        messages = []
+        for user, balance in zip(users, results):
+            changes = diff(self.balances.get(user), balance)
+            self.balances[user] = balance
+            if changes:
+                messages.append(FeedMessage("balance", {"ledger_version": version, "user": user, "changes": changes}))
+        return messages
@@ -0,0 +1,121 @@
+"""
+View Function Cache
+===================
+
+Two-tier cache for vault view functions.
+
+- Immutable tier: values fixed at deploy time (USDT address, PancakeSwap
+  router/factory/quoter) are cached forever.
+- Mutable tier: vault state keyed by function, arguments and ledger version,
+  with a TTL for unpinned reads and LRU eviction. It is cleared whenever one
+  of our own transactions confirms.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+# Views whose result can never change after the modules are published
+IMMUTABLE_VIEWS = frozenset({
+    ("vault_core", "get_usdt_address"),
+    ("pancakeswap_adapter", "get_pancakeswap_router_address"),
+    ("pancakeswap_adapter", "get_pancakeswap_factory_address"),
+    ("pancakeswap_adapter", "get_pancakeswap_quoter_address"),
+    ("pancakeswap_adapter", "get_usdt_address"),
+})
+
+_MISSING = object()
+
+
+def _freeze(value: Any) -> Hashable:
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+
+class ViewCache:
+    """Thread-safe cache shared by the sync and async vault APIs"""
+
+    MISSING = _MISSING
+
+    def __init__(self, ttl: float = 1.0, max_entries: int = 4096):
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self._immutable: Dict[Hashable, Any] = {}
+        self._mutable: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.immutable_hits = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def is_immutable(module: str, function: str) -> bool:
+        return (module, function) in IMMUTABLE_VIEWS
+
+    @staticmethod
+    def make_key(module: str, function: str, args: Any, ledger_version: Optional[int] = None) -> Hashable:
+        return (module, function, _freeze(args), ledger_version)
+
+    def get(self, module: str, function: str, args: Any, ledger_version: Optional[int] = None) -> Any:
+        """Return the cached value, or ``ViewCache.MISSING``"""
+        with self._lock:
+            if self.is_immutable(module, function):
+                value = self._immutable.get(self.make_key(module, function, args), _MISSING)
+                if value is not _MISSING:
+                    self.immutable_hits += 1
+                    return value
+                self.misses += 1
+                return _MISSING
+
+            key = self.make_key(module, function, args, ledger_version)
+            entry = self._mutable.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                # A read pinned to a ledger version never goes stale
+                if ledger_version is not None or time.monotonic() - stored_at < self.ttl:
+                    self._mutable.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._mutable[key]
+            self.misses += 1
+            return _MISSING
+
+    def put(self, module: str, function: str, args: Any, value: Any, ledger_version: Optional[int] = None):
+        with self._lock:
+            if self.is_immutable(module, function):
+                self._immutable[self.make_key(module, function, args)] = value
+                return
+
+            key = self.make_key(module, function, args, ledger_version)
+            self._mutable[key] = (time.monotonic(), value)
+            self._mutable.move_to_end(key)
+            while len(self._mutable) > self.max_entries:
+                self._mutable.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self):
+        """Drop all mutable vault state, e.g. after our own transaction confirms"""
+        with self._lock:
+            self._mutable.clear()
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.immutable_hits + self.misses
+            return {
+                "hits": self.hits,
+                "immutable_hits": self.immutable_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.immutable_hits) / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "entries": len(self._mutable),
+                "immutable_entries": len(self._immutable),
+            }
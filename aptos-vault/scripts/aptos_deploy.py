@@ -14,6 +14,17 @@ project_root = Path(__file__).parent.parent
 sys.path.append(str(project_root))
 
 from aptos_conf import APTOS_CONFIG
+from api.creation_resolver import CreationResolver
+from api.sdk_backend import BlockingSdkBackend
+
+# Publish and entry functions run in-process; only compilation needs the CLI
+_backend = None
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        _backend = BlockingSdkBackend.from_profile("mainnet")
+    return _backend
 
 def deploy_modules():
     """Deploy all vault modules to Aptos Mainnet"""
@@ -27,7 +38,8 @@ def deploy_modules():
     compile_result = subprocess.run([
         "aptos", "move", "compile",
         "--package-dir", ".",
-        "--named-addresses", f"vault={APTOS_CONFIG['account']}"
+        "--named-addresses", f"vault={APTOS_CONFIG['account']}",
+        "--save-metadata"  # package-metadata.bcs, needed to publish from the SDK
     ], capture_output=True, text=True)
     
     if compile_result.returncode != 0:
@@ -39,29 +51,20 @@ def deploy_modules():
     
     # Deploy modules
     print("\n🚀 Deploying modules...")
-    deploy_result = subprocess.run([
-        "aptos", "move", "publish",
-        "--package-dir", ".",
-        "--named-addresses", f"vault={APTOS_CONFIG['account']}",
-        "--profile", "mainnet"
-    ], capture_output=True, text=True)
-    
-    if deploy_result.returncode != 0:
+    try:
+        tx_hashes = get_backend().publish_package(".")
+    except Exception as e:
         print("❌ Deployment failed:")
-        print(deploy_result.stderr)
+        print(e)
         return False
     
     print("✅ Deployment successful!")
     
-    # Extract module addresses from deployment output
-    print("\n📋 Deployed module addresses:")
-    for line in deploy_result.stdout.split('\n'):
-        if "vault::vault_core" in line:
-            print(f"  vault_core: {line.strip()}")
-        elif "vault::pancakeswap_adapter" in line:
-            print(f"  pancakeswap_adapter: {line.strip()}")
-        elif "vault::vault_comptroller" in line:
-            print(f"  vault_comptroller: {line.strip()}")
+    print("\n📋 Deployed modules:")
+    for module in ("vault_core", "pancakeswap_adapter", "vault_comptroller"):
+        print(f"  {module}: {APTOS_CONFIG['account']}::{module}")
+    for tx_hash in tx_hashes:
+        print(f"  Transaction: {tx_hash}")
     
     return True
 
@@ -71,37 +74,36 @@ def create_vault():
     print("\n🏦 Creating initial vault...")
     
     # Create vault with USDT as denomination asset
-    create_result = subprocess.run([
-        "aptos", "move", "run",
-        "--function-id", f"{APTOS_CONFIG['account']}::vault_core::create_vault",
-        "--args", 
-        "address:0xf22bede237a07e121b56d91a491eb7bcdfd1f5907926a9e58338f964a01b17fa",  # USDT address
-        f"address:{APTOS_CONFIG['account']}",  # fund_manager
-        "u64:100",  # fee_rate (1% = 100 basis points)
-        "--profile", "mainnet"
-    ], capture_output=True, text=True)
-    
-    if create_result.returncode != 0:
+    try:
+        vault_txn = get_backend().run_transaction(
+            f"{APTOS_CONFIG['account']}::vault_core::create_vault",
+            args=[
+                "address:0xf22bede237a07e121b56d91a491eb7bcdfd1f5907926a9e58338f964a01b17fa",  # USDT address
+                f"address:{APTOS_CONFIG['account']}",  # fund_manager
+                "u64:100",  # fee_rate (1% = 100 basis points)
+            ]
+        )
+        vault_id = CreationResolver().resolve(vault_txn, "vault")
+    except Exception as e:
         print("❌ Vault creation failed:")
-        print(create_result.stderr)
+        print(e)
         return False
     
-    print("✅ Vault created successfully!")
+    print(f"✅ Vault {vault_id} created successfully!")
     
     # Create comptroller for the vault
     print("\n🎛️ Creating comptroller...")
-    comptroller_result = subprocess.run([
-        "aptos", "move", "run",
-        "--function-id", f"{APTOS_CONFIG['account']}::vault_comptroller::create_comptroller",
-        "--args",
-        "u64:0",  # vault_id (first vault)
-        f"address:{APTOS_CONFIG['account']}",  # fund_manager
-        "--profile", "mainnet"
-    ], capture_output=True, text=True)
-    
-    if comptroller_result.returncode != 0:
+    try:
+        get_backend().run(
+            f"{APTOS_CONFIG['account']}::vault_comptroller::create_comptroller",
+            args=[
+                f"u64:{vault_id}",  # vault_id
+                f"address:{APTOS_CONFIG['account']}",  # fund_manager
+            ]
+        )
+    except Exception as e:
         print("❌ Comptroller creation failed:")
-        print(comptroller_result.stderr)
+        print(e)
         return False
     
     print("✅ Comptroller created successfully!")
@@ -143,5 +145,9 @@ def main():
     return True
 
 if __name__ == "__main__":
-    success = main()
+    try:
+        success = main()
+    finally:
+        if _backend is not None:
+            _backend.close()
     sys.exit(0 if success else 1) 
\ No newline at end of file
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The API modules are imported as ``api.*``, the same way the scripts import them
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
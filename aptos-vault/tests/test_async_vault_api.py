@@ -0,0 +1,133 @@
+import asyncio
+import json
+import threading
+
+from api.async_aptos_vault_api import AsyncAptosVaultAPI
+
+MODULE = "0xcafe"
+
+
+class FakeClient:
+    """Answers view calls from a dict keyed by function name and records them"""
+
+    def __init__(self, ledger_version: int = 100):
+        self.ledger_version = ledger_version
+        self.views = []
+        self.shares = {}
+        self.totals = (1_000, 2_000)
+
+    async def info(self):
+        return {"ledger_version": str(self.ledger_version)}
+
+    async def view(self, function, type_arguments, arguments, ledger_version=None):
+        self.views.append((function, arguments, ledger_version))
+        name = function.rsplit("::", 1)[1]
+        if name == "balance_of":
+            result = [str(self.shares[arguments[0]])]
+        elif name == "total_shares":
+            result = [str(self.totals[0])]
+        elif name == "total_assets":
+            result = [str(self.totals[1])]
+        else:
+            raise AssertionError(function)
+        return json.dumps(result).encode()
+
+
+def make_api(client):
+    api = AsyncAptosVaultAPI(client=client)
+    api.set_module_address(MODULE)
+    return api
+
+
+def test_user_positions_read_at_one_version():
+    client = FakeClient()
+    client.shares = {"0x1": 100, "0x2": 250}
+    api = make_api(client)
+
+    positions = asyncio.run(api.get_user_positions(["0x1", "0x2"], vault_id=1))
+
+    assert [(p.user_address, p.shares, p.assets) for p in positions] == [("0x1", 100, 200), ("0x2", 250, 500)]
+    assert {version for _, _, version in client.views} == {100}
+
+
+def test_user_positions_bypass_view_cache():
+    client = FakeClient()
+    client.shares = {f"0x{i:x}": i for i in range(1, 51)}
+    api = make_api(client)
+
+    asyncio.run(api.get_user_positions(list(client.shares), vault_id=1))
+
+    # Only the shared vault totals are cached, not one entry per user
+    assert api.cache.stats()["entries"] == 2
+
+
+class BalanceClient(FakeClient):
+    async def view(self, function, type_arguments, arguments, ledger_version=None):
+        self.views.append((function, arguments, ledger_version))
+        if arguments[0] == "0xbad":
+            raise RuntimeError("view failed")
+        await asyncio.sleep(0)
+        return json.dumps([str(int(arguments[0], 16)), "0", "0", "0"]).encode()
+
+
+async def collect(aiter):
+    return [item async for item in aiter]
+
+
+def test_iter_user_balances_yields_every_user():
+    client = BalanceClient()
+    api = make_api(client)
+    addresses = [f"0x{i:x}" for i in range(1, 101)] + ["0xbad"]
+
+    results = dict(asyncio.run(collect(api.iter_user_balances(iter(addresses), max_concurrency=8))))
+
+    assert set(results) == set(addresses)
+    assert results["0x20"].shares == 32
+    assert isinstance(results["0xbad"], RuntimeError)
+    assert {version for _, _, version in client.views} == {100}
+
+
+def test_iter_user_balances_raises_iterator_error():
+    api = make_api(BalanceClient())
+
+    def addresses():
+        yield "0x1"
+        yield "0x2"
+        raise ValueError("address source failed")
+
+    async def run():
+        seen = []
+        try:
+            async for user_address, _ in api.iter_user_balances(addresses(), max_concurrency=4):
+                seen.append(user_address)
+        except ValueError as e:
+            return seen, e
+
+    seen, error = asyncio.run(asyncio.wait_for(run(), timeout=5))
+    assert sorted(seen) == ["0x1", "0x2"]
+    assert str(error) == "address source failed"
+
+
+def test_confirmed_transactions_are_indexed_off_the_loop():
+    class RecordingStore:
+        def __init__(self):
+            self.ingested = []
+
+        def ingest_transaction(self, txn):
+            self.ingested.append((txn["version"], threading.get_ident()))
+            return 1
+
+    store = RecordingStore()
+    api = AsyncAptosVaultAPI(client=FakeClient(), event_store=store)
+
+    async def run():
+        confirmation = asyncio.get_running_loop().create_future()
+        confirmation.add_done_callback(api._on_confirmed)
+        confirmation.set_result({"version": "7"})
+        await asyncio.sleep(0)
+        await api.close()
+
+    asyncio.run(run())
+    [(version, thread)] = store.ingested
+    assert version == "7"
+    assert thread != threading.get_ident()
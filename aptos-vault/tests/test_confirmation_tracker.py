@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+from aptos_sdk.async_client import ApiError
+
+from api.confirmation_tracker import ConfirmationTracker, TransactionFailed
+
+
+class FakeChain:
+    """Ledger whose transactions are committed by the test"""
+
+    def __init__(self):
+        self.ledger_version = 1
+        self.committed = {}
+        self.info_calls = 0
+        self.lookups = []
+
+    def commit(self, tx_hash, success=True):
+        self.ledger_version += 1
+        self.committed[tx_hash] = {"hash": tx_hash, "success": success, "vm_status": "Move abort"}
+
+    async def info(self):
+        self.info_calls += 1
+        return {"ledger_version": str(self.ledger_version)}
+
+    async def transaction_by_hash(self, tx_hash):
+        self.lookups.append(tx_hash)
+        if tx_hash not in self.committed:
+            raise ApiError("not found", 404)
+        return self.committed[tx_hash]
+
+
+def make_tracker(chain, **kwargs):
+    return ConfirmationTracker(chain, initial_interval=0.01, max_interval=0.02, **kwargs)
+
+
+def test_resolves_many_transactions_from_one_loop():
+    chain = FakeChain()
+
+    async def run():
+        tracker = make_tracker(chain)
+        futures = [tracker.track(f"0x{i}") for i in range(10)]
+        assert tracker.track("0x3") is futures[3]
+        for i in range(10):
+            chain.commit(f"0x{i}")
+        results = await asyncio.gather(*futures)
+        await tracker.close()
+        return results
+
+    results = asyncio.run(run())
+    assert [r["hash"] for r in results] == [f"0x{i}" for i in range(10)]
+    # Every hash was found in one round, not polled separately
+    assert chain.info_calls == 1
+    assert sorted(chain.lookups) == sorted(f"0x{i}" for i in range(10))
+
+
+def test_skips_lookups_while_the_ledger_stands_still():
+    chain = FakeChain()
+
+    async def run():
+        tracker = make_tracker(chain)
+        future = tracker.track("0xa")
+        while chain.info_calls < 5:
+            await asyncio.sleep(0.01)
+        lookups = len(chain.lookups)
+        chain.commit("0xa")
+        await future
+        await tracker.close()
+        return lookups
+
+    # Only the first round looked the hash up; later rounds saw the same ledger version
+    assert asyncio.run(run()) == 1
+
+
+def test_failed_transaction_raises():
+    chain = FakeChain()
+    chain.commit("0xf", success=False)
+
+    async def run():
+        tracker = make_tracker(chain)
+        try:
+            return await tracker.wait("0xf")
+        finally:
+            await tracker.close()
+
+    with pytest.raises(TransactionFailed, match="Move abort"):
+        asyncio.run(run())
+
+
+def test_unconfirmed_transaction_times_out():
+    async def run():
+        tracker = make_tracker(FakeChain())
+        try:
+            return await tracker.wait("0xa", timeout=0.05)
+        finally:
+            await tracker.close()
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(run())
+
+
+def test_close_cancels_outstanding():
+    async def run():
+        tracker = make_tracker(FakeChain())
+        future = tracker.track("0xa")
+        await tracker.close()
+        return future, tracker.pending_count
+
+    future, pending = asyncio.run(run())
+    assert future.cancelled()
+    assert pending == 0
@@ -0,0 +1,96 @@
+from types import SimpleNamespace
+
+import pytest
+
+from api import creation_resolver
+from api.creation_resolver import CreationResolver
+
+MODULE = "0x" + "ab" * 32
+
+VAULT_RESOURCE = {
+    "total_shares": "0",
+    "total_assets": "0",
+    "id": "0",
+    "denomination_asset": "0xusdt",
+    "fund_manager": "0xmanager",
+    "fee_rate": "200",
+    "is_active": True,
+}
+
+
+def vault_txn(event_id=None, resource=VAULT_RESOURCE, success=True) -> dict:
+    changes = [
+        # Unrelated writes in the same transaction are skipped
+        {"type": "write_resource", "data": {"type": "0x1::account::Account", "data": {"sequence_number": "3"}}},
+        {"type": "write_resource", "data": {"type": f"{MODULE}::vault_core::VaultResource", "data": resource}},
+    ]
+    events = [{"type": "0x1::coin::WithdrawEvent", "data": {"amount": "100"}}]
+    if event_id is not None:
+        events.append({"type": f"{MODULE}::vault_core::VaultCreatedEvent", "data": {"vault_id": str(event_id)}})
+    return {"hash": "0xhash", "success": success, "vm_status": "Executed successfully", "changes": changes, "events": events}
+
+
+def test_id_from_creation_event():
+    resolver = CreationResolver()
+    assert resolver.resolve(vault_txn(event_id=7), "vault") == 7
+    # The event id wins over the resource's, and is written back into the metadata
+    assert resolver.get("vault", 7)["id"] == "7"
+
+
+def test_id_from_write_set_without_event():
+    resolver = CreationResolver()
+    assert resolver.resolve(vault_txn(resource={**VAULT_RESOURCE, "id": "12"}), "vault") == 12
+
+
+def test_comptroller():
+    txn = {
+        "success": True,
+        "changes": [],
+        "events": [{"type": f"{MODULE}::vault_comptroller::ComptrollerCreatedEvent", "data": {"comptroller_id": "4"}}],
+    }
+    resolver = CreationResolver()
+    assert resolver.resolve(txn, "comptroller") == 4
+    # No resource in the write set, so nothing to answer the info view with
+    assert resolver.get("comptroller", 4) is None
+    assert resolver.view_result("comptroller", 4) is None
+
+
+def test_failed_or_unrelated_transaction():
+    resolver = CreationResolver()
+    with pytest.raises(ValueError, match="failed"):
+        resolver.resolve(vault_txn(event_id=1, success=False), "vault")
+    with pytest.raises(ValueError, match="No vault created"):
+        resolver.resolve({"hash": "0xother", "changes": [], "events": []}, "vault")
+
+
+def test_view_result_in_view_order():
+    resolver = CreationResolver()
+    resolver.resolve(vault_txn(event_id=7), "vault")
+    module, function, result = resolver.view_result("vault", 7)
+    assert (module, function) == ("vault_core", "get_vault_info")
+    assert result == ["0", "0", "7", "0xusdt", "0xmanager", "200", True]
+
+
+def test_snapshot_until_superseded():
+    resolver = CreationResolver()
+    resolver.resolve(vault_txn(event_id=7), "vault")
+    assert resolver.snapshot("vault", 7) == ["0", "0", "7", "0xusdt", "0xmanager", "200", True]
+    assert resolver.snapshot("vault", 8) is None
+
+    resolver.supersede()
+    assert resolver.snapshot("vault", 7) is None
+    # The creation metadata itself is kept
+    assert resolver.get("vault", 7)["fund_manager"] == "0xmanager"
+
+
+def test_snapshot_expires(monkeypatch):
+    clock = SimpleNamespace(now=1_000.0)
+    clock.monotonic = lambda: clock.now
+    monkeypatch.setattr(creation_resolver, "time", clock)
+    resolver = CreationResolver(max_age=2.0)
+    resolver.resolve(vault_txn(event_id=7), "vault")
+    clock.now += 1.9
+    assert resolver.snapshot("vault", 7) is not None
+    # Other accounts may have changed the vault since; read it from the chain
+    clock.now += 0.2
+    assert resolver.snapshot("vault", 7) is None
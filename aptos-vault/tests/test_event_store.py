@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from api.event_store import EventIndexer, EventSource, EventStore, parse_event
+
+VAULT = "0xcafe"
+
+
+def deposit_event(user="0xa", amount=100, timestamp=1_700_000_000, sequence_number=0):
+    return {
+        "type": f"{VAULT}::vault_core_simple::DepositEvent",
+        "guid": {"account_address": VAULT, "creation_number": "4"},
+        "sequence_number": str(sequence_number),
+        "data": {"user": user, "vault_id": "1", "amount": str(amount), "shares_minted": str(amount), "timestamp": str(timestamp)},
+    }
+
+
+def swap_event(version, sequence_number, amount_in=10, amount_out=9):
+    return {
+        "type": f"{VAULT}::pancakeswap_adapter::SwapEvent",
+        "guid": {"account_address": VAULT, "creation_number": "7"},
+        "sequence_number": str(sequence_number),
+        "version": str(version),
+        "data": {"token_in": "0x1", "token_out": "0x2", "amount_in": str(amount_in), "amount_out": str(amount_out)},
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = EventStore(str(tmp_path / "events.db"))
+    yield store
+    store.close()
+
+
+def test_parse_event_skips_foreign_modules():
+    event = {"type": "0x1::coin::WithdrawEvent", "data": {"amount": "1"}}
+    assert parse_event(event) is None
+
+
+def test_ingest_transaction_indexes_vault_events(store):
+    txn = {
+        "version": "42",
+        "sender": "0xa",
+        "success": True,
+        "timestamp": "1700000005000000",
+        "payload": {"function": f"{VAULT}::vault_core_simple::deposit", "arguments": ["1", "100"]},
+        "events": [
+            deposit_event(),
+            {"type": "0x1::coin::WithdrawEvent", "data": {"amount": "100"}},
+        ],
+    }
+
+    assert store.ingest_transaction(txn) == 1
+    # Ingesting the same transaction again is a no-op
+    assert store.ingest_transaction(txn) == 0
+
+    [deposit] = store.deposits_by_user("0xa", vault=1)
+    assert (deposit["amount"], deposit["shares"], deposit["version"], deposit["timestamp"]) == (100, 100, 42, 1_700_000_000)
+
+
+def test_ingest_transaction_skips_failed(store):
+    assert store.ingest_transaction({"success": False, "events": [deposit_event()]}) == 0
+    assert store.query() == []
+
+
+def test_swap_volume_window(store):
+    rows = [parse_event(swap_event(version, n), timestamp=1_000 + n) for n, version in enumerate((10, 11, 12))]
+    store.add_events(rows)
+
+    assert store.swap_volume(since=1_001) == {"count": 2, "amount_in": 20, "amount_out": 18}
+    assert store.swap_volume(since=1_000, until=1_001)["count"] == 1
+
+
+class FakeClient:
+    def __init__(self, events, timestamps):
+        self.events = events
+        self.timestamps = timestamps
+        self.txn_lookups = []
+
+    async def events_by_event_handle(self, address, handle, field_name, limit, start):
+        return [e for e in self.events if int(e["sequence_number"]) >= start][:limit]
+
+    async def transaction_by_version(self, version):
+        self.txn_lookups.append(version)
+        return {"version": str(version), "timestamp": str(self.timestamps[version])}
+
+
+def test_indexer_pages_from_cursor_and_dates_swaps(store):
+    client = FakeClient(
+        [swap_event(10, 0), swap_event(10, 1), swap_event(11, 2)],
+        {10: 1_700_000_000_123_456, 11: 1_700_000_060_000_000},
+    )
+    source = EventSource("swaps", VAULT, f"{VAULT}::pancakeswap_adapter::SwapEvents", "events")
+    indexer = EventIndexer(client, store, [source], page_size=2)
+
+    assert asyncio.run(indexer.sync()) == {"swaps": 3}
+    assert store.get_cursor("swaps") == 3
+    assert sorted(client.txn_lookups) == [10, 11]
+    assert [row["timestamp"] for row in store.query(kind="swap")] == [1_700_000_060, 1_700_000_000, 1_700_000_000]
+
+    client.events.append(swap_event(11, 3))
+    assert asyncio.run(indexer.sync()) == {"swaps": 1}
+    assert store.swap_volume(since=1_700_000_000)["count"] == 4
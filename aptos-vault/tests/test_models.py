@@ -0,0 +1,21 @@
+import pytest
+
+from api.models import U64_MAX, convert_to_assets
+
+
+def test_convert_to_assets_floors_like_move():
+    assert convert_to_assets(1, 3, 10) == 3
+    assert convert_to_assets(2, 3, 10) == 6
+    assert convert_to_assets(500, 1_000, 2_001) == 1_000
+    assert convert_to_assets(1_000, 1_000, 2_001) == 2_001
+
+
+def test_convert_to_assets_empty_vault():
+    assert convert_to_assets(100, 0, 0) == 0
+    assert convert_to_assets(100, 0, 5_000) == 0
+
+
+def test_convert_to_assets_overflow_aborts():
+    assert convert_to_assets(U64_MAX, U64_MAX, 1) == 1
+    with pytest.raises(OverflowError):
+        convert_to_assets(2**32, 2**40, 2**32)
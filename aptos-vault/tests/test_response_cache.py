@@ -0,0 +1,164 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from api import response_cache
+from api.response_cache import AsyncResponseCache, ResponseCache, compute_etag
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    clock = FakeClock()
+    monkeypatch.setattr(response_cache, "time", clock)
+    return clock
+
+
+def test_etag_ignores_key_order():
+    assert compute_etag({"a": 1, "b": [1, 2]}) == compute_etag({"b": [1, 2], "a": 1})
+    assert compute_etag({"a": 1}) != compute_etag({"a": 2})
+
+
+def test_concurrent_requests_share_one_fetch():
+    cache = ResponseCache(ttl=60)
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def fetch(ledger_version):
+        calls.append(ledger_version)
+        started.set()
+        release.wait(5)
+        return {"success": True}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("status", fetch))) for _ in range(8)]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    # Let the followers reach the flight before the leader finishes
+    deadline = time.monotonic() + 5
+    while cache.stats()["coalesced"] < 7 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert calls == [None]
+    assert len(results) == 8 and all(result.body == {"success": True} for result in results)
+    assert cache.stats()["coalesced"] == 7
+
+
+def test_fetch_errors_reach_every_waiter():
+    cache = ResponseCache()
+
+    def fetch(ledger_version):
+        raise RuntimeError("node down")
+
+    with pytest.raises(RuntimeError, match="node down"):
+        cache.get("status", fetch)
+    assert cache.stats()["in_flight"] == 0
+
+
+def test_unchanged_ledger_renews_without_fetching(clock):
+    version = [10]
+    cache = ResponseCache(ttl=1, stale_ttl=0, version_source=lambda: version[0])
+    bodies = iter([{"n": 1}, {"n": 2}])
+    fetch = lambda ledger_version: next(bodies)
+
+    assert cache.get("status", fetch).ledger_version == 10
+    clock.now += 2
+    renewed = cache.get("status", fetch)
+    assert renewed.body == {"n": 1} and cache.stats()["renewals"] == 1
+
+    version[0] = 11
+    clock.now += 2
+    assert cache.get("status", fetch).body == {"n": 2}
+
+
+def test_stale_entry_served_while_refreshing(clock):
+    cache = ResponseCache(ttl=1, stale_ttl=5)
+    refreshed = threading.Event()
+    bodies = iter([{"n": 1}, {"n": 2}])
+
+    def fetch(ledger_version):
+        body = next(bodies)
+        if body["n"] == 2:
+            refreshed.set()
+        return body
+
+    cache.get("status", fetch)
+    clock.now += 2
+    stale = cache.get("status", fetch)
+    assert stale.stale and stale.body == {"n": 1}
+    assert refreshed.wait(5)
+
+
+def test_invalidate_drops_fetches_started_before_it(clock):
+    cache = ResponseCache(ttl=60)
+
+    def fetch(ledger_version):
+        # Our own write confirms while this read is in flight
+        cache.invalidate()
+        return {"before": True}
+
+    assert cache.get("status", fetch).body == {"before": True}
+    assert cache.stats()["entries"] == 0
+    assert cache.get("status", lambda ledger_version: {"after": True}).body == {"after": True}
+    assert cache.get("status", fetch).body == {"after": True}
+
+
+def test_uncacheable_bodies_are_not_stored():
+    cache = ResponseCache(ttl=60, cacheable=lambda body: body["success"])
+    cache.get("status", lambda ledger_version: {"success": False})
+    assert cache.stats()["entries"] == 0
+
+
+def test_async_cache_coalesces_and_invalidates():
+    async def main():
+        cache = AsyncResponseCache(ttl=60)
+        calls = []
+
+        async def fetch(ledger_version):
+            calls.append(ledger_version)
+            await asyncio.sleep(0.01)
+            return {"n": len(calls)}
+
+        results = await asyncio.gather(*(cache.get("status", fetch) for _ in range(10)))
+        assert len(calls) == 1
+        assert {result.body["n"] for result in results} == {1}
+        assert cache.stats()["coalesced"] == 9
+
+        cache.invalidate()
+        assert (await cache.get("status", fetch)).body == {"n": 2}
+
+    asyncio.run(main())
+
+
+def test_async_cancelled_request_does_not_cancel_the_fetch():
+    async def main():
+        cache = AsyncResponseCache(ttl=60)
+        release = asyncio.Event()
+
+        async def fetch(ledger_version):
+            await release.wait()
+            return {"success": True}
+
+        first = asyncio.ensure_future(cache.get("status", fetch))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(cache.get("status", fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        release.set()
+        assert (await second).body == {"success": True}
+
+    asyncio.run(main())
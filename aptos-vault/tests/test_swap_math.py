@@ -0,0 +1,114 @@
+"""swap_math against the Move code it mirrors."""
+
+import random
+
+import numpy as np
+import pytest
+
+from api.models import U64_MAX
+from api.swap_math import (
+    calculate_input_amount,
+    get_amount_in,
+    get_amount_out,
+    get_amount_out_many,
+    get_amounts_out,
+    get_amounts_out_with_reserves,
+    get_amounts_out_with_reserves_many,
+    simulate_swap_with_fees,
+    simulate_swap_with_fees_many,
+)
+
+
+def move_simulate_swap_with_fees_loop(amount: int, i: int, length: int) -> int:
+    """pancakeswap_adapter::simulate_swap_with_fees_loop, line by line"""
+    if i >= length - 1:
+        return amount
+    fee_rate = 9995
+    after_fee = (amount * fee_rate) // 10000
+    slippage = 999
+    after_slippage = (after_fee * slippage) // 1000
+    return move_simulate_swap_with_fees_loop(after_slippage, i + 1, length)
+
+
+def move_calculate_input_amount_loop(amount: int, i: int) -> int:
+    """pancakeswap_adapter::calculate_input_amount_loop, line by line"""
+    if i == 0:
+        return amount
+    slippage = 1001
+    after_slippage = (amount * slippage) // 1000
+    fee_rate = 10005
+    after_fee = (after_slippage * fee_rate) // 10000
+    return move_calculate_input_amount_loop(after_fee, i - 1)
+
+
+def test_simulate_swap_with_fees_known_values():
+    assert simulate_swap_with_fees(1_000_000, 2) == 998_500
+    assert simulate_swap_with_fees(1_000_000, 3) == 997_002
+    # A single-token path has no hop
+    assert simulate_swap_with_fees(1_000_000, 1) == 1_000_000
+
+
+def test_calculate_input_amount_known_values():
+    assert calculate_input_amount(1_000_000, 2) == 1_001_500
+    assert calculate_input_amount(1_000_000, 3) == 1_003_002
+
+
+def test_adapter_math_matches_move():
+    rng = random.Random(1)
+    amounts = [0, 1, 9, 10_000, 123_456_789] + [rng.randrange(U64_MAX // 20_000) for _ in range(500)]
+    for amount in amounts:
+        for path_length in (1, 2, 3, 4):
+            assert simulate_swap_with_fees(amount, path_length) == move_simulate_swap_with_fees_loop(amount, 0, path_length)
+            assert calculate_input_amount(amount, path_length) == move_calculate_input_amount_loop(amount, path_length - 1)
+
+
+def test_vectorised_adapter_math_matches_scalar():
+    rng = random.Random(2)
+    amounts = [rng.randrange(U64_MAX // 10_000) for _ in range(1000)]
+    expected = [simulate_swap_with_fees(amount, 3) for amount in amounts]
+    assert simulate_swap_with_fees_many(amounts, 3).tolist() == expected
+
+
+def test_aborts_where_move_aborts():
+    # u64 multiplication overflow
+    with pytest.raises(OverflowError):
+        simulate_swap_with_fees(U64_MAX // 9995 + 1, 2)
+    with pytest.raises(OverflowError):
+        simulate_swap_with_fees_many([U64_MAX // 9995 + 1], 2)
+    with pytest.raises(OverflowError):
+        calculate_input_amount(U64_MAX // 1001 + 1, 2)
+    # `len - 1` underflows for an empty path
+    with pytest.raises(OverflowError):
+        simulate_swap_with_fees(1, 0)
+    # get_amounts_out prices each hop on an empty path
+    with pytest.raises(OverflowError):
+        get_amounts_out(1_000, 2)
+    assert get_amounts_out(1_000, 1) == [1_000]
+
+
+def test_constant_product():
+    assert get_amount_out(1_000, 10**6, 10**6) == 996
+    assert get_amount_out(10**8, 10**12, 5 * 10**12) == 498_700_254
+    # get_amount_in is the smallest input that yields the output
+    amount_in = get_amount_in(996, 10**6, 10**6)
+    assert get_amount_out(amount_in, 10**6, 10**6) >= 996
+    assert get_amount_out(amount_in - 1, 10**6, 10**6) < 996
+
+    with pytest.raises(ValueError):
+        get_amount_out(1, 0, 10**6)
+    with pytest.raises(ValueError):
+        get_amount_in(10**6, 10**6, 10**6)
+
+
+def test_vectorised_constant_product_matches_scalar():
+    rng = random.Random(3)
+    amounts = [rng.randrange(10**12) for _ in range(1000)]
+    # Small reserves take the uint64 path, large ones the exact integer fallback
+    for reserve_in, reserve_out in ((10**9, 4 * 10**9), (10**15, 3 * 10**16)):
+        expected = [get_amount_out(amount, reserve_in, reserve_out) for amount in amounts]
+        assert get_amount_out_many(amounts, reserve_in, reserve_out).tolist() == expected
+
+    reserves = [(10**12, 5 * 10**12), (7 * 10**13, 10**13)]
+    expected = [get_amounts_out_with_reserves(amount, reserves)[-1] for amount in amounts]
+    assert get_amounts_out_with_reserves_many(amounts, reserves).tolist() == expected
+    assert get_amount_out_many(np.array([], dtype=np.uint64), 1, 1).size == 0
@@ -0,0 +1,169 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from aptos_sdk.account import Account
+from aptos_sdk.async_client import ApiError
+
+from api.transaction_submitter import TransactionSubmitter
+
+
+class FakeClient:
+    """Mempool that accepts everything; the test decides what lands"""
+
+    def __init__(self, sequence_number=10):
+        self.client_config = SimpleNamespace(expiration_ttl=600)
+        self.sequence_number = sequence_number
+        self.sequence_number_calls = 0
+        self.submitted = []
+        self.reject_next = None
+
+    async def account_sequence_number(self, address):
+        self.sequence_number_calls += 1
+        if isinstance(self.sequence_number, Exception):
+            raise self.sequence_number
+        return self.sequence_number
+
+    async def create_bcs_signed_transaction(self, account, payload, sequence_number):
+        return payload, sequence_number
+
+    async def submit_bcs_transaction(self, signed_transaction):
+        if self.reject_next is not None:
+            error, self.reject_next = self.reject_next, None
+            raise error
+        payload, sequence_number = signed_transaction
+        tx_hash = f"0x{sequence_number}-{len(self.submitted)}"
+        self.submitted.append((sequence_number, payload, tx_hash))
+        return tx_hash
+
+
+class FakeTracker:
+    """Confirmation futures the test resolves by hash"""
+
+    def __init__(self):
+        self.futures = {}
+
+    def track(self, tx_hash, timeout=None):
+        future = self.futures.get(tx_hash)
+        if future is None:
+            future = self.futures[tx_hash] = asyncio.get_running_loop().create_future()
+        return future
+
+    def land(self, tx_hash):
+        self.futures[tx_hash].set_result({"hash": tx_hash, "success": True})
+
+    def expire(self, tx_hash):
+        self.futures[tx_hash].set_exception(asyncio.TimeoutError(tx_hash))
+
+
+def make_submitter(client=None, **kwargs):
+    client = client or FakeClient()
+    tracker = FakeTracker()
+    return TransactionSubmitter(client, Account.generate(), tracker, **kwargs), client, tracker
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_pipelines_on_local_sequence_numbers():
+    async def run():
+        submitter, client, tracker = make_submitter()
+        pending = await submitter.submit_many([f"payload-{i}" for i in range(5)])
+        assert [p.sequence_number for p in pending] == [10, 11, 12, 13, 14]
+        assert submitter.in_flight_count == 5
+        # One chain read for the whole batch, none of them committed yet
+        assert client.sequence_number_calls == 1
+
+        for p in pending:
+            tracker.land(p.tx_hash)
+        results = await asyncio.gather(*(p.confirmation for p in pending))
+        assert [r["hash"] for r in results] == [p.tx_hash for p in pending]
+        assert submitter.in_flight_count == 0
+
+    asyncio.run(run())
+
+
+def test_max_in_flight_holds_further_submissions():
+    async def run():
+        submitter, client, tracker = make_submitter(max_in_flight=2)
+        first = await submitter.submit("a")
+        await submitter.submit("b")
+        third = asyncio.ensure_future(submitter.submit("c"))
+        await settle()
+        assert not third.done()
+
+        tracker.land(first.tx_hash)
+        assert (await third).sequence_number == 12
+
+    asyncio.run(run())
+
+
+def test_rejected_sequence_number_resyncs():
+    async def run():
+        submitter, client, tracker = make_submitter()
+        await submitter.submit("a")
+        # Another process used the account in the meantime
+        client.sequence_number = 20
+        client.reject_next = ApiError("SEQUENCE_NUMBER_TOO_OLD", 400)
+        pending = await submitter.submit("b")
+        assert pending.sequence_number == 20
+        assert client.sequence_number_calls == 2
+
+    asyncio.run(run())
+
+
+def test_expired_transaction_is_resigned_with_its_sequence_number():
+    async def run():
+        submitter, client, tracker = make_submitter()
+        pending = await submitter.submit("a")
+        first_hash = pending.tx_hash
+
+        tracker.expire(first_hash)
+        await settle()
+        assert pending.tx_hash != first_hash
+        assert client.submitted[-1][:2] == (10, "a")
+        assert pending.attempts == 2
+
+        tracker.land(pending.tx_hash)
+        assert (await pending.confirmation)["hash"] == pending.tx_hash
+
+    asyncio.run(run())
+
+
+def test_abandoned_gap_holds_submissions_until_it_clears():
+    async def run():
+        submitter, client, tracker = make_submitter(max_resubmits=0)
+        gap, behind = await submitter.submit_many(["a", "b"])
+
+        tracker.expire(gap.tx_hash)
+        with pytest.raises(asyncio.TimeoutError):
+            await gap.confirmation
+
+        # Seq 11 may still land, so seq 10 must not be reused yet
+        held = asyncio.ensure_future(submitter.submit("c"))
+        await settle()
+        assert not held.done()
+
+        tracker.expire(behind.tx_hash)
+        with pytest.raises(asyncio.TimeoutError):
+            await behind.confirmation
+        assert (await held).sequence_number == 10
+        assert client.sequence_number_calls == 3
+
+    asyncio.run(run())
+
+
+def test_failed_recovery_fails_the_caller():
+    async def run():
+        submitter, client, tracker = make_submitter()
+        pending = await submitter.submit("a")
+        client.sequence_number = ConnectionError("fullnode down")
+
+        tracker.expire(pending.tx_hash)
+        with pytest.raises(ConnectionError):
+            await asyncio.wait_for(pending.confirmation, timeout=1)
+        assert submitter.in_flight_count == 0
+
+    asyncio.run(run())
@@ -0,0 +1,136 @@
+import asyncio
+
+import pytest
+
+from api.vault_feed import VaultFeed
+
+
+class FakeVault:
+    """Vault state the test changes between ticks, with counted reads"""
+
+    def __init__(self):
+        self.version = 1
+        self.status = {"total_shares": 100, "total_usdt": 50}
+        self.balances = {"0xa": {"shares": 10}, "0xb": {"shares": 20}}
+        self.balance_reads = []
+
+    async def ledger_version(self):
+        return self.version
+
+    async def read_status(self, version):
+        return dict(self.status)
+
+    async def read_balance(self, user, version):
+        self.balance_reads.append((user, version))
+        return dict(self.balances.get(user, {"shares": 0}))
+
+    def deposit(self, user, shares):
+        self.version += 1
+        self.status["total_shares"] += shares
+        self.balances[user] = {"shares": self.balances.get(user, {"shares": 0})["shares"] + shares}
+
+
+def make_feed(vault, **kwargs):
+    # Ticks are driven by the test; the background follower never gets a turn
+    return VaultFeed(vault.ledger_version, vault.read_status, vault.read_balance, poll_interval=60, **kwargs)
+
+
+async def drain(subscription):
+    messages = []
+    while True:
+        message = await subscription.next(timeout=0.01)
+        if message is None:
+            return messages
+        messages.append(message)
+
+
+def test_subscribe_starts_with_a_snapshot():
+    async def run():
+        vault = FakeVault()
+        feed = make_feed(vault)
+        subscription = await feed.subscribe(["0xA"])
+        messages = await drain(subscription)
+        await feed.stop()
+        return messages
+
+    status, balance = asyncio.run(run())
+    assert (status.event, status.data["changes"]) == ("status", {"total_shares": 100, "total_usdt": 50})
+    assert (balance.event, balance.data["user"], balance.data["changes"]) == ("balance", "0xa", {"shares": 10})
+
+
+def test_changes_fan_out_to_the_right_subscribers():
+    async def run():
+        vault = FakeVault()
+        feed = make_feed(vault)
+        follows_a = await feed.subscribe(["0xa"])
+        follows_b = await feed.subscribe(["0xb"])
+        await drain(follows_a)
+        await drain(follows_b)
+
+        vault.deposit("0xa", 5)
+        await feed.tick()
+        got_a, got_b = await drain(follows_a), await drain(follows_b)
+        await feed.stop()
+        return got_a, got_b
+
+    got_a, got_b = asyncio.run(run())
+    assert [(m.event, m.data["changes"]) for m in got_a] == [("status", {"total_shares": 105}), ("balance", {"shares": 15})]
+    assert [(m.event, m.data["changes"]) for m in got_b] == [("status", {"total_shares": 105})]
+    # One message object, encoded once, shared by every subscriber
+    assert got_a[0] is got_b[0]
+    assert got_a[0].sse is got_b[0].sse
+
+
+def test_balances_are_only_reread_when_the_totals_move():
+    async def run():
+        vault = FakeVault()
+        feed = make_feed(vault)
+        subscription = await feed.subscribe(["0xa"])
+        await drain(subscription)
+        reads = len(vault.balance_reads)
+
+        # The ledger advances without touching the vault
+        vault.version += 1
+        assert await feed.tick() == []
+        assert len(vault.balance_reads) == reads
+        await feed.stop()
+
+    asyncio.run(run())
+
+
+def test_lagging_subscriber_is_dropped_without_stalling_others():
+    async def run():
+        vault = FakeVault()
+        feed = make_feed(vault, max_queue=4)
+        slow = await feed.subscribe()
+        fast = await feed.subscribe()
+        received = await drain(fast)
+
+        for _ in range(6):
+            vault.deposit("0xa", 1)
+            await feed.tick()
+            received += await drain(fast)
+
+        with pytest.raises(ConnectionResetError):
+            for _ in range(10):
+                await slow.next(timeout=0.01)
+        await feed.stop()
+        return received
+
+    received = asyncio.run(run())
+    assert [m.data["ledger_version"] for m in received] == [1, 2, 3, 4, 5, 6, 7]
+
+
+def test_unsubscribe_forgets_unfollowed_users():
+    async def run():
+        vault = FakeVault()
+        feed = make_feed(vault)
+        subscription = await feed.subscribe(["0xa"])
+        assert "0xa" in feed.balances
+        subscription.close()
+        await feed.stop()
+        return feed
+
+    feed = asyncio.run(run())
+    assert feed.subscriber_count == 0
+    assert feed.balances == {}
@@ -0,0 +1,80 @@
+import pytest
+
+from api import view_cache
+from api.view_cache import ViewCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    clock = FakeClock()
+    monkeypatch.setattr(view_cache, "time", clock)
+    return clock
+
+
+def test_unpinned_reads_expire_after_ttl(clock):
+    cache = ViewCache(ttl=1.0)
+    cache.put("vault_core", "get_vault_info", [1], ["a"])
+    clock.now += 0.9
+    assert cache.get("vault_core", "get_vault_info", [1]) == ["a"]
+    clock.now += 0.2
+    assert cache.get("vault_core", "get_vault_info", [1]) is ViewCache.MISSING
+
+
+def test_pinned_reads_never_go_stale(clock):
+    cache = ViewCache(ttl=1.0)
+    cache.put("vault_core", "get_vault_info", [1], ["at 10"], ledger_version=10)
+    clock.now += 3_600
+    assert cache.get("vault_core", "get_vault_info", [1], ledger_version=10) == ["at 10"]
+    # Another version, or an unpinned read, is a different entry
+    assert cache.get("vault_core", "get_vault_info", [1], ledger_version=11) is ViewCache.MISSING
+    assert cache.get("vault_core", "get_vault_info", [1]) is ViewCache.MISSING
+
+
+def test_invalidate_keeps_immutable_views(clock):
+    cache = ViewCache()
+    cache.put("vault_core", "get_usdt_address", [], ["0xusdt"])
+    cache.put("vault_core", "get_vault_info", [1], ["a"], ledger_version=10)
+    cache.invalidate()
+    assert cache.get("vault_core", "get_usdt_address", []) == ["0xusdt"]
+    assert cache.get("vault_core", "get_vault_info", [1], ledger_version=10) is ViewCache.MISSING
+    # Immutable views ignore the ledger version
+    assert cache.get("vault_core", "get_usdt_address", [], ledger_version=99) == ["0xusdt"]
+
+
+def test_lru_eviction(clock):
+    cache = ViewCache(max_entries=2)
+    cache.put("vault_core", "get_vault_info", [1], ["1"])
+    cache.put("vault_core", "get_vault_info", [2], ["2"])
+    # Touch 1 so 2 is the least recently used
+    assert cache.get("vault_core", "get_vault_info", [1]) == ["1"]
+    cache.put("vault_core", "get_vault_info", [3], ["3"])
+    assert cache.get("vault_core", "get_vault_info", [2]) is ViewCache.MISSING
+    assert cache.get("vault_core", "get_vault_info", [1]) == ["1"]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_arguments_are_part_of_the_key(clock):
+    cache = ViewCache()
+    cache.put("vault_core", "get_user_shares", ["0xa", [1, 2]], ["5"])
+    assert cache.get("vault_core", "get_user_shares", ["0xa", [1, 2]]) == ["5"]
+    assert cache.get("vault_core", "get_user_shares", ["0xa", [2, 1]]) is ViewCache.MISSING
+
+
+def test_stats(clock):
+    cache = ViewCache()
+    cache.put("vault_core", "get_usdt_address", [], ["0xusdt"])
+    cache.put("vault_core", "get_vault_info", [1], ["a"])
+    cache.get("vault_core", "get_usdt_address", [])
+    cache.get("vault_core", "get_vault_info", [1])
+    cache.get("vault_core", "get_vault_info", [2])
+    stats = cache.stats()
+    assert (stats["immutable_hits"], stats["hits"], stats["misses"]) == (1, 1, 1)
+    assert stats["hit_rate"] == pytest.approx(2 / 3)
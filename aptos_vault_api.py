@@ -5,136 +5,224 @@ Connects the Aptos vault with the existing UI and Trading Bot
 """
 
 import os
+import sys
+import hmac
 import json
-import subprocess
+import functools
+import threading
 import requests
+from pathlib import Path
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 import time
+from aptos_sdk.account_address import AccountAddress
+
+# Shared Aptos client components live in aptos-vault/api
+sys.path.append(str(Path(__file__).parent / "aptos-vault"))
+
+from api.response_cache import ResponseCache
+from api.sdk_backend import BlockingSdkBackend
 
 app = Flask(__name__)
-CORS(app)
 
 # Configuration
 VAULT_ADDRESS = "0xb380dc1036ffeed2f2fe06977a17275e4a71d9ca3a3df58b370aa7faba336c4d"  # Mainnet address
 NETWORK = "mainnet"
-APTOS_CLI_PATH = "aptos"
+APTOS_PROFILE = os.environ.get("APTOS_PROFILE", NETWORK)
+NODE_URL = os.environ.get("APTOS_NODE_URL", f"https://fullnode.{NETWORK}.aptoslabs.com/v1")
+
+# Serve the canned responses below instead of calling the chain (UI work without a deployed vault).
+# Set VAULT_API_MOCK=0 to read the chain and sign writes with the profile's account.
+MOCK_MODE = os.environ.get("VAULT_API_MOCK", "1") != "0"
+
+# Live writes sign with the server's own account, so they need "Authorization: Bearer $VAULT_API_KEY";
+# without a key configured they are refused
+API_KEY = os.environ.get("VAULT_API_KEY")
+
+# Browser origins allowed to call the API, comma separated (default: the UI dev server)
+CORS_ORIGINS = [origin.strip() for origin in os.environ.get("VAULT_API_CORS_ORIGINS", "http://localhost:5174").split(",") if origin.strip()]
+CORS(app, origins=CORS_ORIGINS)
+
+# Polled read endpoints: fresh for CACHE_TTL, then served stale while one refresh runs
+CACHE_TTL = float(os.environ.get("VAULT_API_CACHE_TTL", "1.0"))
+STALE_TTL = float(os.environ.get("VAULT_API_STALE_TTL", "5.0"))
+LEDGER_VERSION_TTL = 0.25  # about one block
 
 # USDT LayerZero address on Aptos Mainnet
 USDT_ADDRESS = "0xf22bede237a07e121b56d91a491eb7bcdfd1f5907926a9e58338f964a01b17fa"
 APT_ADDRESS = "0x1"
 PANCAKESWAP_ROUTER = "0xc7efb4076dbe143cbcd98cfaaa929ecfc8f299405d018d7e18f75ac2b0e95f60"
 
+# View results are positional; name them for the UI
+VAULT_STATUS_FIELDS = ("total_shares", "total_usdt", "total_apt", "created_at")
+USER_BALANCE_FIELDS = ("shares", "usdt_balance")
+
+MOCK_VAULT_STATUS = {
+    "total_shares": 100000000,
+    "total_usdt": 50000000,
+    "total_apt": 25000000,
+    "created_at": 1731234567
+}
+MOCK_USER_BALANCE = {
+    "shares": 50000000,
+    "usdt_balance": 25000000
+}
+
+def named_result(result, fields):
+    """Map a positional view result onto field names when the arity matches"""
+    if isinstance(result, list) and len(result) == len(fields):
+        return dict(zip(fields, result))
+    return result
+
+def api_key_error(authorization):
+    """(status, message) when a write request may not sign with the server account, else None"""
+    if not API_KEY:
+        return 403, "Writes are disabled; set VAULT_API_KEY to enable them"
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.encode(), API_KEY.encode()):
+        return 401, "Invalid or missing API key"
+    return None
+
+def signer_error(signer, address):
+    """Error message unless address is the signing account; the server cannot act for anyone else"""
+    try:
+        if AccountAddress.from_str_relaxed(address) == signer:
+            return None
+    except Exception:
+        return f"Invalid address: {address}"
+    return f"This server signs as {signer} and cannot act for {address}"
+
 class AptosVaultAPI:
-    def __init__(self):
+    def __init__(self, backend=None):
         self.vault_address = VAULT_ADDRESS
         self.network = NETWORK
-        
+        self._backend = backend
+        self._backend_lock = threading.Lock()
+
+    @property
+    def backend(self):
+        """In-process SDK backend, created on first use with the CLI profile's node and signer"""
+        if self._backend is None:
+            with self._backend_lock:
+                if self._backend is None:
+                    self._backend = BlockingSdkBackend.from_profile(APTOS_PROFILE, NODE_URL)
+        return self._backend
+
+    def function_id(self, function_name):
+        return f"{self.vault_address}::vault::{function_name}"
+
+    def signer_error(self, address):
+        """Why a write for address cannot be signed here, or None"""
+        if MOCK_MODE:
+            return None
+        account = self.backend.backend.account
+        if account is None:
+            return "No signing account configured"
+        return signer_error(account.address(), address)
+
+    def get_ledger_version(self):
+        """Current ledger version, or None when serving mock data"""
+        if MOCK_MODE:
+            return None
+        return self.backend.ledger_version()
+
     def call_vault_function(self, function_name, type_args=None, args=None):
-        """Call vault function using Aptos CLI"""
+        """Call vault function (same semantics as `aptos move run`)"""
         try:
-            # Temporary mock implementation for testing
-            if function_name == "deposit":
-                return {"success": True, "data": "Mock deposit successful"}
-            elif function_name == "withdraw":
-                return {"success": True, "data": "Mock withdraw successful"}
-            elif function_name == "rebalance":
-                return {"success": True, "data": "Mock rebalance successful"}
-            elif function_name == "swap_exact_tokens_for_tokens":
-                return {"success": True, "data": "Mock swap successful"}
-            else:
-                return {"success": False, "error": "Unknown function"}
-            
-            # Original code (commented out for now)
-            cmd = [
-                APTOS_CLI_PATH, "move", "run",
-                "--function-id", f"{self.vault_address}::vault::{function_name}",
-                "--profile", "mainnet"
-            ]
-            # 
-            # if type_args:
-            #     cmd.extend(["--type-args", *type_args])
-            # 
-            # if args:
-            #     cmd.extend(["--args", *args])
-            # 
-            # result = subprocess.run(cmd, capture_output=True, text=True)
-            # 
-            # if result.returncode == 0:
-            #     return {"success": True, "data": result.stdout}
-            # else:
-            #     return {"success": False, "error": result.stderr}
-                
+            if MOCK_MODE:
+                if function_name == "deposit":
+                    return {"success": True, "data": "Mock deposit successful"}
+                elif function_name == "withdraw":
+                    return {"success": True, "data": "Mock withdraw successful"}
+                elif function_name == "rebalance":
+                    return {"success": True, "data": "Mock rebalance successful"}
+                elif function_name == "swap_exact_tokens_for_tokens":
+                    return {"success": True, "data": "Mock swap successful"}
+                else:
+                    return {"success": False, "error": "Unknown function"}
+
+            result = self.backend.run(self.function_id(function_name), type_args, args)
+            return {"success": True, "data": result}
+
         except Exception as e:
             return {"success": False, "error": str(e)}
     
-    def get_vault_status(self):
+    def get_vault_status(self, ledger_version=None):
         """Get vault status"""
         try:
-            # Temporary mock data while contract is being deployed
-            return {
-                "success": True, 
-                "data": {
-                    "total_shares": 100000000,
-                    "total_usdt": 50000000,
-                    "total_apt": 25000000,
-                    "created_at": 1731234567
-                }
-            }
-            
-            # Original code (commented out for now)
-            cmd = [
-                APTOS_CLI_PATH, "move", "view",
-                "--function-id", f"{self.vault_address}::vault::get_vault_status",
-                "--profile", "mainnet"
-            ]
-            # 
-            # result = subprocess.run(cmd, capture_output=True, text=True)
-            # 
-            # if result.returncode == 0:
-            #     # Parse the output to extract values
-            #     output = result.stdout.strip()
-            #     # Extract values from output (simplified parsing)
-            #     return {"success": True, "data": output}
-            # else:
-            #     return {"success": False, "error": result.stderr}
-                
+            if MOCK_MODE:
+                return {"success": True, "data": dict(MOCK_VAULT_STATUS)}
+
+            result = self.backend.view(self.function_id("get_vault_status"), ledger_version=ledger_version)
+            return {"success": True, "data": named_result(result, VAULT_STATUS_FIELDS)}
+
         except Exception as e:
             return {"success": False, "error": str(e)}
     
-    def get_user_balance(self, user_address):
+    def get_user_balance(self, user_address, ledger_version=None):
         """Get user balance"""
         try:
-            # Temporary mock data
-            return {
-                "success": True,
-                "data": {
-                    "shares": 50000000,
-                    "usdt_balance": 25000000
-                }
-            }
-            
-            # Original code (commented out for now)
-            cmd = [
-                APTOS_CLI_PATH, "move", "view",
-                "--function-id", f"{self.vault_address}::vault::get_user_balance",
-                "--args", f"address:{user_address}",
-                "--profile", "mainnet"
-            ]
-            # 
-            # result = subprocess.run(cmd, capture_output=True, text=True)
-            # 
-            # if result.returncode == 0:
-            #     return {"success": True, "data": result.stdout}
-            # else:
-            #     return {"success": False, "error": result.stderr}
-                
+            if MOCK_MODE:
+                return {"success": True, "data": dict(MOCK_USER_BALANCE)}
+
+            result = self.backend.view(
+                self.function_id("get_user_balance"),
+                args=[f"address:{user_address}"],
+                ledger_version=ledger_version
+            )
+            return {"success": True, "data": named_result(result, USER_BALANCE_FIELDS)}
+
         except Exception as e:
             return {"success": False, "error": str(e)}
 
 # Initialize API
 vault_api = AptosVaultAPI()
 
+def _succeeded(body):
+    return body.get("success", False)
+
+# One ledger info call per block, shared by every endpoint cache
+ledger_cache = ResponseCache(ttl=LEDGER_VERSION_TTL, stale_ttl=0)
+
+def current_ledger_version():
+    return ledger_cache.get("ledger_version", lambda _: vault_api.get_ledger_version()).body
+
+status_cache = ResponseCache(ttl=CACHE_TTL, stale_ttl=STALE_TTL, max_entries=1,
+                             version_source=current_ledger_version, cacheable=_succeeded)
+balance_cache = ResponseCache(ttl=CACHE_TTL, stale_ttl=STALE_TTL,
+                              version_source=current_ledger_version, cacheable=_succeeded)
+
+def cached_json(cached):
+    """JSON response with ETag and cache headers; 304 when If-None-Match matches"""
+    response = jsonify(cached.body)
+    response.set_etag(cached.etag)
+    if _succeeded(cached.body):
+        response.headers["Cache-Control"] = f"max-age={int(CACHE_TTL)}, stale-while-revalidate={int(STALE_TTL)}"
+    else:
+        response.headers["Cache-Control"] = "no-store"
+    if cached.ledger_version is not None:
+        response.headers["X-Ledger-Version"] = str(cached.ledger_version)
+    return response.make_conditional(request)
+
+def requires_api_key(handler):
+    """Refuse live writes without the API key; mock writes stay open for UI work"""
+    @functools.wraps(handler)
+    def wrapper(*args, **kwargs):
+        error = None if MOCK_MODE else api_key_error(request.headers.get("Authorization"))
+        if error is not None:
+            status, message = error
+            return jsonify({"success": False, "error": message}), status
+        return handler(*args, **kwargs)
+    return wrapper
+
+def invalidate_read_caches(result):
+    """Our own committed transaction changes vault state; don't serve reads from before it"""
+    if result.get("success"):
+        ledger_cache.invalidate()
+        status_cache.invalidate()
+        balance_cache.invalidate()
+    return result
+
 @app.route('/')
 def home():
     return jsonify({
@@ -148,8 +236,8 @@ def home():
 def get_vault_status():
     """Get vault status"""
     try:
-        result = vault_api.get_vault_status()
-        return jsonify(result)
+        cached = status_cache.get("status", vault_api.get_vault_status)
+        return cached_json(cached)
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
@@ -157,12 +245,16 @@ def get_vault_status():
 def get_user_balance(user_address):
     """Get user balance"""
     try:
-        result = vault_api.get_user_balance(user_address)
-        return jsonify(result)
+        cached = balance_cache.get(
+            user_address.lower(),
+            lambda ledger_version: vault_api.get_user_balance(user_address, ledger_version)
+        )
+        return cached_json(cached)
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/api/vault/deposit', methods=['POST'])
+@requires_api_key
 def deposit():
     """Deposit USDT into vault"""
     try:
@@ -176,18 +268,23 @@ def deposit():
         if not user_address:
             return jsonify({"success": False, "error": "User address required"}), 400
         
+        error = vault_api.signer_error(user_address)
+        if error:
+            return jsonify({"success": False, "error": error}), 403
+        
         # Call vault deposit function
         result = vault_api.call_vault_function(
             "deposit",
             args=[f"u64:{amount}"]
         )
         
-        return jsonify(result)
+        return jsonify(invalidate_read_caches(result))
         
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/api/vault/withdraw', methods=['POST'])
+@requires_api_key
 def withdraw():
     """Withdraw USDT from vault"""
     try:
@@ -201,18 +298,23 @@ def withdraw():
         if not user_address:
             return jsonify({"success": False, "error": "User address required"}), 400
         
+        error = vault_api.signer_error(user_address)
+        if error:
+            return jsonify({"success": False, "error": error}), 403
+        
         # Call vault withdraw function
         result = vault_api.call_vault_function(
             "withdraw",
             args=[f"u64:{shares}"]
         )
         
-        return jsonify(result)
+        return jsonify(invalidate_read_caches(result))
         
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/api/vault/rebalance', methods=['POST'])
+@requires_api_key
 def rebalance():
     """Rebalance vault (swap USDT for APT)"""
     try:
@@ -226,18 +328,23 @@ def rebalance():
         if not owner_address:
             return jsonify({"success": False, "error": "Owner address required"}), 400
         
+        error = vault_api.signer_error(owner_address)
+        if error:
+            return jsonify({"success": False, "error": error}), 403
+        
         # Call vault rebalance function
         result = vault_api.call_vault_function(
             "rebalance",
             args=[f"u64:{usdt_amount}"]
         )
         
-        return jsonify(result)
+        return jsonify(invalidate_read_caches(result))
         
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/api/vault/swap', methods=['POST'])
+@requires_api_key
 def swap_tokens():
     """Swap tokens using PancakeSwap"""
     try:
@@ -263,7 +370,7 @@ def swap_tokens():
             ]
         )
         
-        return jsonify(result)
+        return jsonify(invalidate_read_caches(result))
         
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
@@ -291,6 +398,7 @@ if __name__ == '__main__':
     print("   GET  /api/vault/status")
     print("   GET  /api/vault/balance/<user_address>")
     print("   GET  /api/vault/info")
+    print(f"🧪 Mode: {'mock (set VAULT_API_MOCK=0 to go live)' if MOCK_MODE else 'live'}")
     print("🌍 Server running on http://localhost:5001")
     
-    app.run(host='0.0.0.0', port=5001, debug=True) 
\ No newline at end of file
+    app.run(host='0.0.0.0', port=5001)
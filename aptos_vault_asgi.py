@@ -0,0 +1,543 @@
+#!/usr/bin/env python3
+"""
+Aptos Vault ASGI Server
+Same /api/vault/* routes as aptos_vault_api.py, served by async handlers under
+uvicorn workers and backed by a pooled async Aptos client, plus push feeds of
+vault changes at /api/vault/stream (SSE) and /api/vault/ws (WebSocket)
+
+Writes sign with the profile's account and need VAULT_API_KEY, as on the Flask
+server. Sequence numbers are tracked in-process, so only one worker per
+account signs (a lock file picks it); the other workers answer writes with
+503. Run writes with WEB_CONCURRENCY=1, or behind a separate one-worker server.
+"""
+
+import asyncio
+import contextlib
+import dataclasses
+import fcntl
+import json
+import logging
+import os
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route, WebSocketRoute
+from starlette.websockets import WebSocket, WebSocketDisconnect
+
+# Shared Aptos client components live in aptos-vault/api
+sys.path.append(str(Path(__file__).parent / "aptos-vault"))
+
+from api.async_aptos_vault_api import AsyncAptosVaultAPI, PoolConfig, close_shared_clients, get_shared_client
+from api.response_cache import AsyncResponseCache, CachedResponse
+from api.sdk_backend import SdkBackend, load_account, load_profile
+from api.vault_feed import VaultFeed
+from aptos_vault_api import (
+    APT_ADDRESS,
+    APTOS_PROFILE,
+    CACHE_TTL,
+    CORS_ORIGINS,
+    LEDGER_VERSION_TTL,
+    NETWORK,
+    NODE_URL,
+    PANCAKESWAP_ROUTER,
+    STALE_TTL,
+    USDT_ADDRESS,
+    USER_BALANCE_FIELDS,
+    VAULT_ADDRESS,
+    VAULT_STATUS_FIELDS,
+    api_key_error,
+    named_result,
+    signer_error,
+)
+
+logger = logging.getLogger(__name__)
+
+REQUEST_TIMEOUT = float(os.environ.get("VAULT_API_REQUEST_TIMEOUT", "15"))
+FEED_POLL_INTERVAL = float(os.environ.get("VAULT_FEED_POLL_INTERVAL", "0.5"))
+# SSE comment lines keep idle connections open through proxies
+FEED_KEEPALIVE = 15.0
+STREAM_PATHS = ("/api/vault/stream", "/api/vault/balances")
+# Bulk balance requests: addresses per request and reads in flight per request
+MAX_BULK_ADDRESSES = int(os.environ.get("VAULT_API_MAX_BULK_ADDRESSES", "10000"))
+BULK_CONCURRENCY = int(os.environ.get("VAULT_API_BULK_CONCURRENCY", "32"))
+
+class AsyncVaultService:
+    """Async vault backend: views and entry functions run in-process on the pooled client"""
+
+    def __init__(self, node_url: str = NODE_URL, pool_config: Optional[PoolConfig] = None, backend: Optional[SdkBackend] = None):
+        self.client = get_shared_client(node_url, pool_config)
+        self.backend = backend or SdkBackend(self.client, account=load_account(load_profile(APTOS_PROFILE)))
+        self.vault_address = VAULT_ADDRESS
+        self._signer_lock = self._claim_signer()
+        # Library API on the same pool, for reads beyond the vault module's views
+        self.api = AsyncAptosVaultAPI(client=self.client)
+        self.api.set_module_address(VAULT_ADDRESS)
+
+        # Same read caching as the Flask server, without blocking the event loop.
+        # One ledger info call per block, shared by both endpoint caches.
+        self.ledger_cache = AsyncResponseCache(ttl=LEDGER_VERSION_TTL, stale_ttl=0)
+        self.status_cache = AsyncResponseCache(
+            ttl=CACHE_TTL, stale_ttl=STALE_TTL, max_entries=1,
+            version_source=self.current_ledger_version, cacheable=_succeeded,
+        )
+        self.balance_cache = AsyncResponseCache(
+            ttl=CACHE_TTL, stale_ttl=STALE_TTL,
+            version_source=self.current_ledger_version, cacheable=_succeeded,
+        )
+
+    def _claim_signer(self):
+        """Lock file held by the one worker process that signs for the account, or None"""
+        account = self.backend.account
+        if account is None:
+            return None
+        path = os.path.join(tempfile.gettempdir(), f"aptos-vault-signer-{account.address()}.lock")
+        lock = open(path, "w")
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock.close()
+            logger.info("Another worker signs for %s; writes are disabled in this one", account.address())
+            return None
+        return lock
+
+    def write_error(self, address: Optional[str] = None) -> Optional[Tuple[int, str]]:
+        """(status, message) when this worker cannot sign a write for address, else None"""
+        if self.backend.account is None:
+            return 503, "No signing account configured"
+        if self._signer_lock is None:
+            return 503, "Writes are served by a single worker; run with WEB_CONCURRENCY=1"
+        if address is not None:
+            error = signer_error(self.backend.account.address(), address)
+            if error:
+                return 403, error
+        return None
+
+    def function_id(self, function_name: str) -> str:
+        return f"{self.vault_address}::vault::{function_name}"
+
+    async def view(self, function_name: str, args: Optional[List[Any]] = None, ledger_version: Optional[int] = None) -> List[Any]:
+        """Call a vault view function and decode its JSON result"""
+        return await self.backend.view(self.function_id(function_name), [], args, ledger_version)
+
+    async def read_status(self, ledger_version: int) -> Dict[str, Any]:
+        return named_result(await self.view("get_vault_status", ledger_version=ledger_version), VAULT_STATUS_FIELDS)
+
+    async def read_balance(self, user_address: str, ledger_version: int) -> Dict[str, Any]:
+        result = await self.view("get_user_balance", [f"address:{user_address}"], ledger_version)
+        return named_result(result, USER_BALANCE_FIELDS)
+
+    async def current_ledger_version(self) -> int:
+        return (await self.ledger_cache.get("ledger_version", lambda _: self.backend.ledger_version())).body
+
+    async def get_vault_status(self, ledger_version: Optional[int] = None) -> Dict[str, Any]:
+        try:
+            result = await self.view("get_vault_status", ledger_version=ledger_version)
+            return {"success": True, "data": named_result(result, VAULT_STATUS_FIELDS)}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    async def get_user_balance(self, user_address: str, ledger_version: Optional[int] = None) -> Dict[str, Any]:
+        try:
+            result = await self.view("get_user_balance", [f"address:{user_address}"], ledger_version)
+            return {"success": True, "data": named_result(result, USER_BALANCE_FIELDS)}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    async def cached_vault_status(self) -> CachedResponse:
+        return await self.status_cache.get("status", self.get_vault_status)
+
+    async def cached_user_balance(self, user_address: str) -> CachedResponse:
+        return await self.balance_cache.get(
+            user_address.lower(),
+            lambda ledger_version: self.get_user_balance(user_address, ledger_version),
+        )
+
+    def invalidate_read_caches(self):
+        """Our own committed transaction changes vault state; don't serve reads from before it"""
+        self.ledger_cache.invalidate()
+        self.status_cache.invalidate()
+        self.balance_cache.invalidate()
+
+    async def call_vault_function(self, function_name: str, type_args=None, args=None) -> Dict[str, Any]:
+        """Same semantics as the Flask server's `aptos move run`"""
+        try:
+            result = await self.backend.run(self.function_id(function_name), type_args, args)
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+        self.invalidate_read_caches()
+        return {"success": True, "data": result}
+
+    async def close(self):
+        await self.api.close()
+        await self.backend.close()
+        if self._signer_lock is not None:
+            self._signer_lock.close()
+
+class TimeoutMiddleware:
+    """Answer 504 when a request takes longer than timeout seconds"""
+
+    def __init__(self, app, timeout: float = REQUEST_TIMEOUT, exempt_paths: Sequence[str] = ()):
+        self.app = app
+        self.timeout = timeout
+        self.exempt_paths = tuple(exempt_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.exempt_paths):
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+
+        async def tracking_send(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await asyncio.wait_for(self.app(scope, receive, tracking_send), self.timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Request timed out after %ss: %s", self.timeout, scope["path"])
+            if not response_started:
+                response = JSONResponse({"success": False, "error": "Request timed out"}, status_code=504)
+                await response(scope, receive, send)
+
+def _succeeded(body: Dict[str, Any]) -> bool:
+    return body.get("success", False)
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or f'"{etag}"' in tags
+
+def cached_json(request: Request, cached: CachedResponse) -> Response:
+    """JSON response with ETag and cache headers; 304 when If-None-Match matches"""
+    headers = {"ETag": f'"{cached.etag}"'}
+    if _succeeded(cached.body):
+        headers["Cache-Control"] = f"max-age={int(CACHE_TTL)}, stale-while-revalidate={int(STALE_TTL)}"
+    else:
+        headers["Cache-Control"] = "no-store"
+    if cached.ledger_version is not None:
+        headers["X-Ledger-Version"] = str(cached.ledger_version)
+    if _etag_matches(request, cached.etag):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(cached.body, headers=headers)
+
+def _service(request: Request) -> AsyncVaultService:
+    return request.app.state.vault
+
+def _feed_users(connection) -> List[str]:
+    """Users to follow, from ?user=0x..&user=0x.. or ?users=0x..,0x.."""
+    users = connection.query_params.getlist("user")
+    for value in connection.query_params.getlist("users"):
+        users.extend(user for user in value.split(",") if user)
+    return users
+
+def _write_refusal(request: Request, address: Optional[str] = None) -> Optional[JSONResponse]:
+    """Error response when a write may not be signed here: API key, then signing worker and account"""
+    error = api_key_error(request.headers.get("authorization")) or _service(request).write_error(address)
+    if error is None:
+        return None
+    status, message = error
+    return JSONResponse({"success": False, "error": message}, status_code=status)
+
+async def _json_body(request: Request) -> Dict[str, Any]:
+    try:
+        data = await request.json()
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+# ===== ROUTES =====
+
+async def home(request: Request):
+    return JSONResponse({
+        "message": "Aptos Vault API Server",
+        "version": "1.0.0",
+        "vault_address": VAULT_ADDRESS,
+        "network": NETWORK
+    })
+
+async def get_vault_status(request: Request):
+    """Get vault status"""
+    try:
+        return cached_json(request, await _service(request).cached_vault_status())
+    except Exception as e:
+        return JSONResponse({"success": False, "error": str(e)}, status_code=500)
+
+async def get_user_balance(request: Request):
+    """Get user balance"""
+    try:
+        cached = await _service(request).cached_user_balance(request.path_params["user_address"])
+        return cached_json(request, cached)
+    except Exception as e:
+        return JSONResponse({"success": False, "error": str(e)}, status_code=500)
+
+async def deposit(request: Request):
+    """Deposit USDT into vault"""
+    try:
+        data = await _json_body(request)
+        amount = data.get('amount', 0)
+        user_address = data.get('user_address')
+
+        if not amount or amount <= 0:
+            return JSONResponse({"success": False, "error": "Invalid amount"}, status_code=400)
+
+        if not user_address:
+            return JSONResponse({"success": False, "error": "User address required"}, status_code=400)
+
+        refusal = _write_refusal(request, user_address)
+        if refusal is not None:
+            return refusal
+
+        result = await _service(request).call_vault_function("deposit", args=[f"u64:{amount}"])
+        return JSONResponse(result)
+    except Exception as e:
+        return JSONResponse({"success": False, "error": str(e)}, status_code=500)
+
+async def withdraw(request: Request):
+    """Withdraw USDT from vault"""
+    try:
+        data = await _json_body(request)
+        shares = data.get('shares', 0)
+        user_address = data.get('user_address')
+
+        if not shares or shares <= 0:
+            return JSONResponse({"success": False, "error": "Invalid shares amount"}, status_code=400)
+
+        if not user_address:
+            return JSONResponse({"success": False, "error": "User address required"}, status_code=400)
+
+        refusal = _write_refusal(request, user_address)
+        if refusal is not None:
+            return refusal
+
+        result = await _service(request).call_vault_function("withdraw", args=[f"u64:{shares}"])
+        return JSONResponse(result)
+    except Exception as e:
+        return JSONResponse({"success": False, "error": str(e)}, status_code=500)
+
+async def rebalance(request: Request):
+    """Rebalance vault (swap USDT for APT)"""
+    try:
+        data = await _json_body(request)
+        usdt_amount = data.get('usdt_amount', 0)
+        owner_address = data.get('owner_address')
+
+        if not usdt_amount or usdt_amount <= 0:
+            return JSONResponse({"success": False, "error": "Invalid USDT amount"}, status_code=400)
+
+        if not owner_address:
+            return JSONResponse({"success": False, "error": "Owner address required"}, status_code=400)
+
+        refusal = _write_refusal(request, owner_address)
+        if refusal is not None:
+            return refusal
+
+        result = await _service(request).call_vault_function("rebalance", args=[f"u64:{usdt_amount}"])
+        return JSONResponse(result)
+    except Exception as e:
+        return JSONResponse({"success": False, "error": str(e)}, status_code=500)
+
+async def swap_tokens(request: Request):
+    """Swap tokens using PancakeSwap"""
+    try:
+        data = await _json_body(request)
+        input_token = data.get('input_token')
+        output_token = data.get('output_token')
+        amount_in = data.get('amount_in', 0)
+
+        if not amount_in or amount_in <= 0:
+            return JSONResponse({"success": False, "error": "Invalid amount"}, status_code=400)
+
+        if not input_token or not output_token:
+            return JSONResponse({"success": False, "error": "Token addresses required"}, status_code=400)
+
+        refusal = _write_refusal(request)
+        if refusal is not None:
+            return refusal
+
+        result = await _service(request).call_vault_function(
+            "swap_exact_tokens_for_tokens",
+            args=[
+                f"u64:{amount_in}",
+                "u64:0",  # amount_out_min
+                f"vector<address>:[{input_token},{output_token}]",
+                "u64:0"   # deadline
+            ]
+        )
+        return JSONResponse(result)
+    except Exception as e:
+        return JSONResponse({"success": False, "error": str(e)}, status_code=500)
+
+async def stream_vault(request: Request):
+    """Server-sent events: vault status changes, plus balance changes for ?user=..."""
+    feed: VaultFeed = request.app.state.feed
+    try:
+        subscription = await feed.subscribe(_feed_users(request))
+    except Exception as e:
+        return JSONResponse({"success": False, "error": str(e)}, status_code=503)
+
+    async def events():
+        try:
+            yield f"retry: {int(FEED_POLL_INTERVAL * 1000) * 4}\n\n".encode()
+            while True:
+                message = await subscription.next(FEED_KEEPALIVE)
+                yield message.sse if message is not None else b": keepalive\n\n"
+        except ConnectionResetError:
+            logger.info("Dropped a lagging vault stream subscriber")
+        finally:
+            subscription.close()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+async def vault_websocket(websocket: WebSocket):
+    """WebSocket flavour of /api/vault/stream; messages are JSON with an "event" field"""
+    await websocket.accept()
+    feed: VaultFeed = websocket.app.state.feed
+    try:
+        subscription = await feed.subscribe(_feed_users(websocket))
+    except Exception as e:
+        await websocket.send_json({"event": "error", "error": str(e)})
+        await websocket.close(code=1011)
+        return
+
+    async def watch_close():
+        # Clients don't send anything; receiving only detects the disconnect
+        while True:
+            if (await websocket.receive())["type"] == "websocket.disconnect":
+                return
+
+    closed = asyncio.ensure_future(watch_close())
+    try:
+        while True:
+            next_message = asyncio.ensure_future(subscription.next())
+            await asyncio.wait({next_message, closed}, return_when=asyncio.FIRST_COMPLETED)
+            if closed.done():
+                next_message.cancel()
+                break
+            await websocket.send_text(next_message.result().json)
+    except ConnectionResetError:
+        logger.info("Dropped a lagging vault websocket subscriber")
+        await websocket.close(code=1013)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        closed.cancel()
+        subscription.close()
+
+async def get_user_balances(request: Request):
+    """Balance info for many addresses, streamed back as NDJSON in completion order"""
+    data = await _json_body(request)
+    addresses = data.get('addresses')
+    if not isinstance(addresses, list) or not addresses or not all(isinstance(a, str) for a in addresses):
+        return JSONResponse({"success": False, "error": "addresses must be a non-empty list of strings"}, status_code=400)
+    if len(addresses) > MAX_BULK_ADDRESSES:
+        return JSONResponse(
+            {"success": False, "error": f"At most {MAX_BULK_ADDRESSES} addresses per request"}, status_code=400
+        )
+
+    api = _service(request).api
+    try:
+        ledger_version = int(data.get('ledger_version') or await api.get_ledger_version())
+    except Exception as e:
+        return JSONResponse({"success": False, "error": str(e)}, status_code=500)
+
+    async def lines():
+        async for user_address, info in api.iter_user_balances(
+            dict.fromkeys(addresses), ledger_version, max_concurrency=BULK_CONCURRENCY
+        ):
+            if isinstance(info, Exception):
+                row = {"user_address": user_address, "ledger_version": ledger_version, "error": str(info)}
+            else:
+                row = {**dataclasses.asdict(info), "ledger_version": ledger_version}
+            yield json.dumps(row, separators=(",", ":")) + "\n"
+
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={"X-Ledger-Version": str(ledger_version)},
+    )
+
+async def get_vault_info(request: Request):
+    """Get vault information"""
+    return JSONResponse({
+        "vault_address": VAULT_ADDRESS,
+        "network": NETWORK,
+        "usdt_address": USDT_ADDRESS,
+        "apt_address": APT_ADDRESS,
+        "pancakeswap_router": PANCAKESWAP_ROUTER
+    })
+
+# ===== APPLICATION =====
+
+@contextlib.asynccontextmanager
+async def lifespan(app: Starlette):
+    # One pooled client per worker process, bound to that worker's event loop
+    app.state.vault = AsyncVaultService()
+    # One ledger follower per worker, shared by every stream connection
+    app.state.feed = VaultFeed(
+        app.state.vault.backend.ledger_version,
+        app.state.vault.read_status,
+        app.state.vault.read_balance,
+        poll_interval=FEED_POLL_INTERVAL,
+    )
+    try:
+        yield
+    finally:
+        await app.state.feed.stop()
+        await app.state.vault.close()
+        await close_shared_clients()
+
+routes = [
+    Route('/', home),
+    Route('/api/vault/status', get_vault_status, methods=['GET']),
+    Route('/api/vault/balance/{user_address}', get_user_balance, methods=['GET']),
+    Route('/api/vault/balances', get_user_balances, methods=['POST']),
+    Route('/api/vault/deposit', deposit, methods=['POST']),
+    Route('/api/vault/withdraw', withdraw, methods=['POST']),
+    Route('/api/vault/rebalance', rebalance, methods=['POST']),
+    Route('/api/vault/swap', swap_tokens, methods=['POST']),
+    Route('/api/vault/info', get_vault_info, methods=['GET']),
+    Route('/api/vault/stream', stream_vault, methods=['GET']),
+    WebSocketRoute('/api/vault/ws', vault_websocket),
+]
+
+app = Starlette(
+    routes=routes,
+    middleware=[
+        Middleware(CORSMiddleware, allow_origins=CORS_ORIGINS, allow_methods=["*"], allow_headers=["*"]),
+        Middleware(TimeoutMiddleware, timeout=REQUEST_TIMEOUT, exempt_paths=STREAM_PATHS),
+    ],
+    lifespan=lifespan,
+)
+
+if __name__ == '__main__':
+    port = int(os.environ.get("PORT", "5001"))
+    workers = int(os.environ.get("WEB_CONCURRENCY", str(os.cpu_count() or 1)))
+    print(f"🚀 Starting Aptos Vault ASGI Server with {workers} workers on http://0.0.0.0:{port}")
+    if workers > 1:
+        print("✍️  Writes are signed by one worker only; use WEB_CONCURRENCY=1 for a write server")
+    uvicorn.run(
+        "aptos_vault_asgi:app",
+        host='0.0.0.0',
+        port=port,
+        workers=workers,
+        timeout_keep_alive=5,
+        # In-flight requests get this long to finish on SIGTERM
+        timeout_graceful_shutdown=int(REQUEST_TIMEOUT) + 5,
+    )
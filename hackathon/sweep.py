@@ -0,0 +1,225 @@
+"""Backtest the momentum strategy over a grid of parameters.
+
+The trading universe is loaded once, in the parent process, from the dataset
+store under ``cache/``. Backtest workers are forked only after that, so every
+worker reads the same candle and liquidity arrays instead of loading its own copy.
+
+To run:
+
+.. code-block:: shell
+
+    export TRADING_STRATEGY_API_KEY=...
+    SWEEP_GRID=grid.json poetry run sweep
+
+``grid.json`` maps strategy parameters to the values to try, e.g.:
+
+.. code-block:: json
+
+    {
+        "momentum_lookback_period": ["4d", "7d"],
+        "max_assets_in_portfolio": [3, 5],
+        "minimum_mometum_threshold": [0.01, 0.03, 0.05]
+    }
+
+Every combination is backtested. The results table is written to ``SWEEP_OUTPUT``,
+default ``sweep-results.csv``. ``SWEEP_WORKERS`` sets the number of processes.
+"""
+import dataclasses
+import datetime
+import gc
+import importlib.util
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from types import ModuleType
+
+import pandas as pd
+
+from tradeexecutor.analysis.trade_analyser import build_trade_analysis
+from tradeexecutor.backtest.backtest_runner import run_backtest_inline
+from tradeexecutor.state.state import State
+from tradeexecutor.strategy.execution_context import ExecutionContext, ExecutionMode
+from tradeexecutor.strategy.universe_model import UniverseOptions
+from tradingstrategy.client import Client
+
+from hackathon.logs import setup_logging
+
+logger = logging.getLogger(__name__)
+
+STRATEGY_PATH = Path(__file__).resolve().parent.parent / "strategy" / "ethdubai-hackathon.py"
+
+# Strategy module globals a sweep can vary, with how to read their grid values
+SWEEP_PARAMETERS = {
+    "momentum_lookback_period": pd.Timedelta,
+    "max_assets_in_portfolio": int,
+    "stop_loss": float,
+    "take_profit": float,
+    "minimum_mometum_threshold": float,
+    "bull_market_moving_average_window": pd.Timedelta,
+}
+
+# Same backtesting period and deposit as the notebook
+START_AT = datetime.datetime(2022, 1, 1)
+END_AT = datetime.datetime(2023, 2, 1)
+INITIAL_DEPOSIT = 10_000
+
+# Set in the parent before the pool forks, inherited by the workers
+_strategy: ModuleType | None = None
+_client: Client | None = None
+_universe = None
+
+
+def load_strategy() -> ModuleType:
+    """Import the strategy module the same way trade-executor does, from its file."""
+    spec = importlib.util.spec_from_file_location("ethdubai_hackathon_strategy", STRATEGY_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def expand_grid(grid: dict[str, list]) -> list[dict]:
+    """All parameter combinations of a grid."""
+    for name in grid:
+        assert name in SWEEP_PARAMETERS, f"Cannot sweep {name}, choose from {list(SWEEP_PARAMETERS)}"
+    names = list(grid)
+    values = [[SWEEP_PARAMETERS[name](value) for value in grid[name]] for name in names]
+    return [dict(zip(names, combination)) for combination in itertools.product(*values)]
+
+
+def calculate_metrics(state: State) -> dict:
+    """Flatten the outcome of one backtest to a results table row."""
+    portfolio = state.portfolio
+    total_equity = portfolio.get_total_equity()
+
+    equity = pd.Series([stats.total_equity for stats in state.stats.portfolio], dtype="float64")
+    max_drawdown = (equity / equity.cummax() - 1).min() if len(equity) else 0.0
+
+    metrics = {
+        "total_equity": total_equity,
+        "total_return": total_equity / INITIAL_DEPOSIT - 1,
+        "max_drawdown": max_drawdown,
+        "trade_count": len(list(portfolio.get_all_trades())),
+    }
+
+    # Numeric fields of the same summary the notebook displays
+    summary = build_trade_analysis(portfolio).calculate_summary_statistics()
+    for field in dataclasses.fields(summary):
+        value = getattr(summary, field.name)
+        if isinstance(value, (int, float, datetime.timedelta)) and not isinstance(value, bool):
+            metrics.setdefault(field.name, value)
+    return metrics
+
+
+def run_backtest(parameters: dict) -> dict:
+    """Backtest one parameter combination in a worker process."""
+    for name, value in parameters.items():
+        setattr(_strategy, name, value)
+
+    started = time.perf_counter()
+    try:
+        state, _, _ = run_backtest_inline(
+            name=f"Sweep {parameters}",
+            start_at=START_AT,
+            end_at=END_AT,
+            client=_client,
+            cycle_duration=_strategy.trading_strategy_cycle,
+            decide_trades=_strategy.decide_trades,
+            create_trading_universe=_strategy.create_trading_universe,
+            initial_deposit=INITIAL_DEPOSIT,
+            reserve_currency=_strategy.reserve_currency,
+            trade_routing=_strategy.trade_routing,
+            log_level=logging.WARNING,
+            universe=_universe,
+            data_delay_tolerance=pd.Timedelta("7d"),
+        )
+        row = {**parameters, **calculate_metrics(state)}
+    except Exception as e:
+        # One failing combination must not take the sweep down
+        logger.exception("Backtest failed for %s", parameters)
+        row = {**parameters, "error": repr(e)}
+
+    row["backtest_seconds"] = time.perf_counter() - started
+    return row
+
+
+def run_sweep(client: Client, grid: dict[str, list], max_workers: int | None = None) -> pd.DataFrame:
+    """Backtest every combination in the grid and return one row per run.
+
+    :param grid:
+        Strategy parameter name -> values to try, see :py:data:`SWEEP_PARAMETERS`
+
+    :param max_workers:
+        Backtest processes, defaults to the CPU count
+    """
+    global _strategy, _client, _universe
+
+    runs = expand_grid(grid)
+    logger.info("Sweeping %d parameter combinations", len(runs))
+
+    _strategy = load_strategy()
+    _client = client
+    _universe = _strategy.create_trading_universe(
+        datetime.datetime.utcnow(),
+        client,
+        ExecutionContext(mode=ExecutionMode.backtesting),
+        UniverseOptions(),
+    )
+    logger.info("The trading universe has %d trading pairs", _universe.get_pair_count())
+
+    # Forked workers share the universe pages with the parent until written to.
+    # Move everything loaded so far out of the garbage collector's reach,
+    # so collections in the workers do not touch, and so copy, those pages.
+    gc.collect()
+    gc.freeze()
+
+    rows = []
+    context = multiprocessing.get_context("fork")
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as pool:
+        futures = [pool.submit(run_backtest, parameters) for parameters in runs]
+        for future in as_completed(futures):
+            row = future.result()
+            rows.append(row)
+            logger.info(
+                "%d/%d done: %s return %s",
+                len(rows),
+                len(runs),
+                {name: row[name] for name in grid},
+                row.get("total_return", row.get("error")),
+            )
+
+    results = pd.DataFrame(rows)
+    if "total_return" in results.columns:
+        results = results.sort_values("total_return", ascending=False, ignore_index=True)
+    return results
+
+
+def sweep():
+    """Run a parameter sweep configured by environment variables."""
+
+    logger = setup_logging()
+
+    grid_path = os.environ.get("SWEEP_GRID")
+    assert grid_path is not None, "You must set SWEEP_GRID environment variable to a JSON parameter grid file"
+    with open(grid_path) as inp:
+        grid = json.load(inp)
+
+    api_key = os.environ.get("TRADING_STRATEGY_API_KEY")
+    assert api_key is not None, "You must set TRADING_STRATEGY_API_KEY environment variable"
+
+    max_workers = os.environ.get("SWEEP_WORKERS")
+    output = os.environ.get("SWEEP_OUTPUT", "sweep-results.csv")
+
+    # Share the dataset cache and store with the docker-compose trade-executor
+    client = Client.create_live_client(api_key, cache_path=Path("cache"))
+
+    results = run_sweep(client, grid, int(max_workers) if max_workers else None)
+    results.to_csv(output, index=False)
+
+    logger.info("Wrote %d backtest results to %s", len(results), output)
+    with pd.option_context("display.max_columns", None, "display.width", 200):
+        logger.info("Best runs:\n%s", results.head(10))
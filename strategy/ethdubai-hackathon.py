@@ -1,7 +1,19 @@
 import datetime
+import fcntl
+import json
 import logging
+import math
+import os
+import weakref
+from collections import deque
+from pathlib import Path
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+from pyarrow import fs
 from pandas_ta.overlap import sma
 from tradeexecutor.ethereum.routing_data import get_quickswap_default_routing_parameters
 from tradeexecutor.state.state import State
@@ -18,14 +30,18 @@ from tradeexecutor.strategy.strategy_module import (
     TradeRouting,
 )
 from tradeexecutor.strategy.trading_strategy_universe import (
+    Dataset,
     TradingStrategyUniverse,
-    load_all_data,
     translate_trading_pair,
 )
 from tradeexecutor.strategy.universe_model import UniverseOptions
 from tradeexecutor.strategy.weighting import weight_by_1_slash_n
 from tradingstrategy.chain import ChainId
 from tradingstrategy.client import Client
+from tradingstrategy.liquidity import (
+    LiquidityDataUnavailable,
+    ResampledLiquidityUniverse,
+)
 from tradingstrategy.timebucket import TimeBucket
 from tradingstrategy.universe import Universe
 
@@ -95,10 +111,283 @@ reserve_currency = ReserveCurrency.usdc
 # above its simple moving average (SMA)
 bull_market_moving_average_window = pd.Timedelta(days=15)
 
+# Recompute the bull market SMA with pandas_ta on every cycle and check
+# the incremental value against it. Slow, only for debugging backtests.
+verify_incremental_indicators = False
+
+# Where the per-exchange dataset store lives, under the client cache path
+# (the ./cache volume in docker-compose)
+dataset_store_path = "datasets"
+
+# Columns the universe is built from; everything else in the
+# all-time datasets is never read
+candle_columns = ["pair_id", "timestamp", "open", "high", "low", "close", "volume"]
+liquidity_columns = ["pair_id", "timestamp", "open", "high", "low", "close"]
+
 
 logger = logging.getLogger(__name__)
 
 
+class RollingMean:
+    """Rolling window mean updated in O(1) per value.
+
+    Replays the accumulator of pandas ``Series.rolling(length).mean()``,
+    which ``pandas_ta.sma`` uses, so fed the same values in the same
+    order it gives bit-for-bit identical results: Kahan-compensated
+    running sum, the oldest value removed before the new one is added,
+    and the same clamping and constant-window special cases.
+    """
+
+    def __init__(self, length: int):
+        self.length = length
+        self.reset()
+
+    def reset(self):
+        self.window = deque()
+        self.count = 0
+        self.nobs = 0
+        self.neg_ct = 0
+        self.sum_x = 0.0
+        self.compensation_add = 0.0
+        self.compensation_remove = 0.0
+        self.num_consecutive_same_value = 0
+        self.prev_value = None
+
+    def update(self, value: float) -> float:
+        """Push the next value and return the mean of the window ending at it."""
+        value = float(value)
+        if self.prev_value is None:
+            self.prev_value = value
+
+        if len(self.window) == self.length:
+            old = self.window.popleft()
+            # NaN values were never added
+            if old == old:
+                self.nobs -= 1
+                y = -old - self.compensation_remove
+                t = self.sum_x + y
+                self.compensation_remove = t - self.sum_x - y
+                self.sum_x = t
+                if math.copysign(1.0, old) < 0:
+                    self.neg_ct -= 1
+
+        self.window.append(value)
+        self.count += 1
+        if value == value:
+            self.nobs += 1
+            y = value - self.compensation_add
+            t = self.sum_x + y
+            self.compensation_add = t - self.sum_x - y
+            self.sum_x = t
+            if math.copysign(1.0, value) < 0:
+                self.neg_ct += 1
+
+            # pandas returns a constant window's value as is, without summation error
+            if value == self.prev_value:
+                self.num_consecutive_same_value += 1
+            else:
+                self.num_consecutive_same_value = 1
+            self.prev_value = value
+
+        return self.value
+
+    @property
+    def value(self) -> float:
+        if self.nobs < self.length or self.nobs == 0:
+            return math.nan
+        if self.num_consecutive_same_value >= self.nobs:
+            return self.prev_value
+        result = self.sum_x / self.nobs
+        if self.neg_ct == 0 and result < 0:
+            return 0.0
+        if self.neg_ct == self.nobs and result > 0:
+            return 0.0
+        return result
+
+
+class IncrementalSMA:
+    """Simple moving average of a growing candle series, kept across cycles.
+
+    Each call only feeds the candles added since the previous call. If the
+    series no longer extends what was already fed (a new backtest in the
+    same process, or history trimmed at the start), the average is rebuilt
+    from the first candle, exactly like a fresh ``pandas_ta.sma`` call.
+    """
+
+    def __init__(self, length: int):
+        self.length = length
+        self.mean = RollingMean(length)
+        self.first_timestamp = None
+        self.last_timestamp = None
+
+    def update(self, close: pd.Series) -> float | None:
+        """Return the SMA at the last value of close, or None like pandas_ta
+        when there is less than one full window of data."""
+        if len(close) == 0:
+            return None
+
+        timestamps = close.index
+        start = 0
+        if self.last_timestamp is not None and timestamps[0] == self.first_timestamp:
+            start = timestamps.searchsorted(self.last_timestamp, side="right")
+        if start != self.mean.count:
+            # The series is not a continuation of what we have seen
+            self.mean.reset()
+            start = 0
+
+        for value in close.to_numpy()[start:]:
+            self.mean.update(value)
+        self.first_timestamp = timestamps[0]
+        self.last_timestamp = timestamps[-1]
+
+        if len(close) < self.length:
+            return None
+        return self.mean.value
+
+
+# Indicator state survives between decide_trades() calls
+incremental_smas: dict[tuple[int, int], IncrementalSMA] = {}
+
+
+def get_incremental_sma(pair_id: int, close: pd.Series, length: int) -> float | None:
+    """Last value of ``pandas_ta.sma(close, length)``, updated incrementally."""
+    key = (pair_id, length)
+    indicator = incremental_smas.get(key)
+    if indicator is None:
+        indicator = incremental_smas[key] = IncrementalSMA(length)
+    value = indicator.update(close)
+
+    if verify_incremental_indicators:
+        expected = sma(close, length=length)
+        expected = None if expected is None else expected.iloc[-1]
+        assert (expected is None and value is None) or (
+            expected == value or (math.isnan(expected) and math.isnan(value))
+        ), f"Incremental SMA {value} differs from pandas_ta {expected}"
+
+    return value
+
+
+def calculate_momentum_signals(
+    candles: pd.DataFrame,
+    start: pd.Timestamp,
+    end: pd.Timestamp,
+) -> pd.DataFrame:
+    """Calculate the last candle momentum of every pair in one columnar pass.
+
+    Gives the same numbers as taking ``pair_df.iloc[-1]`` of each group
+    yielded by ``candle_universe.iterate_samples_by_pair_range(start, end)``,
+    without a Python loop over thousands of pairs.
+
+    :param candles:
+        Candle data indexed by timestamp, as in ``GroupedCandleUniverse.df``
+
+    :return:
+        DataFrame indexed by pair id, sorted, with columns
+        timestamp, open, close and momentum
+    """
+    timestamps = candles.index
+    in_range = candles[(timestamps >= start) & (timestamps <= end)]
+
+    # tail(1) keeps the original row order inside each group, so this is
+    # the same row iloc[-1] would pick
+    last_candles = in_range.groupby("pair_id", sort=False).tail(1)
+
+    open = last_candles["open"].to_numpy(dtype="float64")
+    close = last_candles["close"].to_numpy(dtype="float64")
+
+    signals = pd.DataFrame(
+        {
+            "timestamp": last_candles["timestamp"].to_numpy(),
+            "open": open,
+            "close": close,
+            # We define momentum as how many % the trading pair price gained during
+            # the momentum window
+            "momentum": (close - open) / open,
+        },
+        index=pd.Index(last_candles["pair_id"].to_numpy(), name="pair_id"),
+    )
+    return signals.sort_index()
+
+
+class LiquidityIndex:
+    """Dense pair × day matrix of the resampled liquidity.
+
+    Built once from ``universe.resampled_liquidity``, which is already
+    resampled per pair and forward filled over data gaps. A pair has its
+    liquidity from its first to its last resampled day and 0 outside it,
+    exactly what ``get_liquidity_fast`` answers. The liquidity of every
+    pair at a timestamp is then one column of the matrix.
+    """
+
+    def __init__(self, resampled_liquidity: ResampledLiquidityUniverse):
+        df = resampled_liquidity.df
+        pair_ids = df.index.get_level_values(0).to_numpy()
+        timestamps = df.index.get_level_values(1)
+
+        self.resample_period = resampled_liquidity.resample_period
+        self.step = pd.Timedelta(self.resample_period)
+        self.pair_ids = np.unique(pair_ids)
+
+        if len(timestamps) > 0:
+            self.start = timestamps.min()
+            day_count = (timestamps.max() - self.start) // self.step + 1
+        else:
+            self.start = pd.Timestamp(0)
+            day_count = 0
+
+        rows = np.searchsorted(self.pair_ids, pair_ids)
+        columns = ((timestamps - self.start) // self.step).to_numpy()
+        self.liquidity = np.zeros((len(self.pair_ids), day_count), dtype="float64")
+        self.liquidity[rows, columns] = df["value"].to_numpy(dtype="float64")
+
+    def get_rows(self, pair_ids: pd.Index) -> np.ndarray:
+        """Map pair ids to matrix rows."""
+        pair_ids = np.asarray(pair_ids)
+        rows = np.searchsorted(self.pair_ids, pair_ids)
+        found = rows < len(self.pair_ids)
+        found[found] = self.pair_ids[rows[found]] == pair_ids[found]
+        if not found.all():
+            raise LiquidityDataUnavailable(
+                f"No liquidity data for {pair_ids[~found].tolist()}"
+            )
+        return rows
+
+    def get_liquidity(self, pair_ids: pd.Index, timestamp: pd.Timestamp) -> np.ndarray:
+        """Available liquidity of the given pairs at a timestamp."""
+        rows = self.get_rows(pair_ids)
+        column = (timestamp.floor(self.resample_period) - self.start) // self.step
+        if not 0 <= column < self.liquidity.shape[1]:
+            return np.zeros(len(rows), dtype="float64")
+        return self.liquidity[:, column][rows]
+
+    def is_liquid(
+        self,
+        pair_ids: pd.Index,
+        timestamp: pd.Timestamp,
+        threshold: float,
+    ) -> np.ndarray:
+        """Mask of the pairs that have at least threshold liquidity at a timestamp.
+
+        Written as a negated < so NaN liquidity passes, like the scalar check did.
+        """
+        return ~(self.get_liquidity(pair_ids, timestamp) < threshold)
+
+
+# One index per loaded universe, dropped with the universe
+liquidity_indexes: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def get_liquidity_index(universe: Universe) -> LiquidityIndex:
+    """The liquidity index of a universe, built on first use."""
+    resampled_liquidity = universe.resampled_liquidity
+    index = liquidity_indexes.get(resampled_liquidity)
+    if index is None:
+        index = liquidity_indexes[resampled_liquidity] = LiquidityIndex(
+            resampled_liquidity
+        )
+    return index
+
+
 def decide_trades(
     timestamp: pd.Timestamp,
     universe: Universe,
@@ -140,14 +429,14 @@ def decide_trades(
         matic_price_now = matic_close.iloc[-1]
 
         # Count how many candles worth of data needed
-        matic_sma = sma(
-            matic_close,
-            length=bull_market_moving_average_window
-            / candle_data_time_frame.to_timedelta(),
+        sma_length = int(
+            bull_market_moving_average_window / candle_data_time_frame.to_timedelta()
         )
-        if matic_sma is not None:
+
+        # Only the candles added since the last cycle are fed to the average
+        sma_now = get_incremental_sma(matic_usdc.pair_id, matic_close, sma_length)
+        if sma_now is not None:
             # SMA cannot be forward filled at the beginning of the backtest period
-            sma_now = matic_sma[-1]
             assert (
                 sma_now > 0
             ), f"SMA was zero for {timestamp}, probably issue with the data?"
@@ -161,41 +450,32 @@ def decide_trades(
             if matic_price_now > sma_now:
                 bullish = True
 
-        # Get candle data for all candles, inclusive time range
-    candle_data = candle_universe.iterate_samples_by_pair_range(start, end)
-
     # Because this is long only strategy, we will honour our momentum signals only in a bull market
     if bullish:
-        # Iterate over all candles for all pairs in this timestamp (ts)
-        for pair_id, pair_df in candle_data:
-            last_candle = pair_df.iloc[-1]
-
-            assert (
-                last_candle["timestamp"] < timestamp
-            ), "Something wrong with the data - we should not be able to peek the candle of the current timestamp, but always use the previous candle"
-
-            open = last_candle["open"]
-            close = last_candle["close"]
-
-            # Get the pair information and translate it to a serialisable strategy object
-            dex_pair = pair_universe.get_pair_by_id(pair_id)
-            pair = translate_trading_pair(dex_pair)
-
-            available_liquidity = universe.resampled_liquidity.get_liquidity_fast(
-                pair_id, adjusted_timestamp
+        # Last candle open/close and momentum for all pairs, inclusive time range
+        signals = calculate_momentum_signals(candle_universe.df, start, end)
+
+        assert (
+            signals["timestamp"] < timestamp
+        ).all(), "Something wrong with the data - we should not be able to peek the candle of the current timestamp, but always use the previous candle"
+
+        # This pair has not positive momentum,
+        # we only buy when stuff goes up.
+        # Written as a negated <= so NaN momentum behaves like the scalar check did.
+        signals = signals[~(signals["momentum"] <= minimum_mometum_threshold)]
+
+        # Too limited liquidity, skip these pairs
+        liquidity_index = get_liquidity_index(universe)
+        signals = signals[
+            liquidity_index.is_liquid(
+                signals.index, adjusted_timestamp, minimum_liquidity_threshold
             )
-            if available_liquidity < minimum_liquidity_threshold:
-                # Too limited liquidity, skip this pair
-                continue
-
-            # We define momentum as how many % the trading pair price gained during
-            # the momentum window
-            momentum = (close - open) / open
+        ]
 
-            # This pair has not positive momentum,
-            # we only buy when stuff goes up
-            if momentum <= minimum_mometum_threshold:
-                continue
+        # Only the survivors get translated to serialisable strategy objects
+        for pair_id, momentum in signals["momentum"].items():
+            dex_pair = pair_universe.get_pair_by_id(int(pair_id))
+            pair = translate_trading_pair(dex_pair)
 
             alpha_model.set_signal(
                 pair,
@@ -233,6 +513,185 @@ def decide_trades(
     return trades
 
 
+#: Dataset store file holding the newest, possibly still forming, bucket
+TAIL_FRAGMENT = "tail.arrow"
+
+
+def write_arrow_file(path: Path, table: pa.Table):
+    """Atomically write (or replace) an uncompressed Arrow IPC file."""
+    tmp = path.with_name(f"{path.name}.tmp")
+    with pa.OSFile(str(tmp), "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp, path)
+
+
+def refresh_dataset_store(
+    store: Path,
+    source: Path,
+    pair_ids: np.ndarray,
+    columns: list[str],
+):
+    """Bring a dataset store up to date with a downloaded all-time dataset.
+
+    The store is a directory of uncompressed Arrow IPC files, each named by
+    the time range it covers, plus a manifest of what has been copied so
+    far. Only candles from the stored end on, and the full history of pairs
+    not stored yet, are read from the source Parquet file, with the
+    timestamp and pair filters pushed down to the scan.
+
+    The candles of the newest bucket may still be forming when the source
+    is downloaded, so they are kept apart in ``tail.arrow``. Every refresh
+    reads that bucket again and replaces the tail.
+
+    :param store:
+        Store directory for one chain, exchange, dataset and time bucket
+
+    :param source:
+        The all-time Parquet file as downloaded by the client
+
+    :param pair_ids:
+        The pairs that must be in the store
+    """
+    store.mkdir(parents=True, exist_ok=True)
+
+    # Parallel backtests share the store, so only one of them writes
+    with open(store / ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+
+        manifest_path = store / "manifest.json"
+        if manifest_path.exists():
+            manifest = json.loads(manifest_path.read_text())
+        else:
+            manifest = {"source_mtime": None, "end": None, "pair_ids": []}
+
+        source_mtime = source.stat().st_mtime
+        stored_pairs = np.asarray(manifest["pair_ids"], dtype="int64")
+        new_pairs = np.setdiff1d(pair_ids, stored_pairs)
+        if manifest["source_mtime"] == source_mtime and len(new_pairs) == 0:
+            return
+
+        source_dataset = ds.dataset(source, format="parquet")
+        wanted = ds.field("pair_id").isin(new_pairs)
+        if manifest["end"] is not None and len(stored_pairs) > 0:
+            end = pa.scalar(
+                pd.Timestamp(manifest["end"]),
+                type=source_dataset.schema.field("timestamp").type,
+            )
+            # The stored end is the tail bucket, read again to replace it.
+            # Stores written before the tail existed have it in a numbered file.
+            if (store / TAIL_FRAGMENT).exists():
+                after_end = ds.field("timestamp") >= end
+            else:
+                after_end = ds.field("timestamp") > end
+            wanted = wanted | (ds.field("pair_id").isin(stored_pairs) & after_end)
+        table = source_dataset.to_table(columns=columns, filter=wanted)
+
+        if table.num_rows > 0:
+            is_tail = pc.equal(table.column("timestamp"), pc.max(table.column("timestamp")))
+            closed = table.filter(pc.invert(is_tail))
+            if closed.num_rows > 0:
+                timestamps = closed.column("timestamp").to_pandas()
+                first, last = timestamps.min(), timestamps.max()
+                part = len([path for path in store.glob("*.arrow") if path.name != TAIL_FRAGMENT])
+                write_arrow_file(store / f"{part:05d}-{first:%Y%m%d%H%M}-{last:%Y%m%d%H%M}.arrow", closed)
+            tail = table.filter(is_tail)
+            write_arrow_file(store / TAIL_FRAGMENT, tail)
+            manifest["end"] = tail.column("timestamp")[0].as_py().isoformat()
+
+        logger.info(
+            "Appended %d rows from %s to %s", table.num_rows, source.name, store
+        )
+        manifest["source_mtime"] = source_mtime
+        manifest["pair_ids"] = np.union1d(stored_pairs, pair_ids).tolist()
+        tmp = manifest_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(manifest))
+        os.replace(tmp, manifest_path)
+
+
+def read_dataset_store(
+    store: Path,
+    pair_ids: np.ndarray,
+    columns: list[str],
+) -> pd.DataFrame:
+    """Read the given pairs and columns from a dataset store.
+
+    The Arrow files are memory mapped, so only the selected
+    columns of the selected pairs are ever paged in.
+    """
+    fragments = [str(path) for path in sorted(store.glob("*.arrow"))]
+    if not fragments:
+        return pd.DataFrame(columns=columns)
+    dataset = ds.dataset(
+        fragments, format="ipc", filesystem=fs.LocalFileSystem(use_mmap=True)
+    )
+    table = dataset.to_table(columns=columns, filter=ds.field("pair_id").isin(pair_ids))
+    return table.to_pandas()
+
+
+def load_cached_dataset(
+    client: Client,
+    time_frame: TimeBucket,
+    liquidity_time_frame: TimeBucket,
+    stop_loss_time_frame: TimeBucket,
+) -> Dataset:
+    """Load the candles, liquidity and stop loss candles of our exchange.
+
+    Same data as ``load_all_data``, but read from a local store that only
+    holds the pairs of our chain and exchange. After the first start only
+    the candles that are new in a fresh download get appended, so a cold
+    start no longer decodes the multi-gigabyte all-time datasets.
+    """
+    exchanges = client.fetch_exchange_universe()
+    pairs = client.fetch_pair_universe().to_pandas()
+
+    exchange = exchanges.get_by_chain_and_slug(chain_id, exchange_slug)
+    assert exchange is not None, f"Exchange {exchange_slug} not found on {chain_id}"
+    pair_ids = (
+        pairs.loc[pairs["exchange_id"] == exchange.exchange_id, "pair_id"]
+        .to_numpy(dtype="int64")
+    )
+
+    transport = client.transport
+    store_root = (
+        Path(transport.get_abs_cache_path())
+        / dataset_store_path
+        / f"{chain_id.value}-{exchange_slug}"
+    )
+
+    def load(name: str, source: Path, columns: list[str]) -> pd.DataFrame:
+        store = store_root / name
+        refresh_dataset_store(store, source, pair_ids, columns)
+        return read_dataset_store(store, pair_ids, columns)
+
+    candles = load(
+        f"candles-{time_frame.value}",
+        transport.fetch_candles_all_time(time_frame),
+        candle_columns,
+    )
+    liquidity = load(
+        f"liquidity-{liquidity_time_frame.value}",
+        transport.fetch_liquidity_all_time(liquidity_time_frame),
+        liquidity_columns,
+    )
+    stop_loss_candles = load(
+        f"candles-{stop_loss_time_frame.value}",
+        transport.fetch_candles_all_time(stop_loss_time_frame),
+        candle_columns,
+    )
+
+    return Dataset(
+        time_bucket=time_frame,
+        exchanges=exchanges,
+        pairs=pairs,
+        candles=candles,
+        liquidity=liquidity,
+        liquidity_time_bucket=liquidity_time_frame,
+        backtest_stop_loss_time_bucket=stop_loss_time_frame,
+        backtest_stop_loss_candles=stop_loss_candles,
+    )
+
+
 def create_trading_universe(
     ts: datetime.datetime,
     client: Client,
@@ -244,11 +703,9 @@ def create_trading_universe(
     ), f"Only strategy backtesting supported, got {execution_context.mode}"
 
     # Load data for our trading pair whitelist
-    dataset = load_all_data(
+    dataset = load_cached_dataset(
         client,
         time_frame=candle_data_time_frame,
-        execution_context=execution_context,
-        universe_options=universe_options,
         liquidity_time_frame=TimeBucket.d1,
         stop_loss_time_frame=stop_loss_data_granularity,
     )
@@ -275,4 +732,7 @@ def create_trading_universe(
         liquidity_resample_frequency="1D",
     )
 
+    # Build the pair × day liquidity index now rather than on the first cycle
+    get_liquidity_index(universe.universe)
+
     return universe
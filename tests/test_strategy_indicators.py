@@ -0,0 +1,100 @@
+"""Incremental indicators of the momentum strategy against the pandas code they replace."""
+import importlib.util
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("tradeexecutor")
+
+from tradingstrategy.liquidity import LiquidityDataUnavailable, ResampledLiquidityUniverse
+
+STRATEGY_PATH = Path(__file__).resolve().parent.parent / "strategy" / "ethdubai-hackathon.py"
+
+
+@pytest.fixture(scope="module")
+def strategy():
+    """Import the strategy module from its file, like trade-executor does."""
+    spec = importlib.util.spec_from_file_location("ethdubai_hackathon_strategy", STRATEGY_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def rolling_means(strategy, values: np.ndarray, length: int) -> np.ndarray:
+    mean = strategy.RollingMean(length)
+    return np.array([mean.update(value) for value in values])
+
+
+@pytest.mark.parametrize("length", [1, 3, 15, 50])
+def test_rolling_mean_matches_pandas(strategy, length):
+    """Bit for bit, not just approximately."""
+    rng = np.random.default_rng(length)
+    values = rng.lognormal(mean=0, sigma=3, size=2_000) * rng.choice([1e-6, 1.0, 1e6], size=2_000)
+    expected = pd.Series(values).rolling(length).mean().to_numpy()
+    np.testing.assert_array_equal(rolling_means(strategy, values, length), expected)
+
+
+def test_rolling_mean_special_cases(strategy):
+    """NaN gaps, constant runs and sign changes take pandas' special paths."""
+    values = np.array(
+        [1.0, 2.0, np.nan, 3.0, 0.1, 0.1, 0.1, 0.1, 0.1, -2.5, -2.5, 1e16, 1.0, -1e16, 0.3, 0.3, np.nan, np.nan, 4.0]
+    )
+    for length in (1, 2, 3, 5):
+        expected = pd.Series(values).rolling(length).mean().to_numpy()
+        np.testing.assert_array_equal(rolling_means(strategy, values, length), expected)
+
+
+def test_incremental_sma_continues_and_rebuilds(strategy):
+    index = pd.date_range("2023-01-01", periods=60, freq="D")
+    close = pd.Series(np.linspace(1, 2, 60) ** 2, index=index)
+    sma = strategy.IncrementalSMA(15)
+
+    assert sma.update(close[:10]) is None
+    for end in (20, 21, 40, 60):
+        assert sma.update(close[:end]) == close[:end].rolling(15).mean().iloc[-1]
+
+    # Trimmed history is not a continuation, so the mean is rebuilt
+    assert sma.update(close[5:]) == close[5:].rolling(15).mean().iloc[-1]
+
+
+def make_resampled_liquidity() -> ResampledLiquidityUniverse:
+    rng = np.random.default_rng(7)
+    rows = []
+    # Pairs start and end on different days, with gaps the resampling forward fills
+    for pair_id, start, periods in ((3, "2023-01-01", 40), (11, "2023-01-10", 15), (5, "2023-01-05", 30)):
+        timestamps = pd.date_range(start, periods=periods * 4, freq="6h")
+        keep = rng.random(len(timestamps)) > 0.3
+        for timestamp in timestamps[keep]:
+            rows.append({"pair_id": pair_id, "timestamp": timestamp, "close": rng.uniform(1_000, 1_000_000)})
+    return ResampledLiquidityUniverse(pd.DataFrame(rows))
+
+
+def test_liquidity_index_matches_get_liquidity_fast(strategy):
+    resampled = make_resampled_liquidity()
+    index = strategy.LiquidityIndex(resampled)
+    pair_ids = pd.Index([11, 3, 5])
+
+    # Before the first, between and after the last sample, and inside a day
+    for timestamp in pd.date_range("2022-12-30", "2023-02-15", freq="7h"):
+        expected = [resampled.get_liquidity_fast(pair_id, timestamp) for pair_id in pair_ids]
+        np.testing.assert_array_equal(index.get_liquidity(pair_ids, timestamp), expected)
+
+
+def test_liquidity_index_is_liquid(strategy):
+    resampled = make_resampled_liquidity()
+    index = strategy.LiquidityIndex(resampled)
+    pair_ids = pd.Index([3, 5, 11])
+    timestamp = pd.Timestamp("2023-01-12 13:00")
+
+    expected = [not resampled.get_liquidity_fast(pair_id, timestamp) < 100_000 for pair_id in pair_ids]
+    assert index.is_liquid(pair_ids, timestamp, 100_000).tolist() == expected
+
+
+def test_liquidity_index_unknown_pair(strategy):
+    index = strategy.LiquidityIndex(make_resampled_liquidity())
+    with pytest.raises(LiquidityDataUnavailable):
+        index.get_liquidity(pd.Index([3, 4]), pd.Timestamp("2023-01-12"))
+    with pytest.raises(LiquidityDataUnavailable):
+        index.get_liquidity(pd.Index([99]), pd.Timestamp("2023-01-12"))